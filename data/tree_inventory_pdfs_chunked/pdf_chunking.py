@@ -1,49 +1,25 @@
-import os
-from pypdf import PdfReader, PdfWriter
+import sys
+import argparse
+from pathlib import Path
 
-MAX_SIZE_MB = 75
-MAX_SIZE_BYTES = MAX_SIZE_MB * 1024 * 1024
-
-
-def split_pdf_in_half(pdf_path):
-    reader = PdfReader(pdf_path)
-    total_pages = len(reader.pages)
-    midpoint = total_pages // 2
-
-    base, ext = os.path.splitext(pdf_path)
-
-    writer_a = PdfWriter()
-    writer_b = PdfWriter()
-
-    for i in range(midpoint):
-        writer_a.add_page(reader.pages[i])
-
-    for i in range(midpoint, total_pages):
-        writer_b.add_page(reader.pages[i])
+# Splits every PDF in this folder over MAX_SIZE_MB into numbered parts that
+# each fit the budget (utils/pdf_assembly.py does the work).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "utils"))
 
-    with open(f"{base}_A{ext}", "wb") as f:
-        writer_a.write(f)
+from instrumentation import add_trace_args, span, start_run_from  # noqa: E402
+from pdf_assembly import split_folder  # noqa: E402
 
-    with open(f"{base}_B{ext}", "wb") as f:
-        writer_b.write(f)
-
-    print(f"Split: {pdf_path} → {base}_A{ext}, {base}_B{ext}")
-
-
-def process_current_folder():
-    for filename in os.listdir("."):
-        if not filename.lower().endswith(".pdf"):
-            continue
-
-        # Skip already-split files
-        if filename.endswith("_A.pdf") or filename.endswith("_B.pdf"):
-            continue
-
-        file_size = os.path.getsize(filename)
-
-        if file_size > MAX_SIZE_BYTES:
-            split_pdf_in_half(filename)
+MAX_SIZE_MB = 75
 
 
 if __name__ == "__main__":
-    process_current_folder()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-mb", type=float, default=MAX_SIZE_MB)
+    parser.add_argument("--workers", type=int, default=None)
+    add_trace_args(parser)
+    args = parser.parse_args()
+    start_run_from("pdf_chunking", args)
+
+    with span("chunk folder", max_mb=args.max_mb) as stage:
+        results = split_folder(".", args.max_mb, args.workers)
+        stage.add(sum(len(parts) for parts in results.values()))
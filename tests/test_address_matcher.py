@@ -0,0 +1,27 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+from address_matcher import address_set_join, match_trees, normalize_number_series
+
+
+def test_missing_numbers_are_none_for_every_dtype():
+    for series in (
+        pa.array(["12", None, " 3 "]).to_pandas(),  # Parquet string column
+        pd.Series(["12", None, " 3 "], dtype="string"),
+        pd.Series(["12", float("nan"), "3"], dtype=object),
+    ):
+        assert normalize_number_series(series).tolist() == ["12", None, "3"]
+
+
+def test_missing_numbers_never_join():
+    trees = pd.DataFrame({
+        "_street_norm": ["uhrich ave", "uhrich ave"],
+        "_street_no_norm": normalize_number_series(pa.array(["1", None]).to_pandas()),
+    })
+    points = pd.DataFrame({"_street_norm": ["uhrich ave", "uhrich ave"], "_building_norm": ["1", "None"]})
+
+    tree_addresses, matched, _ = address_set_join(trees, points)
+    assert tree_addresses == matched == {("uhrich ave", "1")}
+    assert match_trees(trees, points)["method"].tolist() == ["exact", "street only"]
@@ -0,0 +1,32 @@
+import shutil
+from pathlib import Path
+
+import cleaning
+from ocr_store import JsonDirPages
+from species_resolver import load_species_resolver
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+PAGES = [154, 155]  # page 155 has year_3 = 'Feb 93'
+
+
+def test_cached_run_prints_the_same_year_warnings(tmp_path, monkeypatch, capsys):
+    ocr_dir = tmp_path / "ocr_output"
+    ocr_dir.mkdir()
+    for page in PAGES:
+        shutil.copy(DATA / "ocr_output" / f"page_{page:06d}.json", ocr_dir)
+    monkeypatch.setattr(cleaning, "CACHE_DIR", tmp_path / "cache")
+    source = JsonDirPages(ocr_dir)
+    resolver = load_species_resolver(DATA / "species_map.csv")
+
+    def run():
+        stats = cleaning.Counter()
+        rows = list(cleaning.iter_pages(source, PAGES, resolver, stats=stats))
+        return rows, stats, capsys.readouterr().out
+
+    cold_rows, cold_stats, cold_out = run()
+    warm_rows, warm_stats, warm_out = run()
+
+    assert (cold_stats["misses"], warm_stats["hits"]) == (2, 2)
+    assert "Warning [page 155]: year_3 = 'Feb 93' → 93" in cold_out
+    assert warm_out == cold_out
+    assert warm_rows == cold_rows
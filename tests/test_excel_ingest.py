@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from excel_ingest import cache_key, cache_paths, normalize_na, to_columnar
+
+
+def test_same_named_workbooks_get_separate_cache_entries(tmp_path):
+    a, b = tmp_path / "a" / "Inventory.xlsx", tmp_path / "b" / "Inventory.xlsx"
+    assert cache_paths(a) != cache_paths(b)
+
+
+def test_replaced_workbook_with_older_mtime_is_stale(tmp_path):
+    path = tmp_path / "Inventory.xlsx"
+    path.write_bytes(b"first")
+    st = path.stat()
+    key = cache_key(path)
+
+    path.write_bytes(b"other")  # same size
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache_key(path) != key
+
+
+def test_missing_text_cells_survive_the_parquet_cache(tmp_path):
+    df = to_columnar(pd.DataFrame({"Species": ["Amur maple", None], "Tree Number": [1, 2]}))
+    df.to_parquet(tmp_path / "cache.parquet", index=False)
+    cached = normalize_na(pd.read_parquet(tmp_path / "cache.parquet"))
+
+    # object dtype with NaN, as pd.read_excel returns: not pd.NA or None
+    for frame in (df, cached):
+        assert frame["Species"].dtype == object
+        assert frame["Species"][0] == "Amur maple"
+        assert isinstance(frame["Species"][1], float)
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import asyncio
+import threading
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+from pypdf import PdfReader, PdfWriter
+
+os.environ.setdefault("HWOCR_API_TOKEN", "test")
+import handwriting_ocr as hw
+from ocr_client import OcrClient
+from ocr_store import OcrStore
+from ocr_stub_server import DOCUMENTS_PATH, serve
+from poll_scheduler import LatencyModel
+from processing_log import ProcessingLog
+
+PAGES = 6
+
+
+@pytest.fixture
+def stub(tmp_path):
+    sample = tmp_path / "sample.json"
+    sample.write_text(json.dumps({"results": [{"page_number": 1, "extractions": [{"value": "Uhrich"}]}]}))
+    # every 7th request answers 429 (Retry-After 0.2 s), every 3rd status poll 503
+    server = serve(port=0, delay=0.2, rate_limit_every=7, retry_after=0.2, sample_path=sample,
+                   status_error_every=3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pipeline(tmp_path, stub, monkeypatch):
+    # no client-side retries, so the 503s reach the pipeline's per-doc handling
+    client = OcrClient("test", f"http://127.0.0.1:{stub.server_address[1]}{DOCUMENTS_PATH}", retries=1)
+    store = OcrStore(tmp_path / "ocr.sqlite")
+    monkeypatch.setattr(hw, "client", client)
+    monkeypatch.setattr(hw, "store", store)
+    monkeypatch.setattr(hw, "REQUESTS_PER_SECOND", 50)
+
+    path = tmp_path / "merged.pdf"
+    writer = PdfWriter()
+    for _ in range(PAGES):
+        writer.add_blank_page(612, 792)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+    yield PdfReader(path), ProcessingLog(tmp_path / "log.json"), store
+    client.close()
+    store.close()
+
+
+def test_round_survives_429s_and_failed_status_polls(stub, pipeline):
+    reader, log, store = pipeline
+
+    asyncio.run(hw.run_pipeline(reader, log, latency=LatencyModel(default=0.2)))
+
+    assert log.pages("processed") == list(range(1, PAGES + 1))
+    assert sorted(store.pages()) == list(range(1, PAGES + 1))
+    stats = stub.state.stats()
+    assert stats["errors"] > 0
+    assert hw.client.calls["429"] > 0
+    # concurrent calls share the pooled keep-alive connections
+    assert stats["connections"] == hw.client.connections_opened() < stats["requests"] / 2
+
+
+def test_failed_upload_is_recorded_and_the_rest_carry_on(stub, pipeline, monkeypatch):
+    reader, log, store = pipeline
+    upload = hw.client.upload
+
+    # a 200 whose body carries no document id
+    def bad_upload(filename, *args):
+        if filename != hw.page_filename(2):
+            return upload(filename, *args)
+        r = requests.Response()
+        r.status_code = 200
+        r._content = b'{"error": "no id"}'
+        return r
+
+    monkeypatch.setattr(hw.client, "upload", bad_upload)
+    asyncio.run(hw.run_pipeline(reader, log, latency=LatencyModel(default=0.2)))
+
+    assert log.pages("failed") == [2]
+    assert log.get(2)["error"] == "'id'"
+    assert log.pages("processed") == [1, 3, 4, 5, 6]
+
+
+def test_429_blocks_the_whole_bucket():
+    async def run():
+        bucket = hw.TokenBucket(rate=100)
+        bucket.block(0.2)
+        t0 = time.monotonic()
+        await asyncio.gather(bucket.acquire(), bucket.acquire())
+        return time.monotonic() - t0
+
+    assert asyncio.run(run()) >= 0.2
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from inventory_store import parse_measurement, to_number, unit_mark
+
+HEIGHT = unit_mark("Height 1")
+DIAMETER = unit_mark("Diameter - 1981")
+
+
+def test_unit_marks_are_stripped():
+    assert to_number("10'", HEIGHT) == 10.0
+    assert to_number('20"', DIAMETER) == 20.0
+    assert to_number(" 7 ’", HEIGHT) == 7.0
+    assert to_number("3.5", HEIGHT) == 3.5
+
+
+def test_mismatched_unit_mark_goes_to_raw():
+    assert parse_measurement('25"', HEIGHT) == (None, '25"')  # inches in a feet column
+    assert parse_measurement('"', HEIGHT) == (None, '"')  # ditto mark
+    assert parse_measurement("16'", DIAMETER) == (None, "16'")
+    assert parse_measurement("'81", DIAMETER) == (None, "'81")  # a year
+    assert parse_measurement("'81", HEIGHT) == (None, "'81")
+
+
+def test_unparseable_measurement_keeps_raw_string():
+    assert parse_measurement("m/s") == (None, "m/s")
+    assert parse_measurement("10'", HEIGHT) == (10.0, None)
+    assert parse_measurement("") == (None, None)
+    assert parse_measurement("nan") == (None, None)
+
+
+def test_parquet_round_trip_keeps_every_value(tmp_path):
+    pytest.importorskip("pyarrow")
+    from inventory_store import read_inventory, write_parquet
+
+    rows = [
+        {"Page": 1, "Street": "Uhrich Ave", "Height 1": "10'", "Diameter 1": '4"', "Tree ID": "T0000001"},
+        {"Page": 1, "Street": "Uhrich Ave", "Height 1": "m/s", "Diameter 1": "2.5"},
+        {"Page": 2, "Street": "Usher St", "Height 1": None, "Diameter 1": ""},
+        {"Page": 2, "Street": "Usher St", "Height 1": '25"', "Diameter 1": "'81"},
+    ]
+    path = tmp_path / "inventory.parquet"
+    unparsed = write_parquet(rows, path, year_slots=1)
+
+    df = read_inventory(path)
+    assert df["Tree ID"][0] == "T0000001" and df["Tree ID"][1:].isna().all()
+    assert df["Height 1"].tolist()[0] == 10.0
+    assert df["Diameter 1"].tolist()[:2] == [4.0, 2.5]
+    assert df["Height 1 (raw)"].isna().tolist() == [True, False, True, False]
+    assert df["Height 1 (raw)"].tolist()[1::2] == ["m/s", '25"']
+    assert pd.isna(df["Height 1"][3]) and pd.isna(df["Diameter 1"][3])
+    assert df["Diameter 1 (raw)"][3] == "'81"
+    assert unparsed["Height 1"] == 2
+    assert sum(unparsed.values()) == 3
+
+
+def test_csv_strips_only_the_column_unit(tmp_path):
+    pytest.importorskip("pyarrow")
+    from inventory_store import csv_to_parquet, read_inventory
+
+    csv = tmp_path / "inventory.csv"
+    csv.write_text('Street,Height (1981),Diameter (1981)\nUsher St,12\',"8"""\nUsher St,"25""",\'81\n')
+    df = read_inventory(csv_to_parquet(csv))
+
+    assert df["Height (1981)"][0] == 12.0 and df["Diameter (1981)"][0] == 8.0
+    assert df["Height (1981) (raw)"][1] == '25"'
+    assert df["Diameter (1981) (raw)"][1] == "'81"
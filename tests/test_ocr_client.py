@@ -0,0 +1,56 @@
+import io
+import threading
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from ocr_client import OcrClient
+from ocr_stub_server import DOCUMENTS_PATH, serve
+
+
+@pytest.fixture
+def stub(tmp_path):
+    server = serve(port=0, delay=0, sample_path=tmp_path / "missing.json", status_error_every=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(stub, **kwargs):
+    return OcrClient("test", f"http://127.0.0.1:{stub.server_address[1]}{DOCUMENTS_PATH}", retry_delay=0, **kwargs)
+
+
+def test_calls_reuse_one_keep_alive_connection(stub):
+    stub.state.status_error_every = 0
+    with make_client(stub) as client:
+        for _ in range(20):
+            assert client.status("missing").status_code == 404
+
+        assert stub.state.stats()["connections"] == 1
+        assert client.connections_opened() == 1
+        assert client.calls["status"] == 20
+
+
+def test_5xx_is_retried_and_4xx_is_not(stub):
+    with make_client(stub) as client:
+        r = client.upload("page_000001.pdf", io.BytesIO(b"%PDF-1.4 /Type /Page"), "x", 60)
+        doc_id = r.json()["id"]
+
+        # every 2nd status poll answers 503 and is retried
+        assert [client.status(doc_id).status_code for _ in range(4)] == [200] * 4
+        assert client.calls["status"] == 7
+        assert stub.state.stats()["errors"] == 3
+
+        stub.state.status_error_every = 0
+        assert client.status("missing").status_code == 404  # not retried
+        assert client.calls["status"] == 8
+
+
+def test_persistent_5xx_is_returned_after_the_last_attempt(stub):
+    stub.state.status_error_every = 1
+    with make_client(stub, retries=3) as client:
+        assert client.status("missing").status_code == 503
+        assert client.calls["status"] == 3
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import NameObject, StreamObject
+
+import pdf_assembly
+from pdf_assembly import split_pdf, update_merged
+
+
+# pages whose content stream is page_bytes of incompressible noise, standing
+# in for scanned page images
+def write_pdf(path, pages, page_bytes=20_000):
+    writer = PdfWriter()
+    for _ in range(pages):
+        page = writer.add_blank_page(612, 792)
+        content = StreamObject()
+        content.set_data(b"%" + os.urandom(page_bytes).hex().encode()[:page_bytes] + b"\n")
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_split_parts_fit_budget_and_cover_every_page(tmp_path):
+    path = tmp_path / "Uhrich Avenue.pdf"
+    write_pdf(path, 20)
+    max_bytes = 90_000
+
+    parts = split_pdf(path, max_bytes)
+
+    assert [first for _, first, _, _ in parts] == [1] + [last + 1 for _, _, last, _ in parts[:-1]]
+    assert parts[-1][2] == 20
+    for name, first, last, size in parts:
+        assert size <= max_bytes
+        assert (tmp_path / name).stat().st_size == size
+        assert len(PdfReader(tmp_path / name).pages) == last - first + 1
+    assert len(parts) <= 6  # greedy packing, not one page per part
+
+
+def test_append_writes_only_the_increment(tmp_path):
+    write_pdf(tmp_path / "a.pdf", 3)
+    write_pdf(tmp_path / "b.pdf", 2)
+    update_merged(tmp_path, workers=1)
+    merged = tmp_path / "tree_inventory_merged.pdf"
+    before = merged.read_bytes()
+
+    write_pdf(tmp_path / "c.pdf", 4)
+    sources, added, rebuilt = update_merged(tmp_path, workers=1)
+
+    after = merged.read_bytes()
+    assert (added, rebuilt) == (1, False)
+    assert after.startswith(before)
+    assert len(after) - len(before) < 2 * (tmp_path / "c.pdf").stat().st_size
+    assert len(PdfReader(merged).pages) == 9
+
+
+def test_split_without_pypdf_internals_measures_pages_by_rendering(tmp_path, monkeypatch):
+    def no_internals(page):
+        raise AttributeError("'DecodedStreamObject' object has no attribute '_data'")
+
+    monkeypatch.setattr(pdf_assembly, "page_objects", no_internals)
+    path = tmp_path / "Uhrich Avenue.pdf"
+    write_pdf(path, 12)
+
+    parts = split_pdf(path, 90_000)
+    assert [(first, last) for _, first, last, _ in parts] == [(1, 4), (5, 8), (9, 12)]
+    assert all(size <= 90_000 for *_, size in parts)
+
+
+def test_append_without_pypdf_internals_rebuilds_in_merged_order(tmp_path, monkeypatch):
+    write_pdf(tmp_path / "b.pdf", 2)
+    update_merged(tmp_path, workers=1)
+
+    monkeypatch.setattr(pdf_assembly, "INCREMENT_API", ("_write_increment", "_no_such_method"))
+    write_pdf(tmp_path / "a.pdf", 3, page_bytes=10)  # sorts first, must still go last
+    sources, added, rebuilt = update_merged(tmp_path, workers=1)
+
+    assert (added, rebuilt) == (1, True)
+    assert [info["name"] for info in sources] == ["b.pdf", "a.pdf"]
+    merged = PdfReader(tmp_path / "tree_inventory_merged.pdf")
+    assert len(merged.pages) == 5
+    assert len(merged.pages[0].get_contents().get_data()) > 10_000  # b.pdf's pages come first
+    assert update_merged(tmp_path, workers=1)[1:] == (0, False)  # the manifest matches the rebuild
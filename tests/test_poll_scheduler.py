@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from poll_scheduler import FIRST_CHECK, LatencyModel, PollScheduler, backoff_delay
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def scheduler(clock, latency=None, jitter=0.0, rng=None):
+    return PollScheduler(latency, base=1.0, cap=30.0, jitter=jitter, clock=clock, rng=rng)
+
+
+def test_backoff_is_exponential_capped_and_jittered_within_bounds():
+    rng = random.Random(0)
+    for attempt in range(1, 10):
+        expected = min(30.0, 2.0 ** (attempt - 1))
+        delays = [backoff_delay(attempt, base=1.0, cap=30.0, jitter=0.25, rng=rng) for _ in range(200)]
+        assert expected * 0.75 <= min(delays) and max(delays) <= expected * 1.25
+        assert max(delays) - min(delays) > expected * 0.3  # actually spread out
+
+
+def test_pending_backs_off_exponentially():
+    clock = Clock()
+    s = scheduler(clock)
+    s.add("doc", [1], submitted_at=clock.now)
+    clock.now += FIRST_CHECK
+    assert s.pop_due() == ["doc"]
+
+    for attempt, delay in enumerate([1, 2, 4, 8, 16, 30, 30], start=1):
+        assert s.pending("doc") == attempt
+        assert s.next_due() == clock.now + delay
+        clock.now += delay - 0.01
+        assert s.pop_due() == []
+        clock.now += 0.01
+        assert s.pop_due() == ["doc"]
+
+
+def test_jittered_first_checks_spread_out():
+    clock = Clock()
+    s = scheduler(clock, jitter=0.25, rng=random.Random(1))
+    for i in range(50):
+        s.add(f"doc{i}", [i], submitted_at=clock.now)
+    dues = sorted(s.docs[d].due - clock.now for d in s.docs)
+    assert FIRST_CHECK * 0.75 <= dues[0] < dues[-1] <= FIRST_CHECK * 1.25
+
+
+def test_retry_after_defers_every_check():
+    clock = Clock()
+    s = scheduler(clock)
+    s.add("a", [1])
+    s.add("b", [2])
+    s.defer(5)
+
+    assert s.pop_due() == []
+    assert s.next_due() == clock.now + 5
+    clock.now += 5
+    assert sorted(s.pop_due()) == ["a", "b"]
+
+
+def test_learned_latency_shifts_the_first_check():
+    clock = Clock()
+    latency = LatencyModel()
+    s = scheduler(clock, latency)
+    s.add("early", [1], submitted_at=clock.now)
+    assert s.next_due() == clock.now + FIRST_CHECK
+
+    for seconds in (10, 12, 11):
+        latency.observe(seconds)
+    s.add("late", [2], submitted_at=clock.now)
+    assert s.docs["late"].due == clock.now + 11
+
+    # the estimate grew after "early" was scheduled: it is pushed back too
+    clock.now += FIRST_CHECK
+    assert s.pop_due() == []
+    assert s.docs["early"].due == clock.now - FIRST_CHECK + 11
+
+
+def test_done_records_latency_from_the_checks():
+    clock = Clock()
+    latency = LatencyModel()
+    s = scheduler(clock, latency)
+    submitted = clock.now
+    s.add("doc", [1, 2], submitted_at=submitted)
+
+    clock.now += FIRST_CHECK
+    s.pop_due()
+    s.pending("doc")
+    clock.now += 1
+    assert s.done("doc") == [1, 2]
+    # processed somewhere between the "processing" answer and this one
+    assert list(latency.samples) == [FIRST_CHECK + 0.5]
+
+    # no submitted_at (an older run's log): checked now, nothing learned
+    s.add("old", [3])
+    assert s.pop_due() == ["old"]
+    s.done("old")
+    assert len(latency.samples) == 1
+
+
+def test_drop_forgets_the_doc():
+    clock = Clock()
+    s = scheduler(clock)
+    s.add("a", [1])
+    s.add("b", [2])
+    s.pending("a")
+
+    assert s.drop("a") == [1]
+    assert "a" not in s and len(s) == 1
+    clock.now += 60
+    assert s.pop_due() == ["b"]  # the stale heap entry for "a" is skipped
+    s.drop("b")
+    assert s.next_due() is None
+    with pytest.raises(KeyError):
+        s.pending("a")
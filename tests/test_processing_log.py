@@ -0,0 +1,29 @@
+from processing_log import ProcessingLog
+
+
+def test_unsubmitted_follows_every_status_change(tmp_path):
+    log = ProcessingLog(tmp_path / "processing_log.json")
+    log.set(2, "processed")
+    assert log.unsubmitted(5) == [1, 3, 4, 5]
+
+    log.set(1, "submitted", doc_id="a")
+    log.set(3, "submitted", doc_id="b")
+    assert log.unsubmitted(5) == [4, 5]
+
+    log.set(3, "failed")
+    log.set(5, "processed")
+    log.set(9, "failed")  # past the last page
+    assert log.unsubmitted(5) == [3, 4]
+    assert log.unsubmitted(6) == [3, 4, 6]
+
+
+def test_unsubmitted_after_replaying_the_journal(tmp_path):
+    path = tmp_path / "processing_log.json"
+    log = ProcessingLog(path, compact_every=3)
+    for page, status in [(1, "processed"), (2, "submitted"), (3, "failed"), (4, "processed")]:
+        log.set(page, status, doc_id="a")
+    log.flush()
+
+    reopened = ProcessingLog(path)
+    assert reopened.unsubmitted(4) == [3]
+    assert reopened.summary() == {"processed": 2, "submitted": 1, "failed": 1}
@@ -0,0 +1,54 @@
+import pytest
+
+gpd = pytest.importorskip("geopandas")
+from shapely.geometry import LineString, Point
+
+from road_geocoder import RoadGeocoder, geocode_on_roads
+
+
+def roads():
+    return gpd.GeoDataFrame(
+        {"STREET": ["Uhrich Ave"], "FROM_ADDR": [100], "TO_ADDR": [200]},
+        geometry=[LineString([(0, 0), (100, 0)])],
+    )
+
+
+def test_range_cols_interpolate_along_segment():
+    geocoder = RoadGeocoder(roads(), range_cols=("FROM_ADDR", "TO_ADDR"))
+    gdf = geocode_on_roads(["150 uhrich ave"], geocoder)
+    assert gdf.geometry[0].equals(Point(50, 0))
+
+
+def test_missing_columns_raise_clear_error():
+    with pytest.raises(ValueError, match="road centerline layer is missing column"):
+        RoadGeocoder(roads().drop(columns="STREET"), range_cols=("FROM_ADDR", "TO_ADDR"))
+    with pytest.raises(ValueError, match=r"\['LO', 'HI'\]"):
+        RoadGeocoder(roads(), range_cols=("LO", "HI"))
+    with pytest.raises(ValueError, match="address_points are required"):
+        RoadGeocoder(roads())
+
+
+def test_address_points_are_reprojected_to_the_roads_crs():
+    utm = "EPSG:32613"  # UTM 13N, metres
+    streets = gpd.GeoDataFrame(
+        {"STREET": ["Uhrich Ave"]},
+        geometry=[LineString([(520000, 5590000), (520100, 5590000)])],
+        crs=utm,
+    )
+    points = gpd.GeoDataFrame(
+        {"STREET": ["Uhrich Ave"] * 2, "Address Number": [100, 200]},
+        geometry=[Point(520000, 5590010), Point(520100, 5590010)],
+        crs=utm,
+    ).to_crs("EPSG:4326")
+
+    geocoder = RoadGeocoder(streets, points)
+    gdf = geocode_on_roads(["150 uhrich ave"], geocoder)
+    assert gdf.crs == utm
+    assert gdf.geometry[0].distance(Point(520050, 5590000)) < 0.01
+
+
+def test_geographic_roads_are_rejected():
+    with pytest.raises(ValueError, match="geographic CRS"):
+        RoadGeocoder(roads().set_crs("EPSG:4326"), range_cols=("FROM_ADDR", "TO_ADDR"))
+    with pytest.raises(ValueError, match="can't be matched"):
+        RoadGeocoder(roads().set_crs("EPSG:32613"), roads().rename(columns={"FROM_ADDR": "Address Number"}))
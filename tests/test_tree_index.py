@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from cleaning import post_process_rows
+from species_resolver import load_species_resolver
+from tree_index import TreeIndex
+
+SPECIES_MAP = Path(__file__).resolve().parent.parent / "data" / "species_map.csv"
+
+# (street number, tree no, OCR species, spreadsheet species)
+TREES = [
+    ("2101", "1", "amur maple", "Amur maple"),
+    ("2101", "2", "chokecherry.", "Chokecherry"),
+    ("2105", "1", "apple", "Apple"),
+    ("2105", "2", None, None),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TreeIndex(tmp_path / "tree_index.sqlite", load_species_resolver(SPECIES_MAP))
+    yield index
+    index.close()
+
+
+def test_same_tree_gets_same_id_from_both_pipelines(index):
+    pd = pytest.importorskip("pandas")
+
+    # cleaning.py: OCR rows, species resolved by post_process_rows
+    rows = [
+        {"Street": "Uhrich Ave", "Street Number": number, "Tree No.": tree_no, "Species": ocr}
+        for number, tree_no, ocr, _ in TREES
+    ]
+    post_process_rows(rows, index.resolver)
+    index.update_page(1, rows)
+
+    # old main.py: reviewed spreadsheet rows, raw species, numeric columns
+    df = pd.DataFrame({
+        "Street": ["Uhrich Avenue"] * len(TREES),
+        "Street Number": [float(number) for number, *_ in TREES],
+        "Tree Number": [int(tree_no) for _, tree_no, *_ in TREES],
+        "Species": [sheet if sheet else "Blank" for *_, sheet in TREES],
+    })
+    ids = index.join(df, source="Uhrich Avenue - Usher Street")
+
+    assert ids.tolist() == [r["Tree ID"] for r in rows]
+    assert len(index.ids) == len(TREES)
+
+
+def test_resolved_and_raw_species_share_a_key(index):
+    resolver = index.resolver
+    assert resolver.canonical("Amur maple") == resolver.canonical("Acer ginnala") == "Acer ginnala"
+    assert resolver.canonical("Malus spp.") == resolver.canonical("Apple")
+    assert resolver.canonical(None) == resolver.canonical("Blank") == ""
+
+
+def test_missing_street_number_gets_same_id_from_both_pipelines(index):
+    pd = pytest.importorskip("pandas")
+
+    rows = [{"Street": "Usher St", "Street Number": "", "Tree No.": "1", "Species": "Apple"}]
+    index.update_page(2, rows)
+
+    # prepare_inventory casts Int64 → str: a missing number comes out as
+    # "<NA>" (pandas 2) or NaN (pandas 3); pd.NA before the cast
+    df = pd.DataFrame({
+        "Street": ["Usher Street"] * 4,
+        "Street Number": ["<NA>", float("nan"), pd.NA, None],
+        "Tree Number": [1] * 4,
+        "Species": ["Apple"] * 4,
+    })
+    ids = index.join(df, source="Uhrich Avenue - Usher Street")
+
+    assert ids.tolist() == [rows[0]["Tree ID"]] * 4
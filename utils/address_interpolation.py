@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+# Batched house-number interpolation between address points.
+#
+# Address points are sorted once by (street, house number) into flat NumPy
+# arrays. Each query is encoded as street_code * KEY_STRIDE + number, so a
+# single np.searchsorted over all points finds the bracketing lower/upper
+# address on the same street for every unmatched address at once.
+
+KEY_STRIDE = 10_000_000  # larger than any house number
+
+
+def extract_address_number(addr):
+    try:
+        return int(addr.split()[0])
+    except (AttributeError, IndexError, ValueError):
+        return np.nan
+
+
+class StreetIndex:
+    def __init__(self, address_points, street_col="STREET", number_col="Address Number"):
+        points = address_points.dropna(subset=[street_col, number_col, "geometry"])
+
+        codes, streets = pd.factorize(points[street_col])
+        numbers = points[number_col].to_numpy(dtype=float)
+        keys = codes * float(KEY_STRIDE) + numbers
+
+        # stable sort so duplicate house numbers keep file order and the
+        # bracketing point is deterministic. The old loop's
+        # sort_values().tail/head used pandas' default quicksort, which
+        # isn't stable, so on such ties it could pick a different
+        # (equally numbered) point.
+        order = np.argsort(keys, kind="mergesort")
+
+        self.crs = address_points.crs
+        self.street_codes = {s: i for i, s in enumerate(streets)}
+        self.codes = codes[order]
+        self.keys = keys[order]
+        self.numbers = numbers[order]
+        self.x = points.geometry.x.to_numpy()[order]
+        self.y = points.geometry.y.to_numpy()[order]
+
+    def interpolate(self, streets, numbers):
+        streets = pd.Series(streets, dtype=object)
+        numbers = np.asarray(numbers, dtype=float)
+        codes = streets.map(self.street_codes).to_numpy(dtype=float)
+
+        valid = ~np.isnan(codes) & ~np.isnan(numbers)
+        q = np.where(valid, codes * KEY_STRIDE + numbers, 0.0)
+
+        # last point strictly below / first point strictly above, same street
+        lower = np.searchsorted(self.keys, q, side="left") - 1
+        upper = np.searchsorted(self.keys, q, side="right")
+
+        n = len(self.keys)
+        lower_ok = (lower >= 0) & (self.codes[np.clip(lower, 0, n - 1)] == codes)
+        upper_ok = (upper < n) & (self.codes[np.clip(upper, 0, n - 1)] == codes)
+        found = valid & lower_ok & upper_ok
+
+        lo = lower[found]
+        hi = upper[found]
+        lo_num = self.numbers[lo]
+        hi_num = self.numbers[hi]
+        ratio = (numbers[found] - lo_num) / (hi_num - lo_num)
+
+        return {
+            "found": found,
+            "x": self.x[lo] + (self.x[hi] - self.x[lo]) * ratio,
+            "y": self.y[lo] + (self.y[hi] - self.y[lo]) * ratio,
+            # odd/even house numbers sit on opposite sides of the street
+            "opposite_sides": (lo_num % 2) != (hi_num % 2),
+        }
+
+
+# "123 some street" → (house number, street), as the old main.py loop did
+def split_addresses(addresses):
+    addresses = list(addresses)
+    numbers = np.array([extract_address_number(a) for a in addresses], dtype=float)
+    streets = [
+        a.replace(str(int(num)), "").strip() if not np.isnan(num) else None
+        for a, num in zip(addresses, numbers)
+    ]
+    return addresses, numbers, streets
+
+
+# Drop-in replacement for the per-address loop in the old main.py
+def interpolate_addresses(unmatched_addresses, address_points, street_col="STREET", number_col="Address Number"):
+    unmatched, numbers, streets = split_addresses(unmatched_addresses)
+
+    index = StreetIndex(address_points, street_col, number_col)
+    result = index.interpolate(streets, numbers)
+    found = result["found"]
+
+    return gpd.GeoDataFrame(
+        {
+            "Full Address": [a for a, f in zip(unmatched, found) if f],
+            "Street": [s for s, f in zip(streets, found) if f],
+            "Address Number": numbers[found].astype(int),
+            "Opposite Sides": result["opposite_sides"],
+        },
+        geometry=gpd.points_from_xy(result["x"], result["y"]),
+        crs=index.crs,
+    )
@@ -0,0 +1,144 @@
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+# Tree → address point matching.
+#
+# 1. exact hash join on (normalized street, house number)
+# 2. for streets with no exact match, fuzzy street matching against a
+#    trigram index blocked by (first letter, street type), so each street is
+#    only scored against the handful of address streets in its block
+#
+# Every tree gets a row in the match table with a method and confidence.
+
+FUZZY_THRESHOLD = 0.6
+
+METHOD_EXACT = "exact"
+METHOD_FUZZY = "fuzzy"
+METHOD_STREET_ONLY = "street only"
+METHOD_NONE = "none"
+
+
+def trigrams(s):
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def block_keys(street):
+    if not street:
+        return ()
+    tokens = street.split()
+    street_type = tokens[-1] if len(tokens) > 1 else ""
+    return (street[0], street_type), street[0]
+
+
+class StreetNameIndex:
+    def __init__(self, streets):
+        self.streets = sorted(set(streets))
+        self.grams = [trigrams(s) for s in self.streets]
+
+        # block → trigram → street ids
+        self.blocks = defaultdict(lambda: defaultdict(list))
+        for sid, street in enumerate(self.streets):
+            for key in block_keys(street):
+                for g in self.grams[sid]:
+                    self.blocks[key][g].append(sid)
+
+    def best_match(self, street):
+        grams = trigrams(street)
+
+        # try the tight (letter, type) block first, then the letter block
+        for key in block_keys(street):
+            index = self.blocks.get(key)
+            if not index:
+                continue
+
+            shared = Counter()
+            for g in grams:
+                shared.update(index.get(g, ()))
+            if not shared:
+                continue
+
+            # Dice coefficient over trigram sets
+            sid, score = max(
+                ((sid, 2 * n / (len(grams) + len(self.grams[sid]))) for sid, n in shared.items()),
+                key=lambda x: (x[1], -x[0]),
+            )
+            if score >= FUZZY_THRESHOLD:
+                return self.streets[sid], score
+
+        return None, 0.0
+
+
+# House numbers as stripped strings, None where missing. Missing values are
+# taken from isna() before the string conversion: astype(str) spells them
+# "nan", "None" or "<NA>" depending on the column's dtype.
+def normalize_number_series(series):
+    text = series.astype(str).str.strip()
+    return text.astype(object).where(series.notna() & text.ne(""), None)
+
+
+# Unique (street, number) pairs from the trees, split into those present in
+# the address points and those not. Returns (tree_addresses, matched, unmatched).
+def address_set_join(trees, address_points, tree_number_col="_street_no_norm", addr_number_col="_building_norm"):
+    addr_lookup = set(zip(address_points["_street_norm"], address_points[addr_number_col]))
+
+    # remove incomplete / invalid entries
+    tree_addresses = {
+        (s, n)
+        for s, n in zip(trees["_street_norm"], trees[tree_number_col])
+        if pd.notna(s) and pd.notna(n) and s and n
+    }
+
+    return tree_addresses, tree_addresses & addr_lookup, tree_addresses - addr_lookup
+
+
+# trees / address_points carry _street_norm plus a house-number column
+def match_trees(trees, address_points, tree_number_col="_street_no_norm", addr_number_col="_building_norm"):
+    addr_keys = (
+        address_points[["_street_norm", addr_number_col]]
+        .dropna()
+        .drop_duplicates()
+        .rename(columns={addr_number_col: "_number"})
+    )
+    addr_keys["_addr_hit"] = True
+    addr_streets = set(addr_keys["_street_norm"])
+
+    table = pd.DataFrame({
+        "street": trees["_street_norm"],
+        "number": trees[tree_number_col],
+    })
+
+    # fuzzy-resolve each distinct street that has no exact counterpart
+    index = StreetNameIndex(addr_streets)
+    resolved = {}
+    for street in table["street"].dropna().unique():
+        if street in addr_streets:
+            resolved[street] = (street, 1.0)
+        else:
+            resolved[street] = index.best_match(street)
+
+    table["matched_street"] = table["street"].map(lambda s: resolved.get(s, (None, 0.0))[0])
+    table["street_score"] = table["street"].map(lambda s: resolved.get(s, (None, 0.0))[1]).astype(float)
+
+    # hash join on (matched street, number)
+    hits = table.merge(
+        addr_keys,
+        how="left",
+        left_on=["matched_street", "number"],
+        right_on=["_street_norm", "_number"],
+    )["_addr_hit"].fillna(False).astype(bool).to_numpy()
+
+    exact_street = table["street_score"] == 1.0
+    has_street = table["matched_street"].notna()
+
+    table["method"] = METHOD_NONE
+    table.loc[has_street, "method"] = METHOD_STREET_ONLY
+    table.loc[hits & ~exact_street, "method"] = METHOD_FUZZY
+    table.loc[hits & exact_street, "method"] = METHOD_EXACT
+
+    # an address hit keeps the street score; a street-only match is halved
+    table["confidence"] = table["street_score"].where(hits, table["street_score"] * 0.5)
+    table.loc[~has_street, "confidence"] = 0.0
+
+    return table.drop(columns="street_score").set_index(trees.index)
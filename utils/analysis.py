@@ -0,0 +1,212 @@
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Growth and survival analysis over the wide "Height (YYYY)" / "Diameter (YYYY)"
+# time series. The wide columns are reshaped once into tree × year float32
+# matrices plus an observed mask; every statistic below is array or groupby
+# work on those, with no per-tree Python loops.
+
+INVENTORY_CSV = Path("../data/tree_inventories_with_address.csv")
+INVENTORY_PARQUET = Path("../data/tree_inventories_with_address.parquet")
+
+RE_MEASUREMENT = re.compile(r"^(Height|Diameter) \((\d{4})\)$")
+RE_YEAR_4 = r"((?:18|19|20)\d\d)"
+RE_YEAR_2 = r"\b(\d\d)\s*$"
+RE_REMOVED_NOTE = r"(?i)\b(?:removed|dead)\b"
+
+
+# ----------------------------
+# Loading
+# ----------------------------
+def load_inventory():
+    # typed Parquet from `inventory_store.py` when present
+    if INVENTORY_PARQUET.exists():
+        return pd.read_parquet(INVENTORY_PARQUET)
+    return pd.read_csv(INVENTORY_CSV, low_memory=False)
+
+
+class Measurements:
+    def __init__(self, df):
+        cols = {}
+        for col in df.columns:
+            m = RE_MEASUREMENT.match(col)
+            if m:
+                cols.setdefault(int(m.group(2)), {})[m.group(1)] = col
+
+        self.years = np.array(sorted(cols), dtype=np.int16)
+        self.height = self._matrix(df, [cols[y].get("Height") for y in self.years])
+        self.diameter = self._matrix(df, [cols[y].get("Diameter") for y in self.years])
+
+        # a tree counts as present in a year if either measurement was taken
+        self.observed = ~np.isnan(self.height) | ~np.isnan(self.diameter)
+
+        # survey years per page: any tree on the page was measured that year
+        page_codes, _ = pd.factorize(df["Page"])
+        surveyed = pd.DataFrame(self.observed).groupby(page_codes).any().to_numpy()
+        self.surveyed = surveyed[page_codes]
+
+    @staticmethod
+    def _matrix(df, cols):
+        out = np.full((len(df), len(cols)), np.nan, dtype=np.float32)
+        for j, col in enumerate(cols):
+            if col is not None:
+                out[:, j] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float32)
+        return out
+
+    # index of first / last True per row, -1 where a row has none
+    @staticmethod
+    def first_last(mask):
+        any_ = mask.any(axis=1)
+        first = np.where(any_, mask.argmax(axis=1), -1)
+        last = np.where(any_, mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1), -1)
+        return first, last
+
+
+def planted_year(df):
+    yp = df["Year Planted"].astype("string")
+    four = yp.str.extract(RE_YEAR_4, expand=False)
+    two = yp.str.extract(RE_YEAR_2, expand=False)
+    year = pd.to_numeric(four, errors="coerce").fillna(pd.to_numeric(two, errors="coerce") + 1900)
+    return year.to_numpy(dtype=np.float32)
+
+
+# ----------------------------
+# Per-tree growth
+# ----------------------------
+def tree_growth(df, m):
+    rows = np.arange(len(df))
+
+    def rate(values):
+        first, last = m.first_last(~np.isnan(values))
+        ok = (first >= 0) & (last > first)
+        f, l = np.clip(first, 0, None), np.clip(last, 0, None)
+        span = (m.years[l] - m.years[f]).astype(np.float32)
+        delta = values[rows, l] - values[rows, f]
+        return np.where(ok, delta / np.where(ok, span, 1), np.nan), np.where(ok, span, np.nan)
+
+    height_rate, height_span = rate(m.height)
+    diameter_rate, _ = rate(m.diameter)
+    first, last = m.first_last(m.observed)
+
+    return pd.DataFrame({
+        "Species": df["Species"].to_numpy(),
+        "first_year": np.where(first >= 0, m.years[np.clip(first, 0, None)], -1),
+        "last_year": np.where(last >= 0, m.years[np.clip(last, 0, None)], -1),
+        "n_obs": m.observed.sum(axis=1),
+        "height_growth": height_rate,  # height units per year
+        "diameter_growth": diameter_rate,  # diameter units per year
+        "height_span": height_span,
+    }, index=df.index)
+
+
+# ----------------------------
+# Per-species growth curves (by survey year and by age)
+# ----------------------------
+def species_growth_curves(df, m):
+    tree_idx, year_idx = np.nonzero(m.observed)
+    species = df["Species"].to_numpy()[tree_idx]
+    planted = planted_year(df)[tree_idx]
+    years = m.years[year_idx]
+
+    long = pd.DataFrame({
+        "Species": species,
+        "year": years,
+        "age": np.where(planted <= years, years - planted, np.nan),
+        "height": m.height[tree_idx, year_idx],
+        "diameter": m.diameter[tree_idx, year_idx],
+    })
+
+    by_year = long.groupby(["Species", "year"]).agg(
+        mean_height=("height", "mean"),
+        mean_diameter=("diameter", "mean"),
+        n=("height", "size"),
+    )
+    by_age = long.dropna(subset=["age"]).groupby(["Species", "age"]).agg(
+        mean_height=("height", "mean"),
+        mean_diameter=("diameter", "mean"),
+        n=("height", "size"),
+    )
+    return by_year, by_age
+
+
+# ----------------------------
+# Survival / removal
+# ----------------------------
+def survival(df, m):
+    first, last = m.first_last(m.observed)
+    n_years = len(m.years)
+
+    # surveyed after the tree's last observation → it was removed in between
+    after_last = np.arange(n_years)[None, :] > last[:, None]
+    later_surveys = m.surveyed & after_last
+    removed_by_survey = (last >= 0) & later_surveys.any(axis=1)
+    next_survey, _ = m.first_last(later_surveys)
+
+    noted_removed = (
+        df["Year Planted"].astype("string").str.contains(RE_REMOVED_NOTE, regex=True).fillna(False).to_numpy()
+    )
+    removed = removed_by_survey | ((last >= 0) & noted_removed)
+
+    last_c = np.clip(last, 0, None)
+    first_c = np.clip(first, 0, None)
+    interval_start = np.where(removed_by_survey, m.years[last_c], -1)
+    interval_end = np.where(removed_by_survey, m.years[np.clip(next_survey, 0, None)], -1)
+
+    # tree-years at risk: first observation to removal (or last observation)
+    end_year = np.where(removed_by_survey, interval_end, m.years[last_c]).astype(np.float32)
+    exposure = np.where(last >= 0, end_year - m.years[first_c], 0)
+
+    trees = pd.DataFrame({
+        "Species": df["Species"].to_numpy(),
+        "observed": last >= 0,
+        "removed": removed,
+        "mortality_interval_start": interval_start,
+        "mortality_interval_end": interval_end,
+        "exposure_years": exposure,
+    }, index=df.index)
+
+    by_species = trees[trees["observed"]].groupby("Species").agg(
+        trees=("observed", "size"),
+        removed=("removed", "sum"),
+        exposure_years=("exposure_years", "sum"),
+    )
+    by_species["survival_rate"] = 1 - by_species["removed"] / by_species["trees"]
+    by_species["annual_mortality"] = by_species["removed"] / by_species["exposure_years"].where(
+        by_species["exposure_years"] > 0
+    )
+
+    return trees, by_species
+
+
+def run(df):
+    m = Measurements(df)
+    growth = tree_growth(df, m)
+    curves_by_year, curves_by_age = species_growth_curves(df, m)
+    trees, by_species = survival(df, m)
+
+    species_growth = growth.groupby("Species")[["height_growth", "diameter_growth"]].median()
+    summary = by_species.join(species_growth).sort_values("trees", ascending=False)
+
+    return {
+        "growth": growth,
+        "curves_by_year": curves_by_year,
+        "curves_by_age": curves_by_age,
+        "survival": trees,
+        "species_summary": summary,
+    }
+
+
+if __name__ == "__main__":
+    df = load_inventory()
+
+    t0 = time.perf_counter()
+    results = run(df)
+    elapsed = time.perf_counter() - t0
+
+    print(f"Analysed {len(df)} trees in {elapsed:.3f} s")
+    print("\nSpecies summary (top 20 by tree count):")
+    print(results["species_summary"].head(20).to_string(float_format=lambda x: f"{x:.3f}"))
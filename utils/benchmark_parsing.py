@@ -0,0 +1,230 @@
+import io
+import re
+import json
+import time
+import argparse
+from collections import defaultdict
+from contextlib import redirect_stdout
+
+from cleaning import (
+    SPECIES_MAP_PATH, clean, normalize_blank, parse_page_json, parse_page_record, post_process_rows, row_by_name,
+)
+from ocr_decode import DECODERS
+from ocr_store import open_pages
+from species_resolver import METHOD_EXACT, load_species_resolver
+from street_normalization import normalize_street_direction
+
+# Rows/sec for the OCR page parser on the OCR page corpus (see ocr_store.py):
+# the fused parse_page_json + post_process_rows in cleaning.py against the
+# previous multi-pass implementation kept below. Pages are decoded up front
+# so only parsing is timed, and both outputs are compared row for row.
+# Then JSON bytes → rows with each installed decode backend (json, orjson,
+# msgspec; see ocr_decode.py), compared against the json backend.
+#
+#   python benchmark_parsing.py --repeat 3
+
+
+# ----------------------------
+# Previous implementation (one pass per step, row dicts rebuilt per year slot)
+# ----------------------------
+def legacy_post_process_rows(rows, resolver):
+    for r in rows:
+        if r.get("Species"):
+            s = r["Species"].lower().strip()
+
+            # remove trailing punctuation
+            s = re.sub(r"[.,;:]+$", "", s)
+            r["Species"] = s
+
+    prev_species = None
+    for r in rows:
+        s = r.get("Species")
+        if s == '"':
+            r["Species"] = prev_species
+        elif s:
+            prev_species = s
+
+    for r in rows:
+        species = r.get("Species")
+        match = resolver.resolve(species)
+        if match.species is not None:
+            r["Species"] = match.species
+            if match.method != METHOD_EXACT:
+                r["_species_match"] = match.method
+                r["_species_confidence"] = match.confidence
+        elif species:
+            r["_unmapped"] = True
+
+    prev_year = None
+    for r in rows:
+        yp = r.get("Year Planted")
+        if yp and yp.strip() in ('"', "''", "\u201d", "\u201c", "\""):
+            r["Year Planted"] = prev_year
+        else:
+            prev_year = yp
+
+    for r in rows:
+        yp = r.get("Year Planted") or ""
+        if yp.upper() == "VACANT" and not r.get("Species"):
+            r["Species"] = "vacant"
+            r["Year Planted"] = None
+
+    return rows
+
+
+def legacy_parse_page_json(data, page_number=None):
+    page = data["results"][0]
+    raw_fields = page["extractions"][0]
+    fields = {f["name"]: f for f in raw_fields}
+
+    meta = {
+        "street": normalize_street_direction(clean(fields["street"]["value"])),
+        "block": clean(fields["block"]["value"]),
+        "sector": clean(fields["sector"]["value"]),
+    }
+
+    years = []
+    for slot in range(1, 6):
+        y = fields.get(f"year_{slot}", {}).get("value")
+        if y and y != "nan":
+            digits = re.sub(r"[^0-9]", "", y)
+            if not digits:
+                continue
+            if digits != y.strip():
+                print(f"  Warning [page {page_number}]: year_{slot} = '{y}' → {digits}")
+            year = int(digits)
+            if year < 100:
+                year += 1900
+            if year == 1880:
+                year = 1990
+            if year == 1951:
+                year = 1981
+            if year == 1927:
+                year = 1987
+            if year == 1956:
+                year = 1981
+            if year == 1959:
+                year = 1987
+            years.append(year)
+    years = sorted(years)
+
+    years_str = ", ".join(str(y) for y in years)
+
+    temp = defaultdict(dict)
+
+    for slot, year in enumerate(years, start=1):
+        for row_list in fields["table_row"]["value"]:
+            row = row_by_name(row_list)
+
+            key = (
+                row["street_number"]["value"],
+                row["tree_no"]["value"],
+            )
+
+            if key not in temp:
+                raw_species = normalize_blank(row["species"]["value"])
+
+                temp[key] = {
+                    "Street Number": row["street_number"]["value"],
+                    "Tree No.": row["tree_no"]["value"],
+                    "Species (raw)": raw_species,
+                    "Species": raw_species,
+                    "Year Planted": normalize_blank(row["year_planted"]["value"]),
+                }
+
+            h = row.get(f"height_{slot}", {}).get("value")
+            d = row.get(f"diameter_{slot}", {}).get("value")
+
+            temp[key][f"Height {slot}"] = normalize_blank(h)
+            temp[key][f"Diameter {slot}"] = normalize_blank(d)
+
+    rows = list(temp.values())
+
+    for r in rows:
+        r["Page"] = int(page_number)
+        r["Street"] = meta["street"]
+        r["Block"] = meta["block"]
+        r["Sector"] = meta["sector"]
+        r["Years"] = years_str
+
+    return rows, years
+
+
+# ----------------------------
+# Benchmark
+# ----------------------------
+# [(page_number, data)] and [(page_number, JSON bytes)] for the same pages
+def load_pages(limit=None):
+    source = open_pages()
+    pages, raw_pages = [], []
+    for page_number in source.pages()[:limit]:
+        try:
+            content = source.get(page_number)
+            data = json.loads(content)
+            data["results"][0]["extractions"][0]  # skip pages the parser would reject
+        except (ValueError, LookupError, TypeError):
+            continue
+        pages.append((page_number, data))
+        raw_pages.append((page_number, content))
+    source.close()
+    return pages, raw_pages
+
+
+def run(pages, parse, post_process, resolver):
+    out = []
+    with redirect_stdout(io.StringIO()):  # year warnings
+        for page_number, data in pages:
+            try:
+                rows, _ = parse(data, page_number)
+            except (KeyError, TypeError, ValueError):
+                continue
+            out.append(post_process(rows, resolver))
+    return out
+
+
+def run_decoded(raw_pages, decode, resolver):
+    return run(raw_pages, lambda content, page_number: parse_page_record(decode(content), page_number),
+               post_process_rows, resolver)
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=None, help="limit to the first N pages")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    pages, raw_pages = load_pages(args.pages)
+    resolver = load_species_resolver(SPECIES_MAP_PATH)
+    run(pages, parse_page_json, post_process_rows, resolver)  # warm the resolver memo
+
+    legacy_time, legacy_rows = best_time(
+        lambda: run(pages, legacy_parse_page_json, legacy_post_process_rows, resolver), args.repeat
+    )
+    fused_time, fused_rows = best_time(
+        lambda: run(pages, parse_page_json, post_process_rows, resolver), args.repeat
+    )
+
+    n_rows = sum(len(rows) for rows in fused_rows)
+    print(f"{len(pages)} pages, {n_rows} rows (best of {args.repeat})")
+    print(f"  multi-pass: {legacy_time:7.3f} s  {n_rows / legacy_time:10,.0f} rows/s")
+    print(f"  fused:      {fused_time:7.3f} s  {n_rows / fused_time:10,.0f} rows/s  ({legacy_time / fused_time:.2f}x)")
+    print(f"  identical output: {legacy_rows == fused_rows}")
+
+    print(f"decode + parse, {sum(len(c) for _, c in raw_pages) / 1e6:.1f} MB of JSON")
+    decoded = {}
+    for backend, decode in DECODERS.items():
+        decoded[backend] = best_time(lambda: run_decoded(raw_pages, decode, resolver), args.repeat)
+    json_time, json_rows = decoded["json"]
+    for backend, (elapsed, rows) in decoded.items():
+        print(f"  {backend + ':':11} {elapsed:7.3f} s  {n_rows / elapsed:10,.0f} rows/s  "
+              f"({json_time / elapsed:.2f}x)  identical output: {rows == json_rows == fused_rows}")
@@ -0,0 +1,391 @@
+import io
+import sys
+import copy
+import json
+import time
+import random
+import platform
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+import street_normalization
+from address_interpolation import StreetIndex
+from address_matcher import address_set_join, match_trees, normalize_number_series
+from cleaning import SPECIES_MAP_PATH, parse_page_json, parse_page_record, post_process_rows
+from ocr_decode import DECODERS
+from ocr_store import open_pages
+from species_resolver import load_species_resolver
+from street_normalization import normalize_street, normalize_street_direction, normalize_street_series
+
+# Benchmark suite over the OCR corpus and the address point shapefile.
+#
+# Every benchmark runs on fixed-size, seeded fixtures (1k / 5k / 20k tree
+# rows by default) sampled from the OCR pages, species_map.csv and
+# data/shapefiles, so numbers are comparable between commits. Each run is
+# appended to a JSON history together with the git commit, and compared with
+# the previous run on the same machine; anything slower than --threshold is
+# reported as a regression.
+#
+#   python benchmarks.py                        # full suite, saved to history
+#   python benchmarks.py -k street --sizes 1000 --no-save
+#
+# The checked-in address_points.shp has no .dbf. When STREET / BUILDING are
+# missing, the benchmarks that join against them (address_set_join,
+# match_trees, address_interpolation) are skipped, since their hit rates
+# and per-street cardinality would come from made-up data. With
+# --synthetic-addresses they run on points that get streets and house numbers
+# drawn from the tree corpus, and their results are tagged "synthetic" in the
+# history and only compared with other synthetic results.
+
+HISTORY_PATH = Path("../data/benchmark_history.json")
+ADDRESS_POINTS_PATH = Path("../data/shapefiles/address_points.shp")
+
+DEFAULT_SIZES = [1000, 5000, 20000]
+SEED = 1981
+REGRESSION_THRESHOLD = 1.2  # slower than previous run by 20%
+
+
+# ----------------------------
+# Fixtures (built once per size, outside the timed region)
+# ----------------------------
+class Fixtures:
+    def __init__(self, seed=SEED):
+        self.seed = seed
+        self._pages = None
+        self._rows = {}
+        self._address_points = None
+        self.synthetic_addresses = False
+        self.resolver = load_species_resolver(SPECIES_MAP_PATH)
+
+    # all parseable pages in a seeded order: [(page_number, data, n_rows, content)]
+    def all_pages(self):
+        if self._pages is None:
+            source = open_pages()
+            numbers = source.pages()
+            random.Random(self.seed).shuffle(numbers)
+            pages = []
+            with redirect_stdout(io.StringIO()):  # year warnings
+                for page_number in numbers:
+                    try:
+                        content = source.get(page_number)
+                        data = json.loads(content)
+                        rows, _ = parse_page_json(data, page_number)
+                    except (ValueError, LookupError, TypeError):
+                        continue
+                    if rows:
+                        pages.append((page_number, data, len(rows), content))
+            source.close()
+            self._pages = pages
+        return self._pages
+
+    # the first pages in seeded order holding at least n_rows rows
+    def pages(self, n_rows, raw=False):
+        out, total = [], 0
+        for page_number, data, count, content in self.all_pages():
+            if total >= n_rows:
+                break
+            out.append((page_number, content if raw else data))
+            total += count
+        return out
+
+    # parsed rows per page (before post-processing) for the same pages
+    def parsed_pages(self, n_rows):
+        with redirect_stdout(io.StringIO()):
+            return [parse_page_json(data, page_number)[0] for page_number, data in self.pages(n_rows)]
+
+    # exactly n_rows cleaned rows as a DataFrame
+    def rows(self, n_rows):
+        if n_rows not in self._rows:
+            parsed = self.parsed_pages(n_rows)
+            rows = [r for page in parsed for r in post_process_rows(page, self.resolver)][:n_rows]
+            self._rows[n_rows] = pd.DataFrame(rows)
+        return self._rows[n_rows]
+
+    def raw_streets(self, n_rows):
+        streets = []
+        for _, data in self.pages(n_rows):
+            fields = {f["name"]: f for f in data["results"][0]["extractions"][0]}
+            value = fields["street"]["value"]
+            streets.extend([value] * len(fields["table_row"]["value"]))
+        return streets[:n_rows]
+
+    def address_points(self):
+        if self._address_points is None:
+            points = gpd.read_file(ADDRESS_POINTS_PATH)
+            if "STREET" not in points.columns or "BUILDING" not in points.columns:
+                self.synthetic_addresses = True
+                rng = np.random.default_rng(self.seed)
+                streets = self.rows(max(DEFAULT_SIZES))["Street"].dropna().unique()
+                points["STREET"] = rng.choice(streets, size=len(points))
+                points["BUILDING"] = rng.integers(1, 4000, size=len(points))
+            points["_street_norm"] = normalize_street_series(points["STREET"])
+            points["_building_norm"] = normalize_number_series(points["BUILDING"])
+            points["Address Number"] = pd.to_numeric(points["BUILDING"], errors="coerce")
+            self._address_points = points
+        return self._address_points
+
+    def trees(self, n_rows):
+        trees = self.rows(n_rows)[["Street", "Street Number"]].copy()
+        trees["_street_norm"] = normalize_street_series(trees["Street"])
+        trees["_street_no_norm"] = normalize_number_series(trees["Street Number"])
+        return trees
+
+
+def clear_street_caches():
+    street_normalization._normalize_street_direction.cache_clear()
+    street_normalization._normalize_street.cache_clear()
+
+
+# ----------------------------
+# Benchmarks
+# ----------------------------
+# Each benchmark takes (fixtures, size) and returns (setup, run, n_rows):
+# setup() runs before every repetition and is not timed; its result is
+# passed to run().
+BENCHMARKS = {}
+ADDRESS_BENCHMARKS = set()  # need the real STREET / BUILDING attributes
+
+
+def benchmark(name, addresses=False):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        if addresses:
+            ADDRESS_BENCHMARKS.add(name)
+        return fn
+    return register
+
+
+@benchmark("parse_page_json")
+def bench_parse_page_json(fx, size):
+    pages = fx.pages(size)
+
+    def run(_):
+        with redirect_stdout(io.StringIO()):
+            return [parse_page_json(data, page_number) for page_number, data in pages]
+
+    n_rows = sum(len(rows) for rows in fx.parsed_pages(size))
+    return lambda: None, run, n_rows
+
+
+# JSON bytes to parsed rows, once per decode backend installed (see ocr_decode.py)
+def decode_parse_benchmark(decode):
+    def bench(fx, size):
+        pages = fx.pages(size, raw=True)
+
+        def run(_):
+            with redirect_stdout(io.StringIO()):
+                return [parse_page_record(decode(content), page_number) for page_number, content in pages]
+
+        n_rows = sum(len(rows) for rows in fx.parsed_pages(size))
+        return lambda: None, run, n_rows
+    return bench
+
+
+for _backend, _decode in DECODERS.items():
+    benchmark(f"decode_parse_{_backend}")(decode_parse_benchmark(_decode))
+
+
+@benchmark("post_process_rows")
+def bench_post_process_rows(fx, size):
+    parsed = fx.parsed_pages(size)
+
+    def setup():
+        fx.resolver.memo.clear()
+        return copy.deepcopy(parsed)  # post_process_rows works in place
+
+    def run(pages):
+        return [post_process_rows(rows, fx.resolver) for rows in pages]
+
+    return setup, run, sum(len(rows) for rows in parsed)
+
+
+@benchmark("normalize_street_direction")
+def bench_normalize_street_direction(fx, size):
+    streets = fx.raw_streets(size)
+
+    def run(_):
+        return [normalize_street_direction(s) for s in streets]
+
+    return clear_street_caches, run, len(streets)
+
+
+@benchmark("normalize_street")
+def bench_normalize_street(fx, size):
+    streets = fx.rows(size)["Street"].tolist()
+
+    def run(_):
+        return [normalize_street(s) for s in streets]
+
+    return clear_street_caches, run, len(streets)
+
+
+@benchmark("normalize_street_series")
+def bench_normalize_street_series(fx, size):
+    streets = fx.rows(size)["Street"]
+    return clear_street_caches, lambda _: normalize_street_series(streets), len(streets)
+
+
+@benchmark("address_set_join", addresses=True)
+def bench_address_set_join(fx, size):
+    trees = fx.trees(size)
+    points = fx.address_points()
+    return lambda: None, lambda _: address_set_join(trees, points), len(trees)
+
+
+@benchmark("match_trees", addresses=True)
+def bench_match_trees(fx, size):
+    trees = fx.trees(size)
+    points = fx.address_points()
+    return lambda: None, lambda _: match_trees(trees, points), len(trees)
+
+
+@benchmark("address_interpolation", addresses=True)
+def bench_address_interpolation(fx, size):
+    trees = fx.trees(size)
+    numbers = pd.to_numeric(trees["Street Number"], errors="coerce").to_numpy(dtype=float)
+    index = StreetIndex(fx.address_points(), street_col="_street_norm")
+    streets = trees["_street_norm"]
+    return lambda: None, lambda _: index.interpolate(streets, numbers), len(trees)
+
+
+# ----------------------------
+# Runner
+# ----------------------------
+def time_benchmark(setup, run, repeat):
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def run_suite(names, sizes, repeat, seed=SEED, synthetic_addresses=False):
+    fx = Fixtures(seed)
+    results = {}
+    for name in names:
+        synthetic = False
+        if name in ADDRESS_BENCHMARKS:
+            fx.address_points()
+            synthetic = fx.synthetic_addresses
+            if synthetic and not synthetic_addresses:
+                print(f"  {name:28} skipped: address points have no STREET / BUILDING "
+                      f"(--synthetic-addresses to run on synthetic ones)")
+                continue
+
+        results[name] = {}
+        for size in sizes:
+            setup, run, n_rows = BENCHMARKS[name](fx, size)
+            times = time_benchmark(setup, run, repeat)
+            best = min(times)
+            results[name][str(size)] = {
+                "rows": n_rows,
+                "min": best,
+                "median": statistics.median(times),
+                "rows_per_s": n_rows / best if best > 0 else None,
+            }
+            if synthetic:
+                results[name][str(size)]["synthetic"] = True
+            print(f"  {name:28} {size:>6}  {best * 1000:9.2f} ms  {n_rows / best:12,.0f} rows/s"
+                  + ("  (synthetic addresses)" if synthetic else ""))
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_id():
+    return f"{platform.node()}|{platform.machine()}|{platform.python_version()}"
+
+
+def load_history(path=HISTORY_PATH):
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_history(history, path=HISTORY_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(history, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+# [(benchmark, size, previous min, current min)] slower than threshold
+def regressions(previous, current, threshold=REGRESSION_THRESHOLD):
+    found = []
+    for name, by_size in current.items():
+        for size, result in by_size.items():
+            before = previous.get(name, {}).get(size)
+            if not before or before.get("synthetic", False) != result.get("synthetic", False):
+                continue  # synthetic and real timings aren't comparable
+            if before["min"] > 0 and result["min"] / before["min"] > threshold:
+                found.append((name, size, before["min"], result["min"]))
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", "--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="rows per fixture")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="report runs slower than previous × threshold")
+    parser.add_argument("--history", default=str(HISTORY_PATH))
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to the history")
+    parser.add_argument("--synthetic-addresses", action="store_true",
+                        help="run the address benchmarks on synthetic STREET / BUILDING values "
+                             "when the shapefile has none (tagged synthetic in the history)")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if not names:
+        sys.exit(f"No benchmark matches {args.filter!r}")
+
+    commit = git_commit()
+    print(f"Benchmarks @ {commit or 'unknown commit'} (best of {args.repeat})")
+    results = run_suite(names, args.sizes, args.repeat, args.seed, args.synthetic_addresses)
+
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    machine = machine_id()
+    previous = next((run for run in reversed(history) if run["machine"] == machine), None)
+
+    if previous is not None:
+        slow = regressions(previous["results"], results, args.threshold)
+        print(f"\nCompared with {previous['commit'] or 'unknown'} ({previous['timestamp']}):")
+        if slow:
+            for name, size, before, after in slow:
+                print(f"  REGRESSION {name} @ {size}: {before * 1000:.2f} ms → {after * 1000:.2f} ms "
+                      f"({after / before:.2f}x)")
+        else:
+            print(f"  no regressions above {args.threshold:.2f}x")
+
+    if not args.no_save:
+        history.append({
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "machine": machine,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "results": results,
+        })
+        save_history(history, history_path)
+        print(f"\nSaved to {history_path}")
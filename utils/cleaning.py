@@ -1,18 +1,37 @@
 import json
 import csv
 import re
+import argparse
+import hashlib
 from pathlib import Path
-from collections import defaultdict
-
-# Specify page range
+from collections import Counter, deque
+from itertools import islice
+from functools import partial
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentation import add_trace_args, span, start_run_from
+from inventory_store import ParquetInventoryWriter, report_unparsed, write_parquet
+from ocr_decode import BACKEND as DECODE_BACKEND, MAX_YEAR_SLOTS, decode_page, record_from_dict, required
+from ocr_store import OCR_OUTPUT_DIR, OCR_STORE_PATH, open_pages
+from species_resolver import METHOD_EXACT, load_species_resolver
+from street_normalization import normalize_street_direction
+from tree_index import TreeIndex
+
+# Default page range (override with --first-page/--last-page or --all)
 FIRST_PAGE = 1
 LAST_PAGE = 1000
 
 # PATHS
-OCR_OUTPUT_DIR = Path("../data/ocr_output")
-MERGED_JSON = Path(f"../data/pages_{FIRST_PAGE}_to_{LAST_PAGE}.json")
-MERGED_CSV = Path(f"../data/pages_{FIRST_PAGE}_to_{LAST_PAGE}.csv")
+# OCR pages are read from OCR_STORE_PATH, or from the page_*.json files in
+# OCR_OUTPUT_DIR until they have been migrated (python ocr_store.py migrate)
+MERGED_DIR = Path("../data")
 SPECIES_MAP_PATH = Path("../data/species_map.csv")
+CACHE_DIR = Path("../data/_cache/cleaning")
+
+# Modules whose code shapes the parsed rows. Their source is hashed into the
+# page cache key, so editing any of them marks every cached page dirty.
+PARSER_MODULES = ["cleaning.py", "ocr_decode.py", "street_normalization.py"]
 
 # Helpers
 def clean(v):
@@ -27,91 +46,60 @@ def normalize_blank(v):
     return str(v).strip()
 
 
-def load_species_map():
-    species_map = {}
-
-    if not SPECIES_MAP_PATH.exists():
-        return species_map
-
-    with open(SPECIES_MAP_PATH, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            raw = clean(row.get("common name")).lower()
-            common = clean(row.get("species"))
-
-            if raw and common:
-                species_map[raw] = common
-
-    return species_map
+RE_TRAILING_PUNCT = re.compile(r"[.,;:]+$")
+RE_NON_DIGIT = re.compile(r"[^0-9]")
+DITTO_MARKS = frozenset(('"', "''", "\u201d", "\u201c"))
 
+YEAR_SLOTS = range(1, MAX_YEAR_SLOTS + 1)
+MEASUREMENT_FIELDS = [
+    (f"height_{slot}", f"diameter_{slot}", f"Height {slot}", f"Diameter {slot}") for slot in YEAR_SLOTS
+]
 
-def normalize_street_direction(street):
-    if not street:
-        return street
+# OCR misreads of survey years
+YEAR_CORRECTIONS = {1880: 1990, 1951: 1981, 1927: 1987, 1956: 1981, 1959: 1987}
 
-    street = street.lower()
-
-    replacements = {
-        r"\bn\.?\b": "north",
-        r"\bs\.?\b": "south",
-        r"\be\.?\b": "east",
-        r"\bw\.?\b": "west",
-        r"\bne\.?\b": "northeast",
-        r"\bnw\.?\b": "northwest",
-        r"\bse\.?\b": "southeast",
-        r"\bsw\.?\b": "southwest",
-    }
-
-    for pattern, repl in replacements.items():
-        street = re.sub(pattern, repl, street)
-
-    # collapse extra spaces
-    street = re.sub(r"\s+", " ", street).strip()
-    return street
 
+# One pass per page: normalize species, resolve ditto species, map species,
+# resolve ditto years, mark VACANT rows. Each step only looks at the previous
+# row's state, so fusing them gives the same result as separate passes.
+def post_process_rows(rows, resolver):
+    prev_species = None
+    prev_year = None
 
-def post_process_rows(rows, species_map):
     for r in rows:
-        if r.get("Species"):
-            s = r["Species"].lower().strip()
-
-            # remove trailing punctuation
-            s = re.sub(r"[.,;:]+$", "", s)
+        s = r.get("Species")
+        if s:
+            # lowercase, remove trailing punctuation
+            s = RE_TRAILING_PUNCT.sub("", s.lower().strip())
+            if s == '"':
+                s = prev_species
+            elif s:
+                prev_species = s
             r["Species"] = s
 
-    prev_species = None
-    for r in rows:
-        s = r.get("Species")
-        if s == '"':
-            r["Species"] = prev_species
+        match = resolver.resolve(s)
+        if match.species is not None:
+            r["Species"] = match.species
+            if match.method != METHOD_EXACT:
+                r["_species_match"] = match.method
+                r["_species_confidence"] = match.confidence
         elif s:
-            prev_species = s
-
-    for r in rows:
-        species = r.get("Species")
-        if species in species_map:
-            r["Species"] = species_map[species]
-        elif species:
             r["_unmapped"] = True
 
-    prev_year = None
-    for r in rows:
         yp = r.get("Year Planted")
-        if yp and yp.strip() in ('"', "''", "\u201d", "\u201c", "\""):
-            r["Year Planted"] = prev_year
+        if yp and yp.strip() in DITTO_MARKS:
+            yp = r["Year Planted"] = prev_year
         else:
             prev_year = yp
 
-    for r in rows:
-        yp = r.get("Year Planted") or ""
-        if yp.upper() == "VACANT" and not r.get("Species"):
+        if yp and yp.upper() == "VACANT" and not r.get("Species"):
             r["Species"] = "vacant"
             r["Year Planted"] = None
 
     return rows
 
 
-# Parser (structured extractor JSON)
+# Parser (structured extractor JSON, decoded by ocr_decode)
 def fields_by_name(field_list):
     return {f["name"]: f for f in field_list}
 
@@ -120,72 +108,67 @@ def row_by_name(row_list):
     return {f["name"]: f for f in row_list}
 
 
-def parse_page_json(data, page_number=None):
-    page = data["results"][0]
-    raw_fields = page["extractions"][0]
-    fields = fields_by_name(raw_fields)
+# Year corrections are printed, or collected into warnings when given (the
+# page cache stores them so a cached run prints the same warnings)
+def parse_year(y, slot, page_number, warnings=None):
+    digits = RE_NON_DIGIT.sub("", y)
+    if not digits:
+        return None
+    if digits != y.strip():
+        message = f"  Warning [page {page_number}]: year_{slot} = '{y}' → {digits}"
+        if warnings is None:
+            print(message)
+        else:
+            warnings.append(message)
+    year = int(digits)
+    if year < 100:
+        year += 1900
+    return YEAR_CORRECTIONS.get(year, year)
 
+
+def parse_page_record(page, page_number=None, warnings=None):
     meta = {
-        "street": normalize_street_direction(clean(fields["street"]["value"])),
-        "block": clean(fields["block"]["value"]),
-        "sector": clean(fields["sector"]["value"]),
+        "street": normalize_street_direction(clean(page.street)),
+        "block": clean(page.block),
+        "sector": clean(page.sector),
     }
 
     years = []
-    for slot in range(1, 6):
-        y = fields.get(f"year_{slot}", {}).get("value")
+    for slot, y in zip(YEAR_SLOTS, page.years):
         if y and y != "nan":
-            digits = re.sub(r"[^0-9]", "", y)
-            if not digits:
-                continue
-            if digits != y.strip():
-                print(f"  Warning [page {page_number}]: year_{slot} = '{y}' → {digits}")
-            year = int(digits)
-            if year < 100:
-                year += 1900
-            if year == 1880:
-                year = 1990
-            if year == 1951:
-                year = 1981
-            if year == 1927:
-                year = 1987
-            if year == 1956:
-                year = 1981
-            if year == 1959:
-                year = 1987
-            years.append(year)
+            year = parse_year(y, slot, page_number, warnings)
+            if year is not None:
+                years.append(year)
     years = sorted(years)
 
     # Build a comma-separated string of the years for this page
     years_str = ", ".join(str(y) for y in years)
 
-    temp = defaultdict(dict)
-
-    for slot, year in enumerate(years, start=1):
-        for row_list in fields["table_row"]["value"]:
-            row = row_by_name(row_list)
-
-            key = (
-                row["street_number"]["value"],
-                row["tree_no"]["value"],
-            )
-
-            if key not in temp:
-                raw_species = normalize_blank(row["species"]["value"])
-
-                temp[key] = {
-                    "Street Number": row["street_number"]["value"],
-                    "Tree No.": row["tree_no"]["value"],
+    temp = {}
+    slots = MEASUREMENT_FIELDS[:len(years)]
+
+    # each table row fills every year slot; a page without years has no
+    # measurements and yields no rows
+    if slots:
+        for row in required(page.rows, "table_row"):
+            street_number = row["street_number"]
+            tree_no = row["tree_no"]
+
+            key = (street_number, tree_no)
+            r = temp.get(key)
+            if r is None:
+                raw_species = normalize_blank(row["species"])
+                r = temp[key] = {
+                    "Street Number": street_number,
+                    "Tree No.": tree_no,
                     "Species (raw)": raw_species,
                     "Species": raw_species,
-                    "Year Planted": normalize_blank(row["year_planted"]["value"]),
+                    "Year Planted": normalize_blank(row["year_planted"]),
                 }
 
-            h = row.get(f"height_{slot}", {}).get("value")
-            d = row.get(f"diameter_{slot}", {}).get("value")
-
-            temp[key][f"Height {slot}"] = normalize_blank(h)
-            temp[key][f"Diameter {slot}"] = normalize_blank(d)
+            for height_field, diameter_field, height_col, diameter_col in slots:
+                r[height_col] = normalize_blank(row.get(height_field))
+                r[diameter_col] = normalize_blank(row.get(diameter_field))
 
     rows = list(temp.values())
 
@@ -199,67 +182,359 @@ def parse_page_json(data, page_number=None):
     return rows, years
 
 
-# MAIN
-def main():
-    json_files = sorted(OCR_OUTPUT_DIR.glob("page_*.json"))
-    json_files = [
-        jf for jf in json_files
-        if FIRST_PAGE <= int(jf.stem.split("_")[1]) <= LAST_PAGE
-    ]
+# For pages already decoded with json.loads
+def parse_page_json(data, page_number=None):
+    return parse_page_record(record_from_dict(data), page_number)
+
+
+def parse_page(page_number, source, resolver):
+    warnings = []
+    try:
+        rows, years = parse_page_record(decode_page(source.get(page_number)), page_number, warnings)
+        rows = post_process_rows(rows, resolver)
+        return rows, years, warnings, None
+    except Exception as e:
+        return None, None, warnings, str(e)
+
+
+def parse_batch(page_numbers, source, resolver):
+    return [parse_page(page_number, source, resolver) for page_number in page_numbers]
+
+
+# Yields (page_number, rows, years, warnings, error) in page order whatever
+# the worker count; workers open their own connection to the source. Pages go to the
+# pool in batches of BATCH_PAGES with at most BATCHES_IN_FLIGHT per worker
+# submitted ahead of the consumer, so parsed rows waiting to be written stay
+# bounded however many pages there are.
+BATCH_PAGES = 16
+BATCHES_IN_FLIGHT = 2
+
+
+def iter_parsed_pages(source, pages, resolver, workers=1):
+    if workers <= 1:
+        for page_number in pages:
+            yield (page_number, *parse_page(page_number, source, resolver))
+        return
+
+    parse = partial(parse_batch, source=source, resolver=resolver)
+    batches = (pages[i:i + BATCH_PAGES] for i in range(0, len(pages), BATCH_PAGES))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque(
+            (batch, executor.submit(parse, batch))
+            for batch in islice(batches, workers * BATCHES_IN_FLIGHT)
+        )
+        while in_flight:
+            batch, future = in_flight.popleft()
+            results = future.result()
+            for batch_next in islice(batches, 1):
+                in_flight.append((batch_next, executor.submit(parse, batch_next)))
+            for page_number, result in zip(batch, results):
+                yield (page_number, *result)
+
+
+# Per-page cache keyed on (OCR JSON hash, resolver fingerprint, parser
+# source hash). The resolver fingerprint covers the merged alias table and
+# the matching settings (see SpeciesResolver.fingerprint). The store keeps
+# the hash of each page's JSON, so cache entries written from the old page
+# files stay valid after migration.
+def parser_fingerprint():
+    h = hashlib.sha256()
+    for name in PARSER_MODULES:
+        h.update((Path(__file__).parent / name).read_bytes())
+    return h.hexdigest()
+
+
+def cache_path(page_number, page_hash, resolver_hash, parser_hash):
+    key = f"{page_hash}:{resolver_hash}:{parser_hash}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return CACHE_DIR / f"page_{page_number:06d}-{digest}.json"
+
+
+def write_cache(path, rows, years, warnings):
+    # drop entries for older versions of the same page
+    for stale in CACHE_DIR.glob(f"{path.stem.rsplit('-', 1)[0]}-*.json"):
+        stale.unlink()
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"rows": rows, "years": years, "warnings": warnings}), encoding="utf-8")
+    tmp.rename(path)
+
+
+# Yields (page_number, rows, years, error) in page order, printing each
+# page's year warnings first; only dirty pages are parsed, and cached pages
+# replay the warnings stored with them
+def iter_pages(source, pages, resolver, workers=1, use_cache=True, stats=None):
+    if not use_cache:
+        for page, rows, years, warnings, error in iter_parsed_pages(source, pages, resolver, workers):
+            print_warnings(warnings)
+            yield page, rows, years, error
+        return
+
+    stats = stats if stats is not None else Counter()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    resolver_hash = resolver.fingerprint()
+    parser_hash = parser_fingerprint()
+
+    page_hashes = source.digests(pages)
+    cache_paths = {page: cache_path(page, page_hashes[page], resolver_hash, parser_hash) for page in pages}
+    dirty = [page for page in pages if not cache_paths[page].exists()]
+    dirty_set = set(dirty)
+    parsed = iter_parsed_pages(source, dirty, resolver, workers)
+
+    for page in pages:
+        path = cache_paths[page]
+
+        if page in dirty_set:
+            _, rows, years, warnings, error = next(parsed)
+            stats["misses"] += 1
+            if error is None:
+                write_cache(path, rows, years, warnings)
+            print_warnings(warnings)
+            yield page, rows, years, error
+        else:
+            stats["hits"] += 1
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            print_warnings(entry["warnings"])
+            yield page, entry["rows"], entry["years"], None
 
-    print(f"Found {len(json_files)} JSON files")
 
-    all_rows = []
-    max_year_slots = 0
-    species_map = load_species_map()
-
-    for jf in json_files:
-        try:
-            page_number = jf.stem.split("_")[1]
-            data = json.loads(jf.read_text(encoding="utf-8"))
-            rows, years = parse_page_json(data, page_number)
-            rows = post_process_rows(rows, species_map)
-            all_rows.extend(rows)
-            if len(years) > max_year_slots:
-                max_year_slots = len(years)
-        except Exception as e:
-            print(f"Error parsing {jf.name}: {e}")
-            continue
+def print_warnings(warnings):
+    for message in warnings:
+        print(message)
 
-    print(f"Parsed {len(all_rows)} tree records across {len(json_files)} pages")
-    print(f"Max year slots on any page: {max_year_slots}")
 
-    mapped = sorted({r["Species"] for r in all_rows if r.get("Species") and not r.get("_unmapped")})
-    unmapped = sorted({r["Species"] for r in all_rows if r.get("Species") and r.get("_unmapped")})
+# Output helpers
+BASE_COLS = ["Page", "Street", "Block", "Sector", "Street Number", "Tree No.", "Species (raw)", "Species", "Year Planted", "Years"]
 
+
+def merged_path(first_page, last_page, suffix):
+    return MERGED_DIR / f"pages_{first_page}_to_{last_page}{suffix}"
+
+
+def csv_fieldnames(year_slots, tree_ids=False):
+    height_cols = [f"Height {s}" for s in range(1, year_slots + 1)]
+    diameter_cols = [f"Diameter {s}" for s in range(1, year_slots + 1)]
+    id_cols = ["Tree ID"] if tree_ids else []
+    return id_cols + BASE_COLS + height_cols + diameter_cols
+
+
+def describe_source(source, pages):
+    print(f"Found {len(pages)} OCR pages in {source.path} (decoder: {DECODE_BACKEND})")
+
+
+def print_species_summary(mapped, unmapped, approximate=None):
     print(f"\nMapped species ({len(mapped)}):")
     for s in mapped:
         print(f"  {s}")
 
+    if approximate:
+        print(f"\nApproximate species matches ({len(approximate)}):")
+        for raw, (species, method, confidence) in sorted(approximate.items()):
+            print(f"  {raw} → {species} ({method}, {confidence:.2f})")
+
     if unmapped:
         print(f"\nUnmapped species ({len(unmapped)}):")
         for s in unmapped:
             print(f"  {s}")
 
+
+# MAIN
+def main(first_page=FIRST_PAGE, last_page=LAST_PAGE, workers=1, use_cache=True, parquet=False, tree_ids=False):
+    source = open_pages()
+    pages = source.pages(first_page, last_page)
+    describe_source(source, pages)
+
+    all_rows = []
+    max_year_slots = 0
+    resolver = load_species_resolver(SPECIES_MAP_PATH)
+    cache_stats = Counter()
+    tree_index = TreeIndex(resolver=resolver) if tree_ids else None
+
+    with span("parse pages", pages=len(pages), workers=workers) as stage:
+        for page, rows, years, error in iter_pages(source, pages, resolver, workers, use_cache, cache_stats):
+            if error is not None:
+                print(f"Error parsing {source.name(page)}: {error}")
+                continue
+            if tree_index is not None:
+                tree_index.update_page(page, rows)
+            all_rows.extend(rows)
+            stage.add(len(rows))
+            if len(years) > max_year_slots:
+                max_year_slots = len(years)
+        stage.set(cache_hits=cache_stats["hits"], cache_misses=cache_stats["misses"])
+
+    source.close()
+    print(f"Parsed {len(all_rows)} tree records across {len(pages)} pages")
+    if use_cache:
+        print(f"Page cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    print(f"Max year slots on any page: {max_year_slots}")
+    if tree_index is not None:
+        tree_index.close()
+        print(f"Tree index: {len(tree_index.ids)} trees in {tree_index.path}")
+
+    mapped = sorted({r["Species"] for r in all_rows if r.get("Species") and not r.get("_unmapped")})
+    unmapped = sorted({r["Species"] for r in all_rows if r.get("Species") and r.get("_unmapped")})
+    approximate = {
+        r["Species (raw)"]: (r["Species"], r["_species_match"], r["_species_confidence"])
+        for r in all_rows if r.get("_species_match")
+    }
+    print_species_summary(mapped, unmapped, approximate)
+
+    merged_json = merged_path(first_page, last_page, ".json")
+    merged_csv = merged_path(first_page, last_page, ".csv")
+
     # --- Save merged JSON ---
-    MERGED_JSON.write_text(json.dumps(all_rows, indent=2), encoding="utf-8")
+    with span("write json") as stage:
+        merged_json.write_text(json.dumps(all_rows, indent=2), encoding="utf-8")
+        stage.add(len(all_rows))
 
     # --- Save merged CSV ---
-    base_cols = ["Page", "Street", "Block", "Sector", "Street Number", "Tree No.", "Species (raw)", "Species", "Year Planted", "Years"]
-    height_cols = [f"Height {s}" for s in range(1, max_year_slots + 1)]
-    diameter_cols = [f"Diameter {s}" for s in range(1, max_year_slots + 1)]
-
-    fieldnames = base_cols + height_cols + diameter_cols
+    fieldnames = csv_fieldnames(max_year_slots, tree_ids)
 
-    with open(MERGED_CSV, "w", newline="", encoding="utf-8") as f:
+    with span("write csv") as stage, open(merged_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
         writer.writeheader()
         for row in all_rows:
             writer.writerow({k: clean(row.get(k)) for k in fieldnames})
+        stage.add(len(all_rows))
+
+    print(f"\nSaved {merged_json}")
+    print(f"Saved {merged_csv}")
+
+    # --- Save typed Parquet ---
+    if parquet:
+        merged_parquet = merged_path(first_page, last_page, ".parquet")
+        with span("write parquet") as stage:
+            unparsed = write_parquet(all_rows, merged_parquet, MAX_YEAR_SLOTS)
+            stage.add(len(all_rows))
+        print(f"Saved {merged_parquet}")
+        report_unparsed(unparsed)
+
+
+# STREAMING MAIN
+# Rows are written as each page is parsed: JSON Lines directly, CSV into a
+# body file with every possible year slot. Once the real max_year_slots is
+# known the body is copied under the final header with the unused columns
+# dropped, so memory stays flat and the CSV matches main() exactly.
+def main_stream(first_page=None, last_page=None, workers=1, use_cache=True, parquet=False, tree_ids=False):
+    source = open_pages()
+    pages = source.pages(first_page, last_page)
+    describe_source(source, pages)
+    if not pages:
+        return
+
+    first_page = pages[0] if first_page is None else first_page
+    last_page = pages[-1] if last_page is None else last_page
+
+    merged_jsonl = merged_path(first_page, last_page, ".jsonl")
+    merged_csv = merged_path(first_page, last_page, ".csv")
+    csv_body = merged_csv.with_suffix(".csv.body")
+    merged_parquet = merged_path(first_page, last_page, ".parquet")
+    parquet_writer = ParquetInventoryWriter(merged_parquet, MAX_YEAR_SLOTS) if parquet else nullcontext()
+
+    full_fieldnames = csv_fieldnames(MAX_YEAR_SLOTS, tree_ids)
+    resolver = load_species_resolver(SPECIES_MAP_PATH)
+    cache_stats = Counter()
+    tree_index = TreeIndex(resolver=resolver) if tree_ids else None
+    mapped, unmapped = set(), set()
+    approximate = {}
+    row_count = 0
+    max_year_slots = 0
+
+    with span("parse and write pages", pages=len(pages), workers=workers) as stage, \
+            open(merged_jsonl, "w", encoding="utf-8") as jsonl_f, \
+            open(csv_body, "w", newline="", encoding="utf-8") as body_f, \
+            parquet_writer as parquet_f:
+        body_writer = csv.writer(body_f)
+
+        for page, rows, years, error in iter_pages(source, pages, resolver, workers, use_cache, cache_stats):
+            if error is not None:
+                print(f"Error parsing {source.name(page)}: {error}")
+                continue
+
+            if tree_index is not None:
+                tree_index.update_page(page, rows)
+
+            for row in rows:
+                jsonl_f.write(json.dumps(row) + "\n")
+                body_writer.writerow([clean(row.get(k)) for k in full_fieldnames])
+
+                species = row.get("Species")
+                if species:
+                    (unmapped if row.get("_unmapped") else mapped).add(species)
+                if row.get("_species_match"):
+                    approximate[row["Species (raw)"]] = (species, row["_species_match"], row["_species_confidence"])
+
+            if parquet_f is not None:
+                parquet_f.write_rows(rows)
+
+            row_count += len(rows)
+            stage.add(len(rows))
+            max_year_slots = max(max_year_slots, len(years))
+
+        stage.set(cache_hits=cache_stats["hits"], cache_misses=cache_stats["misses"])
+
+    source.close()
+    print(f"Parsed {row_count} tree records across {len(pages)} pages")
+    if use_cache:
+        print(f"Page cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    print(f"Max year slots on any page: {max_year_slots}")
+    if tree_index is not None:
+        tree_index.close()
+        print(f"Tree index: {len(tree_index.ids)} trees in {tree_index.path}")
+
+    print_species_summary(sorted(mapped), sorted(unmapped), approximate)
+
+    # Finalize the CSV header and keep only the populated year slots
+    fieldnames = csv_fieldnames(max_year_slots, tree_ids)
+    keep = [full_fieldnames.index(k) for k in fieldnames]
+
+    with span("finalize csv", rows=row_count), \
+            open(csv_body, newline="", encoding="utf-8") as body_f, \
+            open(merged_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        for values in csv.reader(body_f):
+            writer.writerow([values[i] for i in keep])
+
+    csv_body.unlink()
 
-    print(f"\nSaved {MERGED_JSON}")
-    print(f"Saved {MERGED_CSV}")
+    print(f"\nSaved {merged_jsonl}")
+    print(f"Saved {merged_csv}")
+    if parquet:
+        print(f"Saved {merged_parquet}")
+        report_unparsed(parquet_writer.unparsed)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--first-page", type=int, default=FIRST_PAGE)
+    parser.add_argument("--last-page", type=int, default=LAST_PAGE)
+    parser.add_argument("--all", action="store_true",
+                        help="process every page in the OCR output directory")
+    parser.add_argument("--stream", action="store_true",
+                        help="write CSV and JSON Lines page by page with flat memory use")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse pages across N processes (output is identical to a serial run)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-parse every page instead of reusing the per-page cache")
+    parser.add_argument("--parquet", action="store_true",
+                        help="also write a typed, zstd-compressed Parquet file (requires pyarrow)")
+    parser.add_argument("--tree-ids", action="store_true",
+                        help="assign stable tree IDs from the persistent tree index")
+    add_trace_args(parser)
+    args = parser.parse_args()
+    start_run_from("cleaning", args)
+
+    first_page, last_page = args.first_page, args.last_page
+    if args.all:
+        first_page, last_page = None, None
+
+    if args.stream:
+        main_stream(first_page, last_page, workers=args.workers, use_cache=not args.no_cache, parquet=args.parquet, tree_ids=args.tree_ids)
+    elif args.all:
+        pages = open_pages().pages()
+        main(pages[0], pages[-1],
+             workers=args.workers, use_cache=not args.no_cache, parquet=args.parquet, tree_ids=args.tree_ids)
+    else:
+        main(first_page, last_page, workers=args.workers, use_cache=not args.no_cache, parquet=args.parquet, tree_ids=args.tree_ids)
@@ -0,0 +1,197 @@
+import json
+import time
+import hashlib
+import argparse
+import importlib.util
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Excel ingestion for the manually reviewed inventories and the cleaned OCR
+# workbook. Workbooks are parsed in parallel (one process per file) with the
+# fastest installed engine and stored as Parquet under data/_cache/excel,
+# one entry per resolved workbook path, keyed on the workbook's size, mtime
+# and content hash. Re-runs read the Parquet copy instead of parsing the
+# .xlsx again.
+#
+#   python excel_ingest.py                       # all manually reviewed workbooks
+#   python excel_ingest.py ../data/cleaned_ocr_output/pages_1_to_1000.xlsx
+
+MANUALLY_REVIEWED_DIR = Path("../data/manually_reviewed")
+CACHE_DIR = Path("../data/_cache/excel")
+INGEST_VERSION = 2  # bump when the cached representation changes
+
+# python-calamine (Rust) is several times faster than openpyxl; pandas reads
+# openpyxl workbooks in read-only mode either way
+ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+COLUMNS_TO_FILL = ['Street', 'Block Start', 'Block End', 'Sector', 'Street Number']
+
+
+# ----------------------------
+# Parsing + cache
+# ----------------------------
+# The content hash catches a workbook replaced by another with the same size
+# and an older mtime; hashing is cheap next to parsing
+def cache_key(path, sheet_name=0):
+    path = Path(path).resolve()
+    st = path.stat()
+    content = hashlib.sha256(path.read_bytes()).hexdigest()
+    payload = json.dumps([str(path), st.st_size, st.st_mtime_ns, content, sheet_name, INGEST_VERSION])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# Named by stem plus a hash of the resolved path, so same-named workbooks in
+# different directories don't share an entry
+def cache_paths(path):
+    path = Path(path).resolve()
+    name = f"{path.stem}-{hashlib.sha256(str(path).encode()).hexdigest()[:12]}"
+    return CACHE_DIR / f"{name}.parquet", CACHE_DIR / f"{name}.key"
+
+
+def _cell_text(v):
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+# Excel columns often mix numbers, text and dates in one object column, which
+# Parquet can't hold. Purely numeric columns become numeric, anything else
+# becomes text. Applied on every parse, so cached and fresh reads are identical.
+def to_columnar(df):
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        values = df[col].dropna()
+        if values.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)).all():
+            df[col] = pd.to_numeric(df[col])
+        else:
+            df[col] = df[col].map(_cell_text, na_action="ignore")
+    df.columns = [str(c) for c in df.columns]
+    return normalize_na(df)
+
+
+# Text columns as object dtype with NaN for missing cells, the way
+# pd.read_excel returns them, whatever dtype Parquet reads them back as.
+# Downstream astype(str) then spells missing values as before, rather than
+# "<NA>" (string dtype) or "None".
+def normalize_na(df):
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].astype(object).where(df[col].notna(), np.nan)
+    return df
+
+
+def parse_workbook(path, sheet_name=0):
+    return to_columnar(pd.read_excel(path, sheet_name=sheet_name, engine=ENGINE))
+
+
+def _parse_and_cache(path, sheet_name=0):
+    df = parse_workbook(path, sheet_name)
+
+    parquet_path, key_path = cache_paths(path)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = parquet_path.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(parquet_path)
+    key_path.write_text(cache_key(path, sheet_name))  # written last, so a partial write is never reused
+
+    return df
+
+
+def _cached(path, sheet_name=0):
+    parquet_path, key_path = cache_paths(path)
+    if key_path.exists() and parquet_path.exists() and key_path.read_text() == cache_key(path, sheet_name):
+        return normalize_na(pd.read_parquet(parquet_path))
+    return None
+
+
+# {path: DataFrame}, parsing only the workbooks whose cache is stale
+def read_workbooks(paths, workers=None, use_cache=True, stats=None):
+    paths = [Path(p) for p in paths]
+    frames = {}
+    misses = []
+
+    for path in paths:
+        df = _cached(path) if use_cache else None
+        if df is None:
+            misses.append(path)
+        else:
+            frames[path] = df
+
+    # fork only: spawn/forkserver re-import the calling script, and old main.py
+    # runs at module level
+    if len(misses) > 1 and workers != 1 and "fork" in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=workers or min(len(misses), 8),
+                                 mp_context=multiprocessing.get_context("fork")) as executor:
+            frames.update(zip(misses, executor.map(_parse_and_cache, misses)))
+    else:
+        frames.update((path, _parse_and_cache(path)) for path in misses)
+
+    if stats is not None:
+        stats["parsed"] += len(misses)
+        stats["cached"] += len(paths) - len(misses)
+
+    return {path: frames[path] for path in paths}
+
+
+def read_workbook(path, use_cache=True):
+    return read_workbooks([path], use_cache=use_cache)[Path(path)]
+
+
+# ----------------------------
+# Manually reviewed inventories
+# ----------------------------
+# Same steps as the old main.py loop: forward fill, Page Number from Block
+# Start changes, Street Number as an integer string, Full Address
+def prepare_inventory(df, document=None):
+    df = df.copy()
+
+    fill = [col for col in COLUMNS_TO_FILL if col in df.columns]
+    df[fill] = df[fill].ffill()
+
+    if 'Block Start' in df.columns:
+        df['Page Number'] = df['Block Start'].ne(df['Block Start'].shift()).cumsum()
+
+    if 'Street Number' in df.columns:
+        numbers = pd.to_numeric(df['Street Number'], errors='coerce').ffill()
+        df['Street Number'] = numbers.astype('Int64').astype(str)
+
+    if 'Street Number' in df.columns and 'Street' in df.columns:
+        df['Full Address'] = df['Street Number'].str.strip() + ' ' + df['Street'].astype(str).str.strip()
+
+    if document is not None:
+        df['Document'] = document
+
+    return df
+
+
+# {document name: prepared DataFrame}; the document name is the file stem
+def load_inventories(paths=None, workers=None, use_cache=True, stats=None):
+    if paths is None:
+        paths = sorted(MANUALLY_REVIEWED_DIR.glob("*.xlsx"))
+    frames = read_workbooks(paths, workers=workers, use_cache=use_cache, stats=stats)
+    return {path.stem: prepare_inventory(df, path.stem) for path, df in frames.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", help="workbooks (default: all manually reviewed inventories)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="re-parse every workbook")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.paths] or sorted(MANUALLY_REVIEWED_DIR.glob("*.xlsx"))
+    stats = {"parsed": 0, "cached": 0}
+
+    t0 = time.perf_counter()
+    frames = read_workbooks(paths, workers=args.workers, use_cache=not args.no_cache, stats=stats)
+    elapsed = time.perf_counter() - t0
+
+    for path, df in frames.items():
+        print(f"{path.name:45} {len(df):7d} rows  {len(df.columns):3d} cols")
+    print(f"{stats['parsed']} parsed ({ENGINE}), {stats['cached']} from cache in {elapsed:.2f} s")
@@ -1,145 +1,503 @@
 import time
 import json
 import os
+import io
+import queue
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 load_dotenv()
 
-import requests
 from pathlib import Path
 from pypdf import PdfReader, PdfWriter
 
+from instrumentation import add_trace_args, span, start_run_from, traced
+from ocr_client import OcrClient
+from ocr_store import OCR_OUTPUT_DIR, OCR_STORE_PATH, OcrStore, migrate_if_new
+from poll_scheduler import LatencyModel, PollScheduler, backoff_delay, parse_retry_after
+from processing_log import ProcessingLog
+
 # CONFIG
 API_TOKEN = os.environ["HWOCR_API_TOKEN"]
 EXTRACTOR_ID = "Y5mPJa5zN7"
 
 BATCH_SIZE = 100
-POLL_INTERVAL = 3
+PAGES_PER_DOC = 1  # consecutive pages packed into one uploaded document
+POLL_INTERVAL = 3  # Retry-After default when a 429 doesn't carry one
+MAX_POLL_ATTEMPTS = 120  # "processing" answers before a doc is left for the next round
 DELETE_AFTER_SECONDS = 1209600  # 14 days
 
-BASE_URL = "https://www.handwritingocr.com/api/v3/documents"
+# Async pipeline limits (see run_pipeline)
+UPLOAD_CONCURRENCY = 8
+DOWNLOAD_CONCURRENCY = 8
+POLL_BATCH_SIZE = 50
+PREFETCH_PAGES = 16
+POLL_TICK = 0.5  # longest the poller sleeps, so new uploads get their first check on time
+REQUESTS_PER_SECOND = 5
+
+# HWOCR_BASE_URL lets the pipeline run against ocr_stub_server.py
+BASE_URL = os.environ.get("HWOCR_BASE_URL", "https://www.handwritingocr.com/api/v3/documents")
 
-HEADERS = {
-    "Authorization": f"Bearer {API_TOKEN}",
-    "Accept": "application/json",
-}
+# one pooled keep-alive session for every API call (see ocr_client.py)
+client = OcrClient(API_TOKEN, BASE_URL)
 
 # PATHS
 MERGED_PDF = Path("../data/tree_inventory_pdfs/tree_inventory_merged.pdf")
-OUTPUT_DIR = Path("../data/ocr_output")
-TEMP_DIR = Path("../data/_temp_pages")
 LOG_PATH = Path("../data/processing_log.json")
 
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-TEMP_DIR.mkdir(parents=True, exist_ok=True)
-
-# LOG HELPERS (atomic write)
-def load_log():
-    if LOG_PATH.exists():
-        return json.loads(LOG_PATH.read_text())
-    return {}
-
-def save_log(log):
-    tmp = LOG_PATH.with_suffix(".tmp")
-    tmp.write_text(json.dumps(log, indent=2))
-    if LOG_PATH.exists():
-        LOG_PATH.unlink()
-    tmp.rename(LOG_PATH)
-
-# RETRY HELPER
-def retry_request(fn, retries=3, delay=3):
-    for attempt in range(retries):
-        try:
-            return fn()
-        except requests.RequestException:
-            if attempt == retries - 1:
-                raise
-            time.sleep(delay)
+# results go into the page store (see ocr_store.py); the connection opens on
+# first use, after main() has imported any legacy page_*.json files
+store = OcrStore(OCR_STORE_PATH)
+
+# API CALL ACCOUNTING
+# client counts every HTTP call by kind (upload / status / download) plus
+# 429 answers; reported per processed page at the end of a run
+def report_api_calls(calls, pages_processed):
+    total = sum(n for kind, n in calls.items() if kind != "429")
+    kinds = ", ".join(f"{kind} {calls[kind]}" for kind in ("upload", "status", "download", "429") if calls[kind])
+    if not pages_processed:
+        print(f"API calls: {total} ({kinds or 'none'}), no pages processed")
+        return None
+    per_page = total / pages_processed
+    print(f"API calls: {total} ({kinds or 'none'}), {per_page:.2f} per processed page")
+    return per_page
+
+def retry_after_seconds(r):
+    return parse_retry_after(r.headers.get("Retry-After"), POLL_INTERVAL)
+
+def submitted_at(log, pages):
+    return log.get(pages[0]).get("submitted_at")
 
 # PDF HELPERS
-def extract_page(reader: PdfReader, page_number: int) -> Path:
+# Pages are serialized into memory and uploaded from there; nothing is
+# written to disk
+def page_filename(page_number: int) -> str:
+    return f"page_{page_number:06d}.pdf"
+
+def doc_filename(pages: list) -> str:
+    if len(pages) == 1:
+        return page_filename(pages[0])
+    return f"pages_{pages[0]:06d}_{pages[-1]:06d}.pdf"
+
+# Group page numbers into runs of consecutive pages, at most size per run
+def chunk_pages(page_numbers, size=PAGES_PER_DOC):
+    chunks = []
+    for page_number in page_numbers:
+        if chunks and len(chunks[-1]) < size and page_number == chunks[-1][-1] + 1:
+            chunks[-1].append(page_number)
+        else:
+            chunks.append([page_number])
+    return chunks
+
+@traced()
+def extract_pages(reader: PdfReader, pages: list) -> io.BytesIO:
     writer = PdfWriter()
-    writer.add_page(reader.pages[page_number - 1])
+    for page_number in pages:
+        writer.add_page(reader.pages[page_number - 1])
+
+    buf = io.BytesIO()
+    writer.write(buf)
+    buf.seek(0)
+
+    return buf
 
-    out_path = TEMP_DIR / f"page_{page_number:06d}.pdf"
-    with open(out_path, "wb") as f:
-        writer.write(f)
+def extract_page(reader: PdfReader, page_number: int) -> io.BytesIO:
+    return extract_pages(reader, [page_number])
+
+# Serializes documents on one background thread (PdfReader is not
+# thread-safe), staying up to PREFETCH_PAGES documents ahead of the uploads
+class PagePrefetcher:
+    def __init__(self, reader: PdfReader, chunks, prefetch=PREFETCH_PAGES):
+        self.queue = queue.Queue(maxsize=prefetch)
+        self.thread = threading.Thread(target=self._run, args=(reader, list(chunks)), daemon=True)
+        self.thread.start()
+
+    def _run(self, reader, chunks):
+        try:
+            for pages in chunks:
+                self.queue.put((pages, extract_pages(reader, pages)))
+        except Exception as e:
+            self.queue.put(e)
+            return
+        self.queue.put(None)
 
-    return out_path
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
 
 # API HELPERS
-def upload_page(page_path: Path) -> str:
-    with open(page_path, "rb") as f:
-        r = requests.post(
-            BASE_URL,
-            headers=HEADERS,
-            files={"file": f},
-            data={
-                "action": "extractor",
-                "extractor_id": EXTRACTOR_ID,
-                "delete_after": DELETE_AFTER_SECONDS,
-            },
-        )
+@traced()
+def upload_page(pages: list, page_pdf: io.BytesIO) -> str:
+    r = client.upload(doc_filename(pages), page_pdf, EXTRACTOR_ID, DELETE_AFTER_SECONDS)
     r.raise_for_status()
     return r.json()["id"]
 
-def wait_for_processing(doc_id: str, max_attempts=120):
-    attempts = 0
-    while attempts < max_attempts:
-        r = requests.get(f"{BASE_URL}/{doc_id}", headers=HEADERS)
+# Polls every doc in the scheduler, earliest check first, and yields
+# (doc_id, pages, status) as each one finishes: "processed", "failed", or
+# "timeout" after max_attempts "processing" answers
+def wait_for_docs(scheduler: PollScheduler, max_attempts=MAX_POLL_ATTEMPTS):
+    while len(scheduler):
+        due = scheduler.pop_due(1)
+        if not due:
+            time.sleep(max(0.0, scheduler.next_due() - time.time()))
+            continue
+
+        doc_id = due[0]
+        r = client.status(doc_id)
 
-        if r.status_code == 202:
-            time.sleep(POLL_INTERVAL)
-            attempts += 1
+        if r.status_code == 429:
+            scheduler.defer(retry_after_seconds(r))
+            scheduler.retry_in(doc_id, 0)
             continue
 
+        status = "processing"
+        if r.status_code != 202:
+            r.raise_for_status()
+            status = r.json().get("status")
+
+        if status == "processed":
+            yield doc_id, scheduler.done(doc_id), status
+        elif status == "failed":
+            yield doc_id, scheduler.drop(doc_id), status
+        elif scheduler.pending(doc_id) >= max_attempts:
+            yield doc_id, scheduler.drop(doc_id), "timeout"
+
+@traced()
+def download_json(doc_id: str, pages: list, max_attempts=20):
+    # every response uses up an attempt, 429s included
+    for attempt in range(1, max_attempts + 1):
+        r = client.download(doc_id)
+
         if r.status_code == 429:
-            retry_after = int(r.headers.get("Retry-After", POLL_INTERVAL))
-            time.sleep(retry_after)
+            time.sleep(retry_after_seconds(r))
+            continue
+
+        if r.status_code == 202:  # result not ready yet; the body isn't the OCR JSON
+            time.sleep(backoff_delay(attempt))
             continue
 
         r.raise_for_status()
+        return save_doc_results(r.content, pages, doc_id)
 
-        if r.json().get("status") == "processed":
-            return
+    raise TimeoutError(f"Download timed out for doc_id={doc_id}")
 
-        time.sleep(POLL_INTERVAL)
-        attempts += 1
+# RESULT SPLITTING
+# A multi-page document comes back with one results[] entry per page; each
+# is stored as its own single-page document, in the same shape as a
+# one-page upload, so cleaning.parse_page_json reads it unchanged.
+def split_results(content: bytes, pages: list) -> dict:
+    if len(pages) == 1:
+        return {pages[0]: content}
+
+    doc = json.loads(content)
+    by_number = {r.get("page_number"): r for r in doc.get("results", [])}
+    header = {k: v for k, v in doc.items() if k != "results"}
+
+    split = {}
+    for offset, page_number in enumerate(pages, start=1):
+        result = by_number.get(offset)
+        if not result or not result.get("extractions"):
+            split[page_number] = None
+            continue
 
-    raise TimeoutError(f"OCR timed out for doc_id={doc_id}")
+        page_doc = dict(header, file_name=page_filename(page_number), page_count=1)
+        page_doc["results"] = [dict(result, page_number=1)]
+        split[page_number] = json.dumps(page_doc).encode()
 
-def download_json(doc_id: str, page_number: int, max_attempts=20):
-    out_file = OUTPUT_DIR / f"page_{page_number:06d}.json"
-    attempts = 0
+    return split
 
-    while attempts < max_attempts:
-        r = requests.get(f"{BASE_URL}/{doc_id}.json", headers=HEADERS)
+# Stores each page's JSON; returns (processed pages, pages missing a result)
+@traced()
+def save_doc_results(content: bytes, pages: list, doc_id=None):
+    processed, missing = [], []
+    items = []
+    for page_number, data in split_results(content, pages).items():
+        if data is None:
+            missing.append(page_number)
+            continue
+        items.append((page_number, data))
+        processed.append(page_number)
+    store.put_many(items, doc_id)
+    return processed, missing
+
+def record_doc_results(log, doc_id, processed, missing):
+    for page_number in processed:
+        log.set(page_number, "processed")
+    for page_number in missing:
+        # only the affected pages go back into the upload queue
+        log.set(page_number, "failed")
+        print(f"No result for page {page_number} in doc_id={doc_id}; will re-submit")
+
+def submitted_fields(pages: list) -> dict:
+    fields = {"submitted_at": round(time.time(), 3)}
+    if len(pages) > 1:
+        fields["doc_pages"] = [pages[0], pages[-1]]
+    return fields
+
+# ASYNC PIPELINE
+# Shared token bucket: every API call takes a token, and a 429 anywhere
+# blocks the whole bucket for Retry-After instead of just the caller.
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+# call is one of client.upload / client.status / client.download, which
+# retry connection errors and 5xx answers themselves (see OcrClient.request)
+@traced()
+async def api_call(bucket, call, *args):
+    while True:
+        await bucket.acquire()
+        r = await asyncio.to_thread(call, *args)
 
         if r.status_code == 429:
-            retry_after = int(r.headers.get("Retry-After", POLL_INTERVAL))
-            time.sleep(retry_after)
-            attempts += 1
+            bucket.block(retry_after_seconds(r))
+            continue
+
+        return r
+
+
+async def upload_worker(reader, extractor, bucket, log, upload_queue, scheduler):
+    loop = asyncio.get_running_loop()
+
+    while True:
+        try:
+            pages = upload_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        try:
+            # serialized on the single extractor thread while other workers upload
+            page_pdf = await loop.run_in_executor(extractor, extract_pages, reader, pages)
+            r = await api_call(
+                bucket, client.upload, doc_filename(pages), page_pdf, EXTRACTOR_ID, DELETE_AFTER_SECONDS
+            )
+            r.raise_for_status()
+            doc_id = r.json()["id"]
+        except Exception as e:
+            # recorded as failed so the next round re-submits them; the other
+            # uploads carry on
+            for page_number in pages:
+                log.set(page_number, "failed", error=str(e))
+            print(f"Upload failed for pages {pages[0]}–{pages[-1]}: {e}")
             continue
 
+        fields = submitted_fields(pages)
+        for page_number in pages:
+            log.set(page_number, "submitted", doc_id=doc_id, **fields)
+        scheduler.add(doc_id, pages, fields["submitted_at"])
+        print(f"Uploaded pages {pages[0]}–{pages[-1]} → {doc_id}")
+
+
+async def check_status(bucket, doc_id):
+    r = await api_call(bucket, client.status, doc_id)
+    if r.status_code == 202:
+        return "processing"
+    r.raise_for_status()
+    return r.json().get("status")
+
+
+# One poller checks whichever docs are due in the scheduler, up to
+# POLL_BATCH_SIZE at a time. 429s block the shared bucket (see api_call),
+# which holds back every poll, upload and download. A check that fails
+# only affects its own doc, which is backed off like a "processing" answer.
+async def poller(bucket, log, scheduler, download_queue, uploads, max_attempts=MAX_POLL_ATTEMPTS):
+    try:
+        while True:
+            if not len(scheduler) and all(u.done() for u in uploads):
+                # a download answered 202 puts its doc back into the scheduler, so
+                # only stop once every queued download has finished
+                await download_queue.join()
+                if not len(scheduler):
+                    break
+
+            batch = scheduler.pop_due(POLL_BATCH_SIZE)
+            if not batch:
+                wake = scheduler.next_due()
+                delay = POLL_TICK if wake is None else wake - time.time()
+                await asyncio.sleep(min(max(delay, 0.0), POLL_TICK))
+                continue
+
+            statuses = await asyncio.gather(*(check_status(bucket, d) for d in batch), return_exceptions=True)
+
+            for doc_id, status in zip(batch, statuses):
+                if isinstance(status, BaseException):
+                    print(f"Status check failed for doc_id={doc_id}: {status}")
+                if status == "processed":
+                    download_queue.put_nowait((doc_id, scheduler.done(doc_id)))
+                elif status == "failed":
+                    pages = scheduler.drop(doc_id)
+                    for page_number in pages:
+                        log.set(page_number, "failed")
+                    print(f"OCR failed for pages {pages[0]}–{pages[-1]} (doc_id={doc_id})")
+                elif scheduler.pending(doc_id) >= max_attempts:
+                    # Left as "submitted" so the next round polls it again
+                    pages = scheduler.drop(doc_id)
+                    print(f"OCR timed out for pages {pages[0]}–{pages[-1]} (doc_id={doc_id})")
+    finally:
+        for _ in range(DOWNLOAD_CONCURRENCY):
+            download_queue.put_nowait(None)
+
+
+async def download_worker(bucket, log, scheduler, download_queue):
+    while True:
+        item = await download_queue.get()
+        if item is None:
+            return
+
+        doc_id, pages = item
+        try:
+            await download_doc(bucket, log, scheduler, doc_id, pages)
+        finally:
+            download_queue.task_done()
+
+
+async def download_doc(bucket, log, scheduler, doc_id, pages):
+    try:
+        r = await api_call(bucket, client.download, doc_id)
+        if r.status_code == 202:
+            # reported processed but the result isn't ready; back to the poller
+            scheduler.add(doc_id, pages)
+            scheduler.pending(doc_id)
+            return
         r.raise_for_status()
-        out_file.write_bytes(r.content)
+        processed, missing = await asyncio.to_thread(save_doc_results, r.content, pages, doc_id)
+    except Exception as e:
+        for page_number in pages:
+            log.set(page_number, "failed", error=str(e))
+        print(f"Download failed for pages {pages[0]}–{pages[-1]} (doc_id={doc_id}): {e}")
         return
 
-    raise TimeoutError(f"Download timed out for doc_id={doc_id}")
+    record_doc_results(log, doc_id, processed, missing)
+    print(f"Downloaded pages {pages[0]}–{pages[-1]}")
 
-# MAIN PIPELINE (LOOPS UNTIL DONE)
-def main():
-    log = load_log()
+
+# latency carries the learned processing time from one round to the next
+async def run_pipeline(reader, log, pages_per_doc=PAGES_PER_DOC, latency=None):
+    total_pages = len(reader.pages)
+    bucket = TokenBucket(REQUESTS_PER_SECOND)
+    scheduler = PollScheduler(latency)
+    upload_queue = asyncio.Queue()
+    download_queue = asyncio.Queue()
+
+    for doc_id, pages in log.docs("submitted").items():
+        scheduler.add(doc_id, pages, submitted_at(log, pages))
+    for pages in chunk_pages(log.unsubmitted(total_pages), pages_per_doc):
+        upload_queue.put_nowait(pages)
+
+    print(f"Pending docs: {len(scheduler)}, docs to upload: {upload_queue.qsize()}")
+
+    with ThreadPoolExecutor(max_workers=1) as extractor:
+        uploads = [
+            asyncio.create_task(upload_worker(reader, extractor, bucket, log, upload_queue, scheduler))
+            for _ in range(UPLOAD_CONCURRENCY)
+        ]
+        downloads = [
+            asyncio.create_task(download_worker(bucket, log, scheduler, download_queue))
+            for _ in range(DOWNLOAD_CONCURRENCY)
+        ]
+        await asyncio.gather(
+            *uploads,
+            poller(bucket, log, scheduler, download_queue, uploads),
+            *downloads,
+        )
+
+
+# Keeps running rounds until every page is processed (or a round stalls)
+def main_async(pages_per_doc=PAGES_PER_DOC):
+    migrate_if_new(OCR_STORE_PATH, OCR_OUTPUT_DIR)
+    log = ProcessingLog(LOG_PATH)
+    try:
+        run_until_done(log, pages_per_doc)
+        client.report()
+    finally:
+        log.close()
+        store.close()
+
+def run_until_done(log, pages_per_doc):
     reader = PdfReader(MERGED_PDF)
     total_pages = len(reader.pages)
 
     print(f"Total pages: {total_pages}")
+    latency = LatencyModel()
 
     while True:
-        submitted = [i for i in range(1, total_pages + 1)
-                     if log.get(str(i), {}).get("status") == "submitted"]
+        done_before = log.count("processed")
+        if done_before >= total_pages:
+            print("All pages processed.")
+            return
+
+        calls_before = client.calls_snapshot()
+        with span("round", pages_processed_before=done_before) as stage:
+            asyncio.run(run_pipeline(reader, log, pages_per_doc, latency))
+            log.flush()
+            done_after = log.count("processed")
+            stage.add(done_after - done_before)
+            calls = client.calls_snapshot() - calls_before
+            per_page = report_api_calls(calls, done_after - done_before)
+            stage.set(api_calls=dict(calls), api_calls_per_page=per_page and round(per_page, 3),
+                      latency_estimate_s=round(latency.estimate(), 3), http=client.summary())
+
+        print(f"Round complete: {done_after}/{total_pages} pages processed")
+        if done_after == done_before:
+            print("No progress this round; stopping.")
+            return
+
+# MAIN PIPELINE (LOOPS UNTIL DONE)
+def main(pages_per_doc=PAGES_PER_DOC):
+    migrate_if_new(OCR_STORE_PATH, OCR_OUTPUT_DIR)
+    log = ProcessingLog(LOG_PATH)
+    done_before = log.count("processed")
+    calls_before = client.calls_snapshot()
+    try:
+        run_one_batch(log, pages_per_doc)
+        report_api_calls(client.calls_snapshot() - calls_before, log.count("processed") - done_before)
+        client.report()
+    finally:
+        log.close()
+        store.close()
+
+def run_one_batch(log, pages_per_doc):
+    reader = PdfReader(MERGED_PDF)
+    total_pages = len(reader.pages)
+
+    print(f"Total pages: {total_pages}")
 
-        unsubmitted = [i for i in range(1, total_pages + 1)
-                       if log.get(str(i), {}).get("status") not in ("processed", "submitted")]
+    while True:
+        submitted = log.docs("submitted")
+        unsubmitted = log.unsubmitted(total_pages)
 
         if not submitted and not unsubmitted:
             print("All pages processed.")
@@ -147,32 +505,55 @@ def main():
 
         # Download any pending submitted pages first — no uploading until clear
         if submitted:
-            batch = submitted[:BATCH_SIZE]
-            print(f"\nDownloading batch: pages {batch[0]} → {batch[-1]}")
-            for page_number in batch:
-                entry = log[str(page_number)]
-                print(f"Downloading page {page_number}")
-                wait_for_processing(entry["doc_id"])
-                download_json(entry["doc_id"], page_number)
-                entry["status"] = "processed"
-                save_log(log)
-                time.sleep(1)
+            batch = sorted(submitted.items(), key=lambda d: d[1][0])[:BATCH_SIZE]
+            print(f"\nDownloading batch: pages {batch[0][1][0]} → {batch[-1][1][-1]}")
+            scheduler = PollScheduler()
+            for doc_id, pages in batch:
+                scheduler.add(doc_id, pages, submitted_at(log, pages))
+            # docs are downloaded in the order they finish processing
+            with span("download batch", docs=len(batch)) as stage:
+                for doc_id, pages, status in wait_for_docs(scheduler):
+                    if status == "failed":
+                        for page_number in pages:
+                            log.set(page_number, "failed")
+                        print(f"OCR failed for pages {pages[0]}–{pages[-1]} (doc_id={doc_id})")
+                        continue
+                    if status == "timeout":
+                        raise TimeoutError(f"OCR timed out for doc_id={doc_id}")
+                    print(f"Downloading pages {pages[0]}–{pages[-1]}")
+                    processed, missing = download_json(doc_id, pages)
+                    record_doc_results(log, doc_id, processed, missing)
+                    stage.add(len(processed))
+            log.flush()
             print("Download batch complete.")
             return
 
         # Only upload if nothing is pending download
         batch = unsubmitted[:BATCH_SIZE]
         print(f"\nUploading batch: pages {batch[0]} → {batch[-1]}")
-        for page_number in batch:
-            print(f"Uploading page {page_number}")
-            page_pdf = extract_page(reader, page_number)
-            doc_id = retry_request(lambda p=page_pdf: upload_page(p))
-            log[str(page_number)] = {"doc_id": doc_id, "status": "submitted"}
-            save_log(log)
-            page_pdf.unlink()
-            time.sleep(1)
+        with span("upload batch", pages_per_doc=pages_per_doc) as stage:
+            for pages, page_pdf in PagePrefetcher(reader, chunk_pages(batch, pages_per_doc)):
+                print(f"Uploading pages {pages[0]}–{pages[-1]}")
+                doc_id = upload_page(pages, page_pdf)
+                for page_number in pages:
+                    log.set(page_number, "submitted", doc_id=doc_id, **submitted_fields(pages))
+                stage.add(len(pages))
+                time.sleep(1)
+        log.flush()
         print("Upload batch complete.")
         return
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="run the concurrent upload/poll/download pipeline until every page is processed")
+    parser.add_argument("--pages-per-doc", type=int, default=PAGES_PER_DOC,
+                        help="pack up to N consecutive pages into each uploaded document")
+    add_trace_args(parser)
+    args = parser.parse_args()
+    start_run_from("handwriting_ocr", args)
+
+    if args.use_async:
+        main_async(args.pages_per_doc)
+    else:
+        main(args.pages_per_doc)
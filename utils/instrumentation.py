@@ -0,0 +1,303 @@
+import os
+import io
+import sys
+import json
+import time
+import atexit
+import pstats
+import inspect
+import cProfile
+import threading
+import functools
+import contextvars
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Per-stage timing and memory spans for the pipeline scripts.
+#
+#   with span("parse pages") as s:
+#       ...
+#       s.add(len(rows))          # item count for the stage
+#
+#   @traced("upload")
+#   def upload_page(...): ...
+#
+# Disabled by default: span() hands back one shared no-op object and
+# @traced calls straight through, so instrumented code costs a global lookup.
+# Enable with a script's --trace / --profile flags or TREE_TRACE=1
+# (TREE_TRACE_MEMORY=1 adds tracemalloc, TREE_TRACE_PROFILE=1 adds cProfile).
+#
+# Each run writes one file under data/_traces in Chrome trace format
+# (chrome://tracing, ui.perfetto.dev). The same file carries a "spans" list
+# with wall time, CPU time, peak RSS / traced memory and item counts per
+# span, plus the top cProfile entries when profiling is on.
+
+TRACE_DIR = Path("../data/_traces")
+PROFILE_TOP = 30
+
+_tracer = None
+
+# innermost open span; a ContextVar rather than a thread-local stack so spans
+# opened in concurrent asyncio tasks nest under the task that opened them
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, n=1):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+def _rss_peak_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "count", "parent", "depth", "tid", "token",
+                 "start", "cpu_start", "wall", "cpu", "rss_peak_mb", "traced_peak", "_child_peak")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.count = None
+
+    def add(self, n=1):
+        self.count = (self.count or 0) + n
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self.depth = self.parent.depth + 1 if self.parent is not None else 0
+        self.tid = threading.get_ident()
+        self.token = _current.set(self)
+
+        self._child_peak = 0
+        if self.tracer.memory:
+            # fold the parent's peak so far in before resetting for this span
+            if self.parent is not None:
+                self.parent._child_peak = max(self.parent._child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        self.cpu_start = time.thread_time() if self.tracer.threaded else time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self.start
+        cpu_end = time.thread_time() if self.tracer.threaded else time.process_time()
+        self.cpu = cpu_end - self.cpu_start
+        self.rss_peak_mb = _rss_peak_mb()
+
+        self.traced_peak = None
+        if self.tracer.memory:
+            self.traced_peak = max(self._child_peak, tracemalloc.get_traced_memory()[1])
+            if self.parent is not None:
+                self.parent._child_peak = max(self.parent._child_peak, self.traced_peak)
+
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+
+        _current.reset(self.token)
+        self.tracer._record(self)
+        return False
+
+
+class Tracer:
+    def __init__(self, run_name, path=None, memory=False, profile=False, threaded=False):
+        self.run_name = run_name
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = Path(path) if path else TRACE_DIR / f"{run_name}_{stamp}.json"
+        self.memory = memory
+        self.threaded = threaded
+        self.origin = time.perf_counter()
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.spans = []
+        self.lock = threading.Lock()
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        self.profiler = cProfile.Profile() if profile else None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def _record(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def span_records(self):
+        records = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            record = {
+                "name": s.name,
+                "parent": s.parent.name if s.parent is not None else None,
+                "depth": s.depth,
+                "start_s": round(s.start - self.origin, 6),
+                "wall_s": round(s.wall, 6),
+                "cpu_s": round(s.cpu, 6),
+                "rss_peak_mb": round(s.rss_peak_mb, 1) if s.rss_peak_mb is not None else None,
+            }
+            if s.traced_peak is not None:
+                record["traced_peak_mb"] = round(s.traced_peak / (1024 * 1024), 2)
+            if s.count is not None:
+                record["count"] = s.count
+                if s.wall > 0:
+                    record["per_s"] = round(s.count / s.wall, 1)
+            if s.attrs:
+                record["attrs"] = s.attrs
+            records.append(record)
+        return records
+
+    def chrome_events(self):
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.run_name}}]
+        for record, s in zip(self.span_records(), sorted(self.spans, key=lambda s: s.start)):
+            args = {k: v for k, v in record.items() if k not in ("name", "parent", "depth", "start_s", "wall_s")}
+            events.append({
+                "name": s.name,
+                "ph": "X",
+                "ts": round((s.start - self.origin) * 1e6, 1),
+                "dur": round(s.wall * 1e6, 1),
+                "pid": pid,
+                "tid": s.tid,
+                "args": args,
+            })
+        return events
+
+    def hot_functions(self, top=PROFILE_TOP):
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({
+                "function": f"{Path(filename).name}:{line}({func})",
+                "calls": nc,
+                "tottime_s": round(tt, 6),
+                "cumtime_s": round(ct, 6),
+            })
+        return sorted(rows, key=lambda r: r["cumtime_s"], reverse=True)[:top]
+
+    def write(self):
+        other = {
+            "run": self.run_name,
+            "started": self.started,
+            "argv": sys.argv,
+            "wall_s": round(time.perf_counter() - self.origin, 6),
+            "rss_peak_mb": _rss_peak_mb(),
+        }
+
+        payload = {"traceEvents": self.chrome_events(), "otherData": other, "spans": self.span_records()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            payload["hot_functions"] = self.hot_functions()
+            self.profiler.dump_stats(self.path.with_suffix(".prof"))
+
+        self.path.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+        return self.path
+
+
+# ----------------------------
+# Public API
+# ----------------------------
+def span(name, **attrs):
+    if _tracer is None:
+        return NO_SPAN
+    return Span(_tracer, name, attrs)
+
+
+def traced(name=None):
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await fn(*args, **kwargs)
+                with Span(_tracer, label, {}):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with Span(_tracer, label, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+    return decorate
+
+
+def enabled():
+    return _tracer is not None
+
+
+# Starts a traced run; the trace file is written when the process exits
+# (or by finish()). threaded=True measures CPU per thread instead of per process.
+def start_run(run_name, path=None, memory=False, profile=False, threaded=False):
+    global _tracer
+    if _tracer is not None:
+        return _tracer
+    _tracer = Tracer(run_name, path, memory=memory, profile=profile, threaded=threaded)
+    atexit.register(finish)
+    return _tracer
+
+
+def finish():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    path = tracer.write()
+    print(f"Trace written to {path}")
+    return path
+
+
+def add_trace_args(parser):
+    parser.add_argument("--trace", action="store_true",
+                        help="record per-stage timing/memory spans to data/_traces")
+    parser.add_argument("--trace-memory", action="store_true", help="also track Python allocations (tracemalloc)")
+    parser.add_argument("--profile", action="store_true", help="also capture a cProfile of the run")
+
+
+def _env_flag(name):
+    return os.environ.get(name, "") not in ("", "0")
+
+
+# From parsed --trace/--trace-memory/--profile flags and/or TREE_TRACE* env vars
+def start_run_from(run_name, args=None, threaded=False):
+    trace = getattr(args, "trace", False) or _env_flag("TREE_TRACE")
+    memory = getattr(args, "trace_memory", False) or _env_flag("TREE_TRACE_MEMORY")
+    profile = getattr(args, "profile", False) or _env_flag("TREE_TRACE_PROFILE")
+    if trace or memory or profile:
+        return start_run(run_name, memory=memory, profile=profile, threaded=threaded)
+    return None
@@ -0,0 +1,204 @@
+import re
+import argparse
+from pathlib import Path
+from collections import Counter
+
+# pyarrow is optional: only needed for Parquet output and read_inventory
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+INVENTORY_PARQUET = Path("../data/pages_1_to_1000.parquet")
+ADDRESS_CSV = Path("../data/tree_inventories_with_address.csv")
+
+BATCH_ROWS = 10_000
+RE_MEASUREMENT_COL = re.compile(r"^(Height|Diameter)\b")
+# Heights are in feet and diameters in inches, so each column only drops its
+# own unit's mark, and only at the end: 10' → 10 in a Height column, but 25"
+# (inches), a bare " (ditto) or '81 (a year) stay unparsed and go to (raw)
+RE_UNIT_MARK = {
+    "Height": re.compile(r"\s*['\u2019]\s*$"),
+    "Diameter": re.compile(r'\s*["\u201d]\s*$'),
+}
+CATEGORICAL_COLS = ("Street", "Species")
+RAW_SUFFIX = " (raw)"
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+
+
+# unit mark pattern for a measurement column, None for other columns
+def unit_mark(column):
+    m = RE_MEASUREMENT_COL.match(column)
+    return RE_UNIT_MARK[m.group(1)] if m else None
+
+
+def to_number(v, mark=None):
+    if v in (None, "", "nan"):
+        return None
+    s = str(v).strip()
+    if mark is not None:
+        s = mark.sub("", s)
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+# (number, raw): raw keeps the original string when it isn't a number even
+# with the column's unit mark stripped ("m/s", 25" as a height), so nothing
+# the CSV has is lost
+def parse_measurement(v, mark=None):
+    number = to_number(v, mark)
+    if number is None and v not in (None, "", "nan"):
+        return None, str(v).strip()
+    return number, None
+
+
+def to_text(v):
+    if v in (None, "", "nan"):
+        return None
+    return str(v).strip()
+
+
+# Fixed schema for cleaning.py output: one column per possible year slot,
+# categorical Street/Species, nullable float32 measurements. Each measurement
+# has a "(raw)" string column holding the values that didn't parse. Tree ID
+# is null unless cleaning.py ran with --tree-ids.
+def inventory_schema(year_slots=5):
+    require_pyarrow()
+    category = pa.dictionary(pa.int32(), pa.string())
+
+    fields = [
+        ("Tree ID", pa.string()),
+        ("Page", pa.int32()),
+        ("Street", category),
+        ("Block", pa.string()),
+        ("Sector", pa.string()),
+        ("Street Number", pa.string()),
+        ("Tree No.", pa.string()),
+        ("Species (raw)", pa.string()),
+        ("Species", category),
+        ("Year Planted", pa.string()),
+        ("Years", pa.string()),
+    ]
+    fields += [(f"Height {s}", pa.float32()) for s in range(1, year_slots + 1)]
+    fields += [(f"Diameter {s}", pa.float32()) for s in range(1, year_slots + 1)]
+    fields += [(name + RAW_SUFFIX, pa.string()) for name, t in fields if t == pa.float32()]
+
+    return pa.schema(fields)
+
+
+# unparsed counts per measurement column are added to unparsed (a Counter)
+def rows_to_table(rows, schema, unparsed=None):
+    columns = []
+    raw_columns = {}
+    for field in schema:
+        if pa.types.is_floating(field.type):
+            mark = unit_mark(field.name)
+            parsed = [parse_measurement(r.get(field.name), mark) for r in rows]
+            values = [number for number, _ in parsed]
+            raw_columns[field.name + RAW_SUFFIX] = raw = [raw for _, raw in parsed]
+            if unparsed is not None:
+                unparsed[field.name] += sum(v is not None for v in raw)
+        elif field.name in raw_columns:
+            values = raw_columns[field.name]
+        elif pa.types.is_integer(field.type):
+            values = [int(r[field.name]) if r.get(field.name) is not None else None for r in rows]
+        else:
+            values = [to_text(r.get(field.name)) for r in rows]
+        columns.append(pa.array(values, type=field.type))
+
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def report_unparsed(unparsed):
+    total = sum(unparsed.values())
+    if total:
+        cols = ", ".join(f"{col} {n}" for col, n in unparsed.items() if n)
+        print(f"Parquet: {total} non-numeric measurements kept only in the (raw) columns ({cols})")
+
+
+# Buffers row dicts and flushes them as Parquet row groups
+class ParquetInventoryWriter:
+    def __init__(self, path, year_slots=5):
+        self.path = Path(path)
+        self.schema = inventory_schema(year_slots)
+        self.buffer = []
+        self.writer = None
+        self.unparsed = Counter()
+
+    def __enter__(self):
+        self.writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        return self
+
+    def write_rows(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.write_table(rows_to_table(self.buffer, self.schema, self.unparsed))
+            self.buffer = []
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        self.writer.close()
+
+
+# Returns the per-column counts of measurements that didn't parse
+def write_parquet(rows, path, year_slots=5):
+    with ParquetInventoryWriter(path, year_slots) as writer:
+        writer.write_rows(rows)
+    return writer.unparsed
+
+
+# Column projection: only the requested columns are read and decoded
+def read_inventory(path=INVENTORY_PARQUET, columns=None):
+    require_pyarrow()
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+# Convert the wide "Height (YYYY)" / "Diameter (YYYY)" address CSV
+def csv_to_parquet(csv_path=ADDRESS_CSV, parquet_path=None):
+    require_pyarrow()
+    import pandas as pd
+
+    parquet_path = Path(parquet_path) if parquet_path else Path(csv_path).with_suffix(".parquet")
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+
+    unparsed = Counter()
+    for col in list(df.columns):
+        if RE_MEASUREMENT_COL.match(col):
+            raw = df[col].str.strip()
+            numbers = pd.to_numeric(raw.str.replace(unit_mark(col), "", regex=True).str.strip(), errors="coerce")
+            failed = numbers.isna() & raw.ne("") & raw.ne("nan")
+            df[col] = numbers.astype("float32")
+            df[col + RAW_SUFFIX] = raw.where(failed, None)
+            unparsed[col] = int(failed.sum())
+        elif col in CATEGORICAL_COLS:
+            df[col] = df[col].replace("", None).astype("category")
+        elif col == "Page":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int32")
+        else:
+            df[col] = df[col].replace("", None)
+
+    df.to_parquet(parquet_path, compression="zstd", index=False)
+    report_unparsed(unparsed)
+    return parquet_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("csv_path", nargs="?", default=str(ADDRESS_CSV))
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    out = csv_to_parquet(args.csv_path, args.out)
+    print(f"Saved {out}")
@@ -0,0 +1,103 @@
+import json
+import hashlib
+from pathlib import Path
+
+import geopandas as gpd
+from shapely.ops import unary_union
+
+# GeoParquet cache for shapefile layers and the layers derived from them
+# (reprojected, clipped, old/new subdivision masks). A cache group is keyed
+# on the size + mtime of every source file and its sidecars (.dbf/.shx/.prj…)
+# plus any build parameters, and is rebuilt only when one of those changes.
+
+CACHE_DIR = Path("../data/_cache/layers")
+
+
+def source_key(sources, params=None):
+    files = []
+    for src in sources:
+        src = Path(src)
+        for f in sorted(src.parent.glob(f"{src.stem}.*")):
+            st = f.stat()
+            files.append([str(f), st.st_size, st.st_mtime_ns])
+    payload = json.dumps({"files": files, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cached_group(group, sources, build, params=None):
+    key = source_key(sources, params)
+    group_dir = CACHE_DIR / group
+    key_path = group_dir / "key.txt"
+
+    if key_path.exists() and key_path.read_text() == key:
+        return {p.stem: gpd.read_parquet(p) for p in sorted(group_dir.glob("*.parquet"))}
+
+    layers = build()
+
+    group_dir.mkdir(parents=True, exist_ok=True)
+    for stale in group_dir.glob("*.parquet"):
+        stale.unlink()
+    for name, gdf in layers.items():
+        gdf.to_parquet(group_dir / f"{name}.parquet")
+    key_path.write_text(key)  # written last, so a partial build is never reused
+
+    return layers
+
+
+def read_layer(path, crs=None):
+    path = Path(path)
+
+    def build():
+        gdf = gpd.read_file(path)
+        if crs is not None and gdf.crs != crs:
+            gdf = gdf.to_crs(crs)
+        return {path.stem: gdf}
+
+    group = path.stem if crs is None else f"{path.stem}_{str(crs).replace(':', '')}"
+    return cached_group(group, [path], build, params={"crs": str(crs)})[path.stem]
+
+
+# Roads, city boundary and subdivisions split into pre/post split_year,
+# exactly as the old main.py plotting sections build them
+def subdivision_layers(roads_path, boundary_path, divisions_path, split_year=1985):
+    def build():
+        roads = gpd.read_file(roads_path)
+        boundary = gpd.read_file(boundary_path)
+        divisions = gpd.read_file(divisions_path)
+
+        # Ensure CRS matches
+        target_crs = roads.crs
+        if boundary.crs != target_crs:
+            boundary = boundary.to_crs(target_crs)
+        if divisions.crs != target_crs:
+            divisions = divisions.to_crs(target_crs)
+
+        # Clip divisions to new city boundary
+        divisions_clipped = gpd.clip(divisions, boundary)
+
+        recent_divisions = divisions_clipped[divisions_clipped['Year'] > split_year]
+        old_divisions = divisions_clipped[divisions_clipped['Year'] < split_year]
+
+        # Create a mask from year for divisions
+        merged_old = unary_union(old_divisions.geometry)
+        enclosed_old = merged_old.buffer(1).buffer(-1)  # adjust value based on units
+        old_divisions = gpd.GeoDataFrame(geometry=[enclosed_old], crs=old_divisions.crs)
+
+        # Clip city boundary by divisions
+        old_boundary = gpd.clip(boundary, old_divisions)
+
+        return {
+            "roads": roads,
+            "boundary": boundary,
+            "recent_divisions": recent_divisions,
+            "old_boundary": old_boundary,
+            "roads_clipped_new": gpd.clip(roads, recent_divisions),
+            "roads_clipped_old": gpd.clip(roads, old_boundary),
+        }
+
+    return cached_group(
+        "subdivisions",
+        [roads_path, boundary_path, divisions_path],
+        build,
+        params={"split_year": split_year},
+    )
@@ -1,6 +1,14 @@
-import geopandas as gpd
 import pandas as pd
-import re
+from pathlib import Path
+
+from inventory_store import read_inventory
+from street_normalization import normalize_street_series
+from address_matcher import address_set_join, match_trees, normalize_number_series
+from layer_cache import read_layer
+from instrumentation import span, start_run_from
+
+# TREE_TRACE=1 python mapping.py  → per-stage timings in data/_traces
+start_run_from("mapping")
 
 # ----------------------------
 # Display settings
@@ -12,11 +20,23 @@ pd.set_option("display.max_colwidth", None)
 # ----------------------------
 # Load data
 # ----------------------------
-address_points = gpd.read_file('../data/shapefiles/address_points.shp')
-road_centerline = gpd.read_file('../data/shapefiles/road_centerline.shp')
-
-# low_memory=False avoids dtype warnings; does NOT change data
-trees = pd.read_csv('../data/pages_1_to_1000.csv', low_memory=False)
+with span("load layers") as stage:
+    address_points = read_layer('../data/shapefiles/address_points.shp')
+    road_centerline = read_layer('../data/shapefiles/road_centerline.shp')
+    stage.add(len(address_points))
+
+# Prefer the typed Parquet from `cleaning.py --parquet`, reading only the
+# columns used here; fall back to the CSV
+TREE_COLUMNS = ["Street", "Street Number"]
+TREES_PARQUET = Path('../data/pages_1_to_1000.parquet')
+
+with span("load trees") as stage:
+    if TREES_PARQUET.exists():
+        trees = read_inventory(TREES_PARQUET, columns=TREE_COLUMNS)
+    else:
+        # low_memory=False avoids dtype warnings; does NOT change data
+        trees = pd.read_csv('../data/pages_1_to_1000.csv', low_memory=False)
+    stage.add(len(trees))
 
 print("Loaded:")
 print(f"  Address points: {len(address_points)}")
@@ -40,60 +60,13 @@ print(address_points["STREET"].head())
 print("\nTree inventory Street column:")
 print(trees["Street"].head())
 
-# ----------------------------
-# Street normalization
-# ----------------------------
-RE_PUNCT = re.compile(r"[.,]")
-RE_DASH_NOTE = re.compile(r"\s+-.*$")
-RE_ORDINAL = re.compile(r"\b(\d+)\s+(st|nd|rd|th)\b")
-RE_DIRECTION = re.compile(r"\b(north|south|east|west|n|s|e|w)\b$")
-
-STREET_REPLACEMENTS = {
-    r"\bst\b": "street",
-    r"\brd\b": "road",
-    r"\bdr\b": "drive",
-    r"\bpl\b": "place",
-    r"\bct\b": "court",
-    r"\bcts\b": "courts",
-    r"\bcres\b": "crescent",
-    r"\bcrs\b": "crescent",
-    r"\bave\b": "avenue",
-}
-
-def normalize_street(s):
-    if pd.isna(s):
-        return None
-
-    s = str(s).lower().strip()
-    if not s:
-        return None
-
-    # remove punctuation
-    s = RE_PUNCT.sub("", s)
-
-    # remove dash commentary (e.g. "- wascana centre side")
-    s = RE_DASH_NOTE.sub("", s)
-
-    # fix ordinal spacing: "21 st" → "21st"
-    s = RE_ORDINAL.sub(r"\1\2", s)
-
-    # normalize street types
-    for pattern, repl in STREET_REPLACEMENTS.items():
-        s = re.sub(pattern, repl, s)
-
-    # remove trailing direction words
-    s = RE_DIRECTION.sub("", s)
-
-    # collapse whitespace
-    s = re.sub(r"\s+", " ", s).strip()
-
-    return s
-
 # ----------------------------
 # Normalize and compare
 # ----------------------------
-trees["_street_norm"] = trees["Street"].apply(normalize_street)
-address_points["_street_norm"] = address_points["STREET"].apply(normalize_street)
+with span("normalize streets") as stage:
+    trees["_street_norm"] = normalize_street_series(trees["Street"])
+    address_points["_street_norm"] = normalize_street_series(address_points["STREET"])
+    stage.add(len(trees) + len(address_points))
 
 tree_streets = set(trees["_street_norm"].dropna())
 addr_streets = set(address_points["_street_norm"].dropna())
@@ -119,44 +92,14 @@ for s in sorted(matched)[:25]:
 # ----------------------------
 print("\nChecking UNIQUE address-level matches using BUILDING + street name...")
 
-# normalize BUILDING to string
-address_points["_building_norm"] = (
-    address_points["BUILDING"]
-    .astype(str)
-    .str.strip()
-)
-
-trees["_street_no_norm"] = (
-    trees["Street Number"]
-    .astype(str)
-    .str.strip()
-)
-
-# build lookup from address points
-addr_lookup = set(
-    zip(
-        address_points["_street_norm"],
-        address_points["_building_norm"]
-    )
-)
-
-# build UNIQUE addresses from tree inventory
-tree_addresses = set(
-    zip(
-        trees["_street_norm"],
-        trees["_street_no_norm"]
-    )
-)
-
-# remove incomplete / invalid entries
-tree_addresses = {
-    (s, n)
-    for s, n in tree_addresses
-    if s and n and n != "nan"
-}
-
-matched_addresses = tree_addresses & addr_lookup
-unmatched_addresses = tree_addresses - addr_lookup
+# normalize BUILDING / Street Number to strings, missing values to None
+address_points["_building_norm"] = normalize_number_series(address_points["BUILDING"])
+trees["_street_no_norm"] = normalize_number_series(trees["Street Number"])
+
+# UNIQUE tree addresses joined against the address point lookup
+with span("address set join") as stage:
+    tree_addresses, matched_addresses, unmatched_addresses = address_set_join(trees, address_points)
+    stage.add(len(trees))
 
 print(f"\nUnique tree addresses: {len(tree_addresses)}")
 print(f"Address-level matches found: {len(matched_addresses)}")
@@ -166,3 +109,18 @@ print("\nSample unmatched addresses:")
 for street, number in sorted(unmatched_addresses, key=lambda x: (str(x[0]), str(x[1])))[:25]:
     print(f"  {number} {street}")
 
+
+# ----------------------------
+# Tree-level match table (exact join + fuzzy street fallback)
+# ----------------------------
+with span("match trees") as stage:
+    match_table = match_trees(trees, address_points)
+    stage.add(len(trees))
+
+print("\nTree matches by method:")
+print(match_table["method"].value_counts().to_string())
+
+fuzzy = match_table[match_table["method"] == "fuzzy"].drop_duplicates(["street", "matched_street"])
+print("\nSample fuzzy street matches:")
+for row in fuzzy.head(25).itertuples():
+    print(f"  {row.street} → {row.matched_street} ({row.confidence:.2f})")
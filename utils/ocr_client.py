@@ -0,0 +1,192 @@
+import time
+import bisect
+import threading
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# HTTP client for the handwritingocr.com v3 /documents API.
+#
+# One requests.Session with a connection pool, so the ~13k calls of a full
+# run reuse a handful of keep-alive connections instead of opening a new
+# TCP+TLS connection each. Every call goes through request(), which applies
+# the timeouts and the one retry policy (connection errors, timeouts and 5xx
+# answers are retried; 4xx are not, and 429s are left to the callers' rate
+# limiting), counts calls by kind (upload / status / download, plus 429
+# answers) and records a latency histogram per kind. Thread-safe: the async
+# pipeline calls it from worker threads.
+#
+#   client = OcrClient(token, base_url="http://127.0.0.1:8765/api/v3/documents")  # ocr_stub_server.py
+#   r = client.status(doc_id)
+#   client.report()
+
+BASE_URL = "https://www.handwritingocr.com/api/v3/documents"
+
+POOL_SIZE = 32            # keep-alive connections kept per host; at least the concurrent callers
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 120        # uploads wait for the whole PDF to be accepted
+
+RETRIES = 3              # attempts per call, the first one included
+RETRY_DELAY = 3
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+# histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "n", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.n += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    # upper bound of the bucket holding the q-th quantile, in ms
+    def quantile(self, q):
+        if not self.n:
+            return None
+        rank = q * self.n
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else round(self.max, 1)
+        return round(self.max, 1)
+
+    def summary(self):
+        if not self.n:
+            return {"n": 0}
+        return {
+            "n": self.n,
+            "mean_ms": round(self.total / self.n, 1),
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max, 1),
+            "buckets": {
+                (f"<={LATENCY_BUCKETS_MS[i]}" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]}"): c
+                for i, c in enumerate(self.counts) if c
+            },
+        }
+
+
+class OcrClient:
+    def __init__(self, token, base_url=BASE_URL, pool_size=POOL_SIZE,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, session=None,
+                 retries=RETRIES, retry_delay=RETRY_DELAY):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+        })
+        # retries are handled in request() and by the callers' 429 handling,
+        # not by urllib3
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self.calls = Counter()
+        self.latency = {}
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # One API call, retried on connection errors, timeouts and 5xx answers.
+    # Returns the last response, so callers still see a 5xx that persisted.
+    def request(self, kind, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(1, self.retries + 1):
+            try:
+                r = self.send(kind, method, url, **kwargs)
+            except RETRYABLE_ERRORS:
+                if attempt == self.retries:
+                    raise
+            else:
+                if r.status_code < 500 or attempt == self.retries:
+                    return r
+            time.sleep(self.retry_delay)
+
+    # One HTTP call, timed and counted under kind
+    def send(self, kind, method, url, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            r = self.session.request(method, url, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self.lock:
+                self.latency.setdefault(kind, LatencyHistogram()).record(elapsed)
+        with self.lock:
+            self.calls[kind] += 1
+            if r.status_code == 429:
+                self.calls["429"] += 1
+        return r
+
+    # ENDPOINTS
+    def upload(self, filename, pdf, extractor_id, delete_after):
+        pdf.seek(0)  # the buffer may have been read by an earlier call
+        data = pdf.read()  # bytes, so a retry sends the whole file again
+        return self.request(
+            "upload",
+            "POST",
+            self.base_url,
+            files={"file": (filename, data, "application/pdf")},
+            data={
+                "action": "extractor",
+                "extractor_id": extractor_id,
+                "delete_after": delete_after,
+            },
+        )
+
+    def status(self, doc_id):
+        return self.request("status", "GET", f"{self.base_url}/{doc_id}")
+
+    def download(self, doc_id):
+        return self.request("download", "GET", f"{self.base_url}/{doc_id}.json")
+
+    # REPORTING
+    def calls_snapshot(self):
+        with self.lock:
+            return self.calls.copy()
+
+    # TCP connections opened so far, from urllib3's per-host pools
+    def connections_opened(self):
+        pools = self.adapter.poolmanager.pools
+        return sum(pool.num_connections for pool in map(pools.get, pools.keys()) if pool is not None)
+
+    def summary(self):
+        with self.lock:
+            latency = {kind: h.summary() for kind, h in self.latency.items()}
+        return {"calls": dict(self.calls_snapshot()), "connections": self.connections_opened(), "latency": latency}
+
+    def report(self):
+        summary = self.summary()
+        requests_made = sum(h["n"] for h in summary["latency"].values())
+        print(f"HTTP: {requests_made} requests over {summary['connections']} connection(s)")
+        for kind, h in summary["latency"].items():
+            if h["n"]:
+                print(f"  {kind:9} n={h['n']:<6} mean {h['mean_ms']:8.1f} ms  p50 ≤{h['p50_ms']} ms  "
+                      f"p90 ≤{h['p90_ms']} ms  p99 ≤{h['p99_ms']} ms  max {h['max_ms']} ms")
+        return summary
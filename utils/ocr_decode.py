@@ -0,0 +1,125 @@
+import json
+from typing import List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Decoding of extractor JSON into the records cleaning.parse_page_record reads.
+#
+# Every value in an extractor page is wrapped as
+# {"value", "name", "key", "type", "array"} and the parser only reads name
+# and value. With msgspec installed, pages are decoded straight into typed
+# structs that declare just those two, so the other keys are skipped by the
+# decoder and never become Python objects. Without it, orjson (or the
+# stdlib json module) decodes to dicts and the same records are built from
+# those. A page that doesn't fit the schema (e.g. a numeric value) goes
+# through the dict path, so every backend gives the same rows.
+#
+# A field or cell without a "value" reads as None; one that is absent
+# altogether raises KeyError(name) where the parser needs it.
+
+MAX_YEAR_SLOTS = 5
+YEAR_FIELDS = [f"year_{slot}" for slot in range(1, MAX_YEAR_SLOTS + 1)]
+
+MISSING = object()
+
+
+class PageRecord:
+    __slots__ = ("street", "block", "sector", "years", "rows")
+
+    def __init__(self, street, block, sector, years, rows):
+        self.street = street
+        self.block = block
+        self.sector = sector
+        self.years = years  # year_1 … year_5 values, None when absent
+        self.rows = rows    # [{cell name: value}] per table row; MISSING without a table_row field
+
+
+def required(value, name):
+    if value is MISSING:
+        raise KeyError(name)
+    return value
+
+
+# values: {field name: value}, rows already converted
+def _page_record(values, rows):
+    return PageRecord(
+        values["street"],
+        values["block"],
+        values["sector"],
+        tuple(map(values.get, YEAR_FIELDS)),
+        rows,
+    )
+
+
+# From an already decoded page (dicts, as json.loads returns them)
+def record_from_dict(data):
+    extraction = data["results"][0]["extractions"][0]
+    values = {f["name"]: f.get("value") for f in extraction}
+
+    rows = table_row = values.get("table_row", MISSING)
+    if isinstance(table_row, list):
+        rows = [{c["name"]: c.get("value") for c in cells} for cells in table_row]
+
+    return _page_record(values, rows)
+
+
+def decode_json(content):
+    return record_from_dict(json.loads(content))
+
+
+DECODERS = {"json": decode_json}
+
+if orjson is not None:
+    def decode_orjson(content):
+        return record_from_dict(orjson.loads(content))
+
+    DECODERS["orjson"] = decode_orjson
+
+if msgspec is not None:
+    class Cell(msgspec.Struct, gc=False):
+        name: str
+        value: Optional[str] = None
+
+    class Field(msgspec.Struct, gc=False):
+        name: str
+        value: Union[str, List[List[Cell]], None] = None
+
+    class Result(msgspec.Struct, gc=False):
+        extractions: List[List[Field]]
+
+    class ExtractorPage(msgspec.Struct, gc=False):
+        results: List[Result]
+
+    _decoder = msgspec.json.Decoder(ExtractorPage)
+    _decode_dict = DECODERS[list(DECODERS)[-1]]
+
+    def _record_from_struct(page):
+        extraction = page.results[0].extractions[0]
+        values = {f.name: f.value for f in extraction}
+
+        rows = table_row = values.get("table_row", MISSING)
+        if isinstance(table_row, list):
+            rows = [{c.name: c.value for c in cells} for cells in table_row]
+
+        return _page_record(values, rows)
+
+    def decode_msgspec(content):
+        try:
+            page = _decoder.decode(content)
+        except msgspec.ValidationError:
+            return _decode_dict(content)
+        return _record_from_struct(page)
+
+    DECODERS["msgspec"] = decode_msgspec
+
+# fastest available: msgspec, then orjson, then json
+BACKEND = list(DECODERS)[-1]
+decode_page = DECODERS[BACKEND]
@@ -0,0 +1,265 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+
+# OCR results, one row per page, in a single SQLite file.
+#
+# Replaces the data/ocr_output directory of page_NNNNNN.json files: each
+# page's JSON is stored exactly as downloaded, zlib-compressed (the verbose
+# {"value", "name", "key", "type"} wrappers compress ~30x), keyed by page
+# number. Reading a page is one primary-key lookup instead of a glob, sort
+# and file open. sha256 of the uncompressed JSON is kept per page, so
+# cleaning.py's page cache keys stay the same as they were for the files.
+#
+#   python ocr_store.py migrate                  # import ../data/ocr_output/*.json
+#   python ocr_store.py stats
+#   python ocr_store.py export 1 120 --out /tmp/pages
+
+OCR_STORE_PATH = Path("../data/ocr_output.sqlite")
+OCR_OUTPUT_DIR = Path("../data/ocr_output")
+COMPRESS_LEVEL = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page       INTEGER PRIMARY KEY,
+    doc_id     TEXT,
+    sha256     TEXT NOT NULL,
+    raw_size   INTEGER NOT NULL,
+    data       BLOB NOT NULL,
+    stored_at  REAL NOT NULL
+)
+"""
+
+
+def page_filename(page):
+    return f"page_{page:06d}.json"
+
+
+class OcrStore:
+    def __init__(self, path=OCR_STORE_PATH, readonly=False):
+        self.path = Path(path)
+        self.readonly = readonly
+        self._conn = None
+        self.lock = threading.Lock()
+
+    # the connection is opened lazily, so a store can be pickled into
+    # worker processes and each one opens its own
+    def __getstate__(self):
+        return {"path": self.path, "readonly": self.readonly}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["readonly"])
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            if self.readonly:
+                self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute(SCHEMA)
+                self._conn.commit()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # WRITES
+    # items: [(page, json bytes)], committed together
+    def put_many(self, items, doc_id=None):
+        now = time.time()
+        records = [
+            (page, doc_id, hashlib.sha256(data).hexdigest(), len(data), zlib.compress(data, COMPRESS_LEVEL), now)
+            for page, data in items
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pages (page, doc_id, sha256, raw_size, data, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                records,
+            )
+        return len(records)
+
+    def put(self, page, data, doc_id=None):
+        self.put_many([(page, data)], doc_id)
+
+    # folds the write-ahead log into the main file
+    def checkpoint(self):
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # READS
+    def pages(self, first_page=None, last_page=None):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT page FROM pages WHERE page >= ? AND page <= ? ORDER BY page",
+                (first_page if first_page is not None else -1, last_page if last_page is not None else 2 ** 62),
+            ).fetchall()
+        return [page for (page,) in rows]
+
+    def get(self, page):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM pages WHERE page = ?", (page,)).fetchone()
+        if row is None:
+            raise KeyError(page)
+        return zlib.decompress(row[0])
+
+    def load(self, page):
+        return json.loads(self.get(page))
+
+    def __contains__(self, page):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM pages WHERE page = ?", (page,)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    # {page: sha256 of the uncompressed JSON}
+    def digests(self, pages):
+        wanted = set(pages)
+        with self.lock:
+            rows = self.conn.execute("SELECT page, sha256 FROM pages").fetchall()
+        return {page: digest for page, digest in rows if page in wanted}
+
+    def name(self, page):
+        return f"{self.path.name}[{page}]"
+
+    def stats(self):
+        with self.lock:
+            count, raw, stored = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM pages"
+            ).fetchone()
+        return {"pages": count, "raw_bytes": raw, "stored_bytes": stored,
+                "file_bytes": self.path.stat().st_size if self.path.exists() else 0}
+
+
+# Read-only view of the old one-file-per-page directory with the same
+# read API, used until the directory has been migrated
+class JsonDirPages:
+    def __init__(self, directory=OCR_OUTPUT_DIR):
+        self.path = Path(directory)
+
+    def _file(self, page):
+        return self.path / page_filename(page)
+
+    def pages(self, first_page=None, last_page=None):
+        pages = sorted(int(p.stem.split("_")[1]) for p in self.path.glob("page_*.json"))
+        return [
+            page for page in pages
+            if (first_page is None or first_page <= page) and (last_page is None or page <= last_page)
+        ]
+
+    def get(self, page):
+        try:
+            return self._file(page).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(page) from None
+
+    def load(self, page):
+        return json.loads(self.get(page))
+
+    def __contains__(self, page):
+        return self._file(page).exists()
+
+    def __len__(self):
+        return len(self.pages())
+
+    def digests(self, pages):
+        return {page: hashlib.sha256(self.get(page)).hexdigest() for page in pages}
+
+    def name(self, page):
+        return page_filename(page)
+
+    def close(self):
+        pass
+
+
+# The store when it exists, otherwise the legacy JSON directory
+def open_pages(store_path=OCR_STORE_PATH, json_dir=OCR_OUTPUT_DIR):
+    if Path(store_path).exists():
+        return OcrStore(store_path, readonly=True)
+    return JsonDirPages(json_dir)
+
+
+# ----------------------------
+# Migration
+# ----------------------------
+def migrate(json_dir=OCR_OUTPUT_DIR, store_path=OCR_STORE_PATH, batch_size=500, replace=False):
+    source = JsonDirPages(json_dir)
+    pages = source.pages()
+
+    with OcrStore(store_path) as store:
+        if not replace:
+            existing = set(store.pages())
+            pages = [page for page in pages if page not in existing]
+        for start in range(0, len(pages), batch_size):
+            batch = pages[start:start + batch_size]
+            store.put_many([(page, source.get(page)) for page in batch])
+        store.checkpoint()
+        return len(pages), store.stats()
+
+
+# Called before the first write to a store: a new store starts with the
+# pages from the legacy directory, so open_pages() never hides them
+def migrate_if_new(store_path=OCR_STORE_PATH, json_dir=OCR_OUTPUT_DIR):
+    if Path(store_path).exists() or not any(Path(json_dir).glob("page_*.json")):
+        return 0
+    added, _ = migrate(json_dir, store_path)
+    print(f"Imported {added} existing pages from {json_dir} into {store_path}")
+    return added
+
+
+def export(pages, out_dir, store_path=OCR_STORE_PATH):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with OcrStore(store_path, readonly=True) as store:
+        for page in pages:
+            (out_dir / page_filename(page)).write_bytes(store.get(page))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["migrate", "stats", "export"])
+    parser.add_argument("pages", nargs="*", type=int, help="export: first and last page")
+    parser.add_argument("--store", default=str(OCR_STORE_PATH))
+    parser.add_argument("--dir", default=str(OCR_OUTPUT_DIR), help="migrate: directory of page_*.json files")
+    parser.add_argument("--replace", action="store_true", help="migrate: overwrite pages already in the store")
+    parser.add_argument("--out", default=str(OCR_OUTPUT_DIR), help="export: directory to write page_*.json into")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        t0 = time.perf_counter()
+        added, stats = migrate(args.dir, args.store, replace=args.replace)
+        print(f"Imported {added} pages from {args.dir} in {time.perf_counter() - t0:.1f} s")
+    elif args.command == "export":
+        first, last = (args.pages + [None, None])[:2]
+        with OcrStore(args.store, readonly=True) as store:
+            pages = store.pages(first, last if last is not None else first)
+        export(pages, args.out, args.store)
+        print(f"Exported {len(pages)} pages to {args.out}")
+        stats = None
+    else:
+        with OcrStore(args.store, readonly=True) as store:
+            stats = store.stats()
+
+    if stats is not None:
+        print(f"{args.store}: {stats['pages']} pages, {stats['raw_bytes'] / 1e6:.1f} MB of JSON "
+              f"stored in {stats['file_bytes'] / 1e6:.1f} MB")
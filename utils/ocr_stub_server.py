@@ -0,0 +1,203 @@
+import json
+import re
+import string
+import random
+import argparse
+import threading
+import time
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the handwritingocr.com v3 /documents endpoints, used to
+# exercise handwriting_ocr.py without spending credits:
+#
+#   python ocr_stub_server.py --port 8765 --delay 2 --rate-limit-every 25
+#   HWOCR_API_TOKEN=test HWOCR_BASE_URL=http://127.0.0.1:8765/api/v3/documents python handwriting_ocr.py --async
+#
+# GET /stats reports API requests served and TCP connections accepted, to
+# check that the client reuses keep-alive connections.
+
+SAMPLE_JSON = Path("../data/ocr_output/page_000001.json")
+DOCUMENTS_PATH = "/api/v3/documents"
+STATS_PATH = "/stats"
+
+RE_FILENAME = re.compile(rb'filename="([^"]*)"')
+RE_PDF_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+RE_DOC = re.compile(r"^/api/v3/documents/([A-Za-z0-9]+)(\.json)?$")
+
+
+class StubState:
+    def __init__(self, delay, rate_limit_every, retry_after, sample, drop_page_every=0, status_error_every=0):
+        self.delay = delay
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.sample = sample
+        self.drop_page_every = drop_page_every
+        self.status_error_every = status_error_every
+        self.pages_seen = 0
+        self.status_polls = 0
+        self.errors = 0
+        self.documents = {}
+        self.request_count = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def new_doc_id(self):
+        return "".join(random.choices(string.ascii_letters + string.digits, k=10))
+
+    def stats(self):
+        with self.lock:
+            return {"requests": self.request_count, "connections": self.connections,
+                    "documents": len(self.documents), "errors": self.errors}
+
+    def should_rate_limit(self):
+        with self.lock:
+            self.request_count += 1
+            return self.rate_limit_every and self.request_count % self.rate_limit_every == 0
+
+    # every Nth status poll fails with a 503, as a flaky API would
+    def should_fail_status(self):
+        with self.lock:
+            self.status_polls += 1
+            failed = self.status_error_every and self.status_polls % self.status_error_every == 0
+            self.errors += bool(failed)
+            return failed
+
+    # one results[] entry per uploaded page; every Nth page is left out to
+    # mimic a partially failed multi-page document
+    def results_for(self, page_count):
+        results = []
+        template = self.sample.get("results") or [{}]
+        for page_number in range(1, page_count + 1):
+            with self.lock:
+                self.pages_seen += 1
+                dropped = self.drop_page_every and self.pages_seen % self.drop_page_every == 0
+            if not dropped:
+                results.append(dict(template[0], page_number=page_number))
+        return results
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body go out in separate writes; on a kept-alive
+        # connection Nagle + delayed ACK would add ~40 ms to every response
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def send_json(self, status, payload, headers=None):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def rate_limited(self):
+            if state.should_rate_limit():
+                self.send_json(429, {"error": "rate limited"}, {"Retry-After": str(state.retry_after)})
+                return True
+            return False
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+
+            if self.path != DOCUMENTS_PATH:
+                self.send_json(404, {"error": "not found"})
+                return
+            if self.rate_limited():
+                return
+
+            m = RE_FILENAME.search(body)
+            file_name = m.group(1).decode() if m else "upload.pdf"
+            page_count = max(1, len(RE_PDF_PAGE.findall(body)))
+            doc_id = state.new_doc_id()
+
+            with state.lock:
+                state.documents[doc_id] = {
+                    "file_name": file_name,
+                    "page_count": page_count,
+                    "ready_at": time.monotonic() + state.delay,
+                }
+
+            self.send_json(201, {"id": doc_id, "file_name": file_name, "status": "new"})
+
+        def do_GET(self):
+            if self.path == STATS_PATH:
+                self.send_json(200, state.stats())
+                return
+
+            m = RE_DOC.match(self.path)
+            if not m:
+                self.send_json(404, {"error": "not found"})
+                return
+            if self.rate_limited():
+                return
+
+            doc_id, as_json = m.group(1), m.group(2)
+            if not as_json and state.should_fail_status():
+                self.send_json(503, {"error": "service unavailable"})
+                return
+            doc = state.documents.get(doc_id)
+            if doc is None:
+                self.send_json(404, {"error": "unknown document"})
+                return
+
+            if time.monotonic() < doc["ready_at"]:
+                self.send_json(202, {"id": doc_id, "status": "processing"})
+                return
+
+            if as_json:
+                result = dict(
+                    state.sample,
+                    id=doc_id,
+                    file_name=doc["file_name"],
+                    page_count=doc["page_count"],
+                    results=state.results_for(doc["page_count"]),
+                )
+                self.send_json(200, result)
+            else:
+                self.send_json(200, {"id": doc_id, "file_name": doc["file_name"], "status": "processed"})
+
+    return Handler
+
+
+def serve(port=8765, delay=2.0, rate_limit_every=0, retry_after=1, sample_path=SAMPLE_JSON, drop_page_every=0,
+          status_error_every=0):
+    sample = json.loads(sample_path.read_text(encoding="utf-8")) if sample_path.exists() else {"results": []}
+    state = StubState(delay, rate_limit_every, retry_after, sample, drop_page_every, status_error_every)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.state = state
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=2.0, help="seconds before a document is processed")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth request with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--drop-page-every", type=int, default=0,
+                        help="omit every Nth page from multi-page results")
+    parser.add_argument("--status-error-every", type=int, default=0,
+                        help="answer every Nth status poll with 503")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.delay, args.rate_limit_every, args.retry_after,
+                   drop_page_every=args.drop_page_every, status_error_every=args.status_error_every)
+    print(f"Stub OCR API on http://127.0.0.1:{args.port}{DOCUMENTS_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        stats = server.state.stats()
+        print(f"\n{stats['requests']} requests over {stats['connections']} connections")
@@ -1,60 +1,40 @@
 import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
-from shapely.ops import unary_union
-from shapely.geometry import Point
 import numpy as np
 
+from address_interpolation import extract_address_number, interpolate_addresses
+from road_geocoder import RoadGeocoder, geocode_on_roads
+from layer_cache import read_layer, subdivision_layers
+from tree_index import TreeIndex
+from excel_ingest import read_workbooks, prepare_inventory
+from species_resolver import load_species_resolver
+
 ## -------------------------------------------------- IMPORT DATASETS --------------------------------------------------
 #region
 
-# Import datasets
-df_u = pd.read_excel("Datasets/Uhrich Avenue - Usher Street.xlsx")
-df_v = pd.read_excel("Datasets/Van Horne - Victory Crescent.xlsx")
-df_y = pd.read_excel("Datasets/Yarnton-Young Crescent.xlsx")
-df_z = pd.read_excel("Datasets/Zaran-Zech Place.xlsx")
+# Import datasets (parsed in parallel, cached as Parquet until a workbook changes)
+workbooks = read_workbooks([
+    "Datasets/Uhrich Avenue - Usher Street.xlsx",
+    "Datasets/Van Horne - Victory Crescent.xlsx",
+    "Datasets/Yarnton-Young Crescent.xlsx",
+    "Datasets/Zaran-Zech Place.xlsx",
+])
+df_u, df_v, df_y, df_z = workbooks.values()
 
 #endregion
 
 ## -------------------------------------------- CLEAN AND CALCULATE COLUMNS --------------------------------------------
 #region
 
-# Dataset list
-inventories = [df_u, df_v, df_y, df_z]
-
 # Correct known errors between inventories and address point dataset
 df_v.loc[df_v['Street'] == 'Victoria Avenue East', 'Street'] = 'Victoria Avenue'
 
-# Forward fill Street, Block Start, Block End, Sector, Street Number
-columns_to_fill = ['Street', 'Block Start', 'Block End', 'Sector', 'Street Number']
-
-for inventory in inventories:
-    # Forward fill columns
-    for col in columns_to_fill:
-        if col in inventory.columns:
-            inventory[col] = inventory[col].ffill()
-
-    # Assign Page Number based on changes in Block Start
-    if 'Block Start' in inventory.columns:
-        inventory['Page Number'] = inventory['Block Start'].ne(inventory['Block Start'].shift()).cumsum()
-
-    # Clean Street Number: remove decimals and convert to string
-    if 'Street Number' in inventory.columns:
-        inventory['Street Number'] = pd.to_numeric(inventory['Street Number'], errors='coerce')
-        inventory['Street Number'] = inventory['Street Number'].ffill().astype('Int64').astype(str)
-
-    # Create Full Address
-    if 'Street Number' in inventory.columns and 'Street' in inventory.columns:
-        inventory['Full Address'] = (
-            inventory['Street Number'].str.strip() + ' ' +
-            inventory['Street'].astype(str).str.strip()
-        )
-
-# Assign Document column based on file name
-df_u["Document"] = "Uhrich Avenue - Usher Street"
-df_v["Document"] = "Van Horne - Victory Crescent"
-df_y["Document"] = "Yarnton-Young Crescent"
-df_z["Document"] = "Zaran-Zech Place"
+# Forward fill Street, Block Start, Block End, Sector, Street Number; assign Page Number,
+# clean Street Number, create Full Address and assign Document column based on file name
+df_u, df_v, df_y, df_z = (
+    prepare_inventory(inventory, path.stem)
+    for path, inventory in zip(workbooks, [df_u, df_v, df_y, df_z])
+)
 
 #endregion
 
@@ -116,97 +96,15 @@ df = df[existing_columns + remaining_columns]
 # Fill nan cells with Missing
 df['Species'] = df['Species'].fillna("Blank")
 
-# Species dictionary
-species_dict = {
-    "Amur cherry": "Prunus maackii",
-    "Amur maple": "Acer tataricum subsp. ginnala",
-    "Apple": "Malus spp.",
-    "American basswood": "Tilia americana",
-    "American elm": "Ulmus americana",
-    "Barberry": "Berberis spp.",
-    "Basswood": "Tilia americana",
-    "Beaked willow": "Salix bebbiana",
-    "Black poplar": "Populus nigra",
-    "Bolleana poplar": "Populus alba 'Pyramidalis'",
-    "Buffalo berry": "Shepherdia spp.",
-    "Caragana": "Caragana arborescens",
-    "Cedar": "Thuja occidentalis",
-    "Cherry": "Prunus spp.",
-    "Chokecherry": "Prunus virginiana var. virginiana",
-    "Colorado spruce": "Picea pungens",
-    "Cotoneaster": "Cotoneaster lucidus",
-    "Cottonwood": "Populus deltoides ssp. monilifera",
-    "Crabapple": "Malus spp.",
-    "Cutleaf weeping birch": "Betula pendula 'Laciniata'",
-    "Green ash": "Fraxinus pennsylvanica",
-    "Juniper": "Juniperus scopulorum",
-    "Lilac": "Syringa",
-    "Littleleaf Linden": "Tilia cordata",
-    "Manchurian elm": "Ulmus pumila",
-    "Manitoba maple": "Acer negundo",
-    "Mountain ash": "Sorbus americana",
-    "Muckle plum": "Prunus x nigrella 'Muckle'",
-    "Mugo pine": "Pinus mugo",
-    "Paper birch": "Betula papyrifera",
-    "Patmore ash": "Fraxinus pennsylvanica 'Patmore'",
-    "Pine": "Pinus spp.",
-    "Poplar": "Populus spp.",
-    "Poplar - multistem": "Populus spp.",
-    "Redosier Dogwood": "Cornus sericea",
-    "Red osier dogwood": "Cornus sericea",
-    "Rose bush": "Rosa spp.",
-    "Russian almond": "Prunus tenella",
-    "Russian olive": "Elaeagnus angustifolia",
-    "Scotch pine": "Pinus sylvestris",
-    "Shining willow": "Salix lucida",
-    "Shubert chokecherry": "Prunus virginiana 'Schubert'",
-    "Silver maple": "Acer saccharinum",
-    "Trembling aspen": "Populus tremuloides",
-    "Weeping birch": "Betula pendula",
-    "White birch": "Betula papyrifera",
-    "White spruce": "Picea glauca",
-    "Willow": "Salix spp.",
-    "Laurel willow": "Salix pentandra",
-    "Pyramidal cedar": "Thuja occidentalis",
-    "Fraxinus nigra": "Fraxinus nigra",
-    "Pin cherry": "Prunus pensylvanica",
-    "Honey suckle": "Lonicera spp.",
-    "Aster": "Aster spp.",
-    "Currant": "Ribes spp.",
-    "Plum": "Prunus spp.",
-    "Balsam poplar": "Populus balsamifera",
-    "Largetooth aspen": "Populus grandidentata",
-    "Royalty flowering crap": "Malus 'Royalty'",
-    "European white birch": "Betula pendula",
-
-    "Unclear": "Unclear",
-    "Unknown": "Unclear",
-    "Amier": "Unclear",
-
-    "Blank": "No tree",
-    "Vacant": "No tree",
-
-    "Fence": "No space",
-    "Fire hydrant": "No space",
-    "Sign": "No space",
-    "Water line": "No space",
-    "Light": "No space",
-    "Lamp post": "No space",
-    "Telephone pole": "No space",
-    "Sidewalk": "No space",
-    "Parking": "No space",
-    "Signpost": "No space",
-    "Pole": "No space",
-    "Street light": "No space",
-    "Driveway": "No space",
-    "No room": "No space"
-}
+# Species resolver shared with cleaning.py (species_map.csv plus the
+# hand-reviewed aliases, in one vocabulary; see species_resolver.py)
+species_resolver = load_species_resolver()
 
 
 
 
 # Create a botanical name column
-df['Botanical Name'] = df['Species'].map(species_dict)
+df['Botanical Name'] = species_resolver.resolve_series(df['Species'])
 
 # Add a warning message if any species are missing from the dictionary
 unmapped_species = df[df['Botanical Name'].isna()]['Species'].unique()
@@ -221,11 +119,26 @@ print("\n")
 
 #endregion
 
+## ---------------------------------------------------- TREE IDS -------------------------------------------------------
+#region
+
+# Stable IDs from the persistent tree index (shared with cleaning.py --tree-ids),
+# so the same tree keeps its ID across OCR re-runs and spreadsheet merges
+tree_index = TreeIndex(resolver=species_resolver)
+df['Tree ID'] = pd.concat([
+    tree_index.join(group, source=document, tree_col='Tree Number', species_col='Species')
+    for document, group in df.groupby('Document', sort=False)
+])
+tree_index.close()
+print(f"Assigned {df['Tree ID'].nunique()} tree IDs ({len(tree_index.ids)} in index)")
+
+#endregion
+
 ## ----------------------------------------------- TIE TO ADDRESS POINTS -----------------------------------------------
 #region
 
 # Import address points shapefile
-address_points = gpd.read_file("Property Locations/address_points.shp") # columns STREET and FULLADDRSS
+address_points = read_layer("Property Locations/address_points.shp") # columns STREET and FULLADDRSS
 
 # Normalize street and address columns
 df['Street'] = df['Street'].astype(str).str.strip().str.lower()
@@ -269,36 +182,19 @@ else:
 # Filter address_points to matched addresses
 matched_address_gdf = address_points[address_points['FULLADDRSS'].isin(df['Full Address'])]
 
-# Import road centerlines, current city boundary, and subdivision shapefiles
-roads = gpd.read_file("Roads/road_centerline.shp")
-boundary = gpd.read_file("City Limits/CityLimits.shp")
-divisions = gpd.read_file("Subdivisions/YearofDevelopment.shp")
-
-# Ensure CRS matches
-target_crs = roads.crs
-if boundary.crs != target_crs:
-    boundary = boundary.to_crs(target_crs)
-if divisions.crs != target_crs:
-    divisions = divisions.to_crs(target_crs)
-
-# Clip divisions to new city boundary
-divisions_clipped = gpd.clip(divisions, boundary)
-
-# Filter subdivisions where Year > 1990
-recent_divisions = divisions_clipped[divisions_clipped['Year'] > 1985]
-old_divisions = divisions_clipped[divisions_clipped['Year'] < 1985]
-
-# Create a mask from year for divisions
-merged_old = unary_union(old_divisions.geometry)
-enclosed_old = merged_old.buffer(1).buffer(-1)  # adjust value based on units
-old_divisions = gpd.GeoDataFrame(geometry=[enclosed_old], crs=old_divisions.crs)
-
-# Clip city boundary by divisions
-old_boundary = gpd.clip(boundary, old_divisions)
-
-# Clip roads to city boundary
-roads_clipped_new = gpd.clip(roads, recent_divisions)
-roads_clipped_old = gpd.clip(roads, old_boundary)
+# Road centerlines, city boundary and old/new subdivision masks
+# (reprojected and clipped once, then loaded from the layer cache)
+layers = subdivision_layers(
+    "Roads/road_centerline.shp",
+    "City Limits/CityLimits.shp",
+    "Subdivisions/YearofDevelopment.shp",
+)
+roads = layers["roads"]
+boundary = layers["boundary"]
+recent_divisions = layers["recent_divisions"]
+old_boundary = layers["old_boundary"]
+roads_clipped_new = layers["roads_clipped_new"]
+roads_clipped_old = layers["roads_clipped_old"]
 
 # Plot
 fig, ax = plt.subplots(figsize=(10, 10))
@@ -329,14 +225,6 @@ plt.show()
 ## ---------------------------------------- INTERPOLATE BETWEEN ADDRESS POINTS -----------------------------------------
 #region
 
-# Extract address number from full address
-def extract_address_number(addr):
-    try:
-        return int(addr.split()[0])
-    except:
-        return np.nan
-
-
 # Add numeric address number column
 df['Address Number'] = df['Full Address'].apply(extract_address_number)
 address_points['Address Number'] = address_points['FULLADDRSS'].apply(extract_address_number)
@@ -344,50 +232,28 @@ address_points['Address Number'] = address_points['FULLADDRSS'].apply(extract_ad
 # Merge address_points with coordinates
 address_points = address_points.dropna(subset=['Address Number', 'geometry'])
 
-# Create a GeoDataFrame to hold interpolated results
-interpolated_points = []
-
-# Loop through unmatched addresses
-for unmatched in unmatched_addresses:
-    addr_num = extract_address_number(unmatched)
-    if np.isnan(addr_num):
-        continue  # skip if number is missing
-
-    # Get street name
-    street = unmatched.replace(str(addr_num), '').strip()
-
-    # Get known points on the same street
-    candidates = address_points[address_points['STREET'] == street]
-    if len(candidates) < 2:
-        continue  # not enough points to interpolate
+# Interpolate all unmatched addresses in one batch against per-street sorted arrays
+interpolated_gdf = interpolate_addresses(unmatched_addresses, address_points)
 
-    # Find lower and upper bounding addresses
-    lower = candidates[candidates['Address Number'] < addr_num].sort_values('Address Number').tail(1)
-    upper = candidates[candidates['Address Number'] > addr_num].sort_values('Address Number').head(1)
-
-    if not lower.empty and not upper.empty:
-        # Interpolate x and y
-        lower_num = lower['Address Number'].values[0]
-        upper_num = upper['Address Number'].values[0]
-        lower_geom = lower.geometry.values[0]
-        upper_geom = upper.geometry.values[0]
-
-        ratio = (addr_num - lower_num) / (upper_num - lower_num)
+print(f"\n✅ Interpolated {len(interpolated_gdf)} unmatched addresses.")
+print(f"   {interpolated_gdf['Opposite Sides'].sum()} bracketed by addresses on opposite sides of the street.")
 
-        interpolated_x = lower_geom.x + (upper_geom.x - lower_geom.x) * ratio
-        interpolated_y = lower_geom.y + (upper_geom.y - lower_geom.y) * ratio
+# Fall back to linear referencing along the road centerline for addresses
+# with no bracketing pair of address points
+unresolved = set(unmatched_addresses) - set(interpolated_gdf['Full Address'])
+road_geocoder = RoadGeocoder(roads, address_points)
+road_gdf = geocode_on_roads(unresolved, road_geocoder)
 
-        interpolated_points.append({
-            'Full Address': unmatched,
-            'Street': street,
-            'Address Number': addr_num,
-            'geometry': Point(interpolated_x, interpolated_y)
-        })
+# The road fallback comes back in the road layer's CRS; match the interpolated points before stacking
+if road_gdf.crs != interpolated_gdf.crs:
+    road_gdf = road_gdf.to_crs(interpolated_gdf.crs)
 
-# Create GeoDataFrame from interpolated points
-interpolated_gdf = gpd.GeoDataFrame(interpolated_points, crs=address_points.crs)
+interpolated_gdf = pd.concat(
+    [interpolated_gdf.assign(Method='interpolated'), road_gdf.assign(Method='road centerline')],
+    ignore_index=True,
+)
 
-print(f"\n✅ Interpolated {len(interpolated_gdf)} unmatched addresses.")
+print(f"✅ Placed {len(road_gdf)} more addresses along the road centerline.")
 
 #endregion
 
@@ -397,36 +263,19 @@ print(f"\n✅ Interpolated {len(interpolated_gdf)} unmatched addresses.")
 # Filter address_points to matched addresses
 matched_address_gdf = address_points[address_points['FULLADDRSS'].isin(df['Full Address'])]
 
-# Import road centerlines, current city boundary, and subdivision shapefiles
-roads = gpd.read_file("Roads/road_centerline.shp")
-boundary = gpd.read_file("City Limits/CityLimits.shp")
-divisions = gpd.read_file("Subdivisions/YearofDevelopment.shp")
-
-# Ensure CRS matches
-target_crs = roads.crs
-if boundary.crs != target_crs:
-    boundary = boundary.to_crs(target_crs)
-if divisions.crs != target_crs:
-    divisions = divisions.to_crs(target_crs)
-
-# Clip divisions to new city boundary
-divisions_clipped = gpd.clip(divisions, boundary)
-
-# Filter subdivisions where Year > 1990
-recent_divisions = divisions_clipped[divisions_clipped['Year'] > 1985]
-old_divisions = divisions_clipped[divisions_clipped['Year'] < 1985]
-
-# Create a mask from year for divisions
-merged_old = unary_union(old_divisions.geometry)
-enclosed_old = merged_old.buffer(1).buffer(-1)  # adjust value based on units
-old_divisions = gpd.GeoDataFrame(geometry=[enclosed_old], crs=old_divisions.crs)
-
-# Clip city boundary by divisions
-old_boundary = gpd.clip(boundary, old_divisions)
-
-# Clip roads to city boundary
-roads_clipped_new = gpd.clip(roads, recent_divisions)
-roads_clipped_old = gpd.clip(roads, old_boundary)
+# Road centerlines, city boundary and old/new subdivision masks
+# (reprojected and clipped once, then loaded from the layer cache)
+layers = subdivision_layers(
+    "Roads/road_centerline.shp",
+    "City Limits/CityLimits.shp",
+    "Subdivisions/YearofDevelopment.shp",
+)
+roads = layers["roads"]
+boundary = layers["boundary"]
+recent_divisions = layers["recent_divisions"]
+old_boundary = layers["old_boundary"]
+roads_clipped_new = layers["roads_clipped_new"]
+roads_clipped_old = layers["roads_clipped_old"]
 
 # Plot
 fig, ax = plt.subplots(figsize=(10, 10))
@@ -0,0 +1,324 @@
+import io
+import json
+import argparse
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from instrumentation import add_trace_args, span, start_run_from
+
+# Splitting and merging of the scanned inventory PDFs.
+#
+# split: any PDF over the byte budget is cut into page ranges by a greedy
+#   pass over per-page size estimates (the encoded length of the streams each
+#   page pulls in, shared objects counted once per part), so nothing is
+#   rendered just to be measured. Each part is then rendered once, straight
+#   from the original reader, and written as soon as it is done; only a part
+#   that still comes out over budget is cut again.
+# count: page counts come from the catalog's /Pages /Count, which only needs
+#   the xref table and two objects, not the full page tree.
+# merge: the merged PDF is extended with a PDF incremental update for
+#   source files it doesn't contain yet, appended to the file in place. A manifest next to it records each
+#   merged source (size, mtime, pages), and it is only rebuilt when one of those
+#   changed or disappeared. New files always go on the end, so the page numbers
+#   in processing_log.json stay valid.
+#
+#   python pdf_assembly.py split ../data/tree_inventory_pdfs --max-mb 75
+#   python pdf_assembly.py merge ../data/tree_inventory_pdfs
+
+PDF_DIR = Path("../data/tree_inventory_pdfs")
+MERGED_NAME = "tree_inventory_merged.pdf"
+MAX_SIZE_MB = 75
+PART_MARKER = "_part"
+PAGE_OVERHEAD = 1024  # page dictionary, xref entry etc. per page in a part, in bytes
+LEGACY_HALVES = ("_A", "_B")  # written by the old split-in-half chunker
+
+# The size estimates and the in-place append use pypdf internals (tested
+# with pypdf 6.x). If a pypdf release drops them, pages are measured by
+# rendering them one at a time and the merged PDF is rebuilt instead.
+INCREMENT_API = ("_resolve_links", "_write_increment", "list_objects_in_increment")
+
+
+# ----------------------------
+# Page counts
+# ----------------------------
+def count_pages(path):
+    reader = PdfReader(path)
+    try:
+        return int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except (KeyError, TypeError, ValueError):
+        return len(reader.pages)  # malformed catalog: walk the page tree
+
+
+def file_info(path):
+    path = Path(path)
+    st = path.stat()
+    return {"name": path.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "pages": count_pages(path)}
+
+
+# fn over paths in a process pool (fork only, as in excel_ingest: the cost
+# analysis script runs at module level and can't be re-imported by spawn)
+def map_files(fn, paths, workers=None):
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2 or "fork" not in multiprocessing.get_all_start_methods():
+        return [fn(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers or min(len(paths), 8),
+                             mp_context=multiprocessing.get_context("fork")) as executor:
+        return list(executor.map(fn, paths))
+
+
+# ----------------------------
+# Size-aware splitting
+# ----------------------------
+def render(reader, start, stop):
+    writer = PdfWriter()
+    writer.append(reader, pages=(start, stop), import_outline=False)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+# {(object id, generation): encoded stream length} for every object a page
+# pulls into a part (contents, images, fonts, ...), without other pages
+def page_objects(page):
+    sizes = {}
+    todo = [page]
+    while todo:
+        obj = todo.pop()
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key in sizes:
+                continue
+            obj = obj.get_object()
+            if isinstance(obj, DictionaryObject) and obj.get("/Type") in ("/Page", "/Pages"):
+                continue  # /Parent, annotation /P and link targets
+            # pypdf drops /Length on read; _data holds the stream as stored
+            sizes[key] = len(obj._data) if isinstance(obj, StreamObject) else 0
+        if isinstance(obj, DictionaryObject):
+            todo.extend(obj.values())
+        elif isinstance(obj, ArrayObject):
+            todo.extend(obj)
+    return sizes
+
+
+# (start, stop, pdf bytes) per part, covering every page, each part within
+# max_bytes unless it is a single page that is larger on its own. Ranges
+# come from the estimates; each is rendered once, when it is yielded.
+def split_ranges(reader, start, stop, max_bytes):
+    first, seen, estimate = start, set(), 0
+    for i in range(start, stop):
+        try:
+            sizes = page_objects(reader.pages[i])
+        except AttributeError:  # no StreamObject._data in this pypdf
+            sizes = {("page", i): len(render(reader, i, i + 1))}
+        page_bytes = PAGE_OVERHEAD + sum(size for key, size in sizes.items() if key not in seen)
+        if i > first and estimate + page_bytes > max_bytes:
+            yield from fit_range(reader, first, i, max_bytes)
+            first, seen, estimate = i, set(), 0
+            page_bytes = PAGE_OVERHEAD + sum(sizes.values())
+        seen.update(sizes)
+        estimate += page_bytes
+    yield from fit_range(reader, first, stop, max_bytes)
+
+
+# Renders start:stop; if the estimate was too low, cuts it where the measured
+# size says the budget runs out and renders the pieces
+def fit_range(reader, start, stop, max_bytes):
+    data = render(reader, start, stop)
+    if len(data) <= max_bytes or stop - start == 1:
+        yield start, stop, data
+        return
+    keep = max(1, min(stop - start - 1, (stop - start) * max_bytes // len(data)))
+    yield from fit_range(reader, start, start + keep, max_bytes)
+    yield from fit_range(reader, start + keep, stop, max_bytes)
+
+
+def part_paths(path):
+    path = Path(path)
+    return sorted(path.parent.glob(f"{path.stem}{PART_MARKER}*{path.suffix}"))
+
+
+def is_part(path):
+    stem = Path(path).stem
+    if stem.endswith(LEGACY_HALVES):
+        return True
+    return PART_MARKER in stem and stem.rsplit(PART_MARKER, 1)[1].isdigit()
+
+
+def split_pdf(path, max_bytes=MAX_SIZE_MB * 1024 * 1024):
+    path = Path(path)
+    if path.stat().st_size <= max_bytes:
+        return []
+
+    stale = part_paths(path) + [path.with_name(f"{path.stem}{h}{path.suffix}") for h in LEGACY_HALVES]
+    for part in stale:
+        part.unlink(missing_ok=True)
+
+    # parts are written as they are rendered, so only one is in memory
+    reader = PdfReader(path)
+    out = []
+    for n, (start, stop, data) in enumerate(split_ranges(reader, 0, count_pages(path), max_bytes), start=1):
+        part = path.with_name(f"{path.stem}{PART_MARKER}{n:02d}{path.suffix}")
+        part.write_bytes(data)
+        out.append((part.name, start + 1, stop, len(data)))
+    return out
+
+
+def split_folder(folder, max_mb=MAX_SIZE_MB, workers=None):
+    sources = [p for p in sorted(Path(folder).glob("*.pdf")) if not is_part(p) and p.name != MERGED_NAME]
+    max_bytes = int(max_mb * 1024 * 1024)
+
+    with span("split pdfs", files=len(sources), max_mb=max_mb) as stage:
+        results = map_files(_split_for_pool, [(p, max_bytes) for p in sources], workers)
+        for src, parts in zip(sources, results):
+            for name, first, last, size in parts:
+                print(f"Split: {src.name} pages {first}–{last} → {name} ({size / 1024 / 1024:.1f} MB)")
+            stage.add(len(parts))
+    return dict(zip(sources, results))
+
+
+def _split_for_pool(args):
+    return split_pdf(*args)
+
+
+# ----------------------------
+# Incremental merge
+# ----------------------------
+def manifest_path(merged_path):
+    return Path(merged_path).with_suffix(".manifest.json")
+
+
+def load_manifest(merged_path):
+    path = manifest_path(merged_path)
+    if not path.exists() or not Path(merged_path).exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("merged_size") != Path(merged_path).stat().st_size:
+        return None  # merged file was changed outside this tool
+    return manifest
+
+
+def save_manifest(merged_path, sources):
+    manifest = {"merged_size": Path(merged_path).stat().st_size, "sources": sources}
+    tmp = manifest_path(merged_path).with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp.replace(manifest_path(merged_path))
+
+
+def rebuild(merged_path, folder, infos):
+    writer = PdfWriter()
+    for info in infos:
+        writer.append(Path(folder) / info["name"], import_outline=False)
+    tmp = Path(merged_path).with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        writer.write(f)
+    tmp.replace(merged_path)
+
+
+def can_append_incremental():
+    return all(hasattr(PdfWriter, name) for name in INCREMENT_API)
+
+
+# Appends the new sources as an incremental update: only the new and changed
+# objects, an xref stream and a trailer whose /Prev points at the existing
+# startxref are written, onto the end of the file. PdfWriter.write would copy
+# the whole original document first, so the increment is written directly.
+def append_incremental(merged_path, folder, infos):
+    with open(merged_path, "rb") as original:
+        writer = PdfWriter(PdfReader(original), incremental=True)
+        for info in infos:
+            writer.append(Path(folder) / info["name"], import_outline=False)
+        writer._resolve_links()
+        if writer.list_objects_in_increment():
+            with open(merged_path, "ab") as f:
+                writer._write_increment(f)
+
+
+def source_files(folder, merged_name=MERGED_NAME):
+    return [p for p in sorted(Path(folder).glob("*.pdf")) if p.name != merged_name]
+
+
+# [file_info] for every source PDF in the folder, counted in parallel
+def count_folder(folder, merged_name=MERGED_NAME, workers=None):
+    files = source_files(folder, merged_name)
+    with span("count pages", files=len(files)) as stage:
+        infos = map_files(file_info, files, workers)
+        stage.add(sum(info["pages"] for info in infos))
+    return infos
+
+
+def _same_file(a, b):
+    return a["size"] == b["size"] and a["mtime_ns"] == b["mtime_ns"]
+
+
+# Brings the merged PDF up to date with the folder. infos (from count_folder)
+# can be passed in to skip counting again.
+# Returns (sources in merged order, number of sources written, rebuilt?)
+def update_merged(folder=PDF_DIR, merged_name=MERGED_NAME, infos=None, workers=None):
+    folder = Path(folder)
+    merged_path = folder / merged_name
+    if infos is None:
+        infos = count_folder(folder, merged_name, workers)
+    files = [Path(info["name"]) for info in infos]
+    infos = {info["name"]: info for info in infos}
+
+    manifest = load_manifest(merged_path)
+    merged = manifest["sources"] if manifest else []
+    unchanged = all(m["name"] in infos and _same_file(infos[m["name"]], m) for m in merged)
+
+    if manifest is None or not unchanged:
+        order = [infos[p.name] for p in files]
+        with span("rebuild merged pdf", files=len(order)) as stage:
+            rebuild(merged_path, folder, order)
+            stage.add(sum(info["pages"] for info in order))
+        save_manifest(merged_path, order)
+        return order, len(order), True
+
+    merged_names = {m["name"] for m in merged}
+    new = [infos[p.name] for p in files if p.name not in merged_names]
+    rebuilt = False
+    if new:
+        last = max(merged_names) if merged_names else ""
+        early = [info["name"] for info in new if info["name"] < last]
+        if early:
+            print(f"Note: {', '.join(early)} sort before already merged files but are appended at the end "
+                  f"to keep existing page numbers")
+        if can_append_incremental():
+            with span("append to merged pdf", files=len(new)) as stage:
+                append_incremental(merged_path, folder, new)
+                stage.add(sum(info["pages"] for info in new))
+        else:
+            # same order as an append, so page numbers stay valid
+            print("Note: this pypdf has no incremental writer; rebuilding the merged PDF")
+            with span("rebuild merged pdf", files=len(merged + new)) as stage:
+                rebuild(merged_path, folder, merged + new)
+                stage.add(sum(info["pages"] for info in merged + new))
+            rebuilt = True
+        save_manifest(merged_path, merged + new)
+
+    return merged + new, len(new), rebuilt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["split", "merge", "count"])
+    parser.add_argument("folder", nargs="?", default=str(PDF_DIR))
+    parser.add_argument("--max-mb", type=float, default=MAX_SIZE_MB, help="byte budget per part (split)")
+    parser.add_argument("--workers", type=int, default=None)
+    add_trace_args(parser)
+    args = parser.parse_args()
+    start_run_from("pdf_assembly", args)
+
+    if args.command == "split":
+        split_folder(args.folder, args.max_mb, args.workers)
+    elif args.command == "count":
+        for info in count_folder(args.folder, workers=args.workers):
+            print(f"{info['name']:50} {info['pages']:7d} {info['size'] / 1024 / 1024:10.2f}")
+    else:
+        sources, added, rebuilt = update_merged(args.folder, workers=args.workers)
+        total = sum(info["pages"] for info in sources)
+        action = "Rebuilt" if rebuilt else f"Appended {added} file(s) to"
+        print(f"{action} {Path(args.folder) / MERGED_NAME}: {len(sources)} files, {total} pages")
@@ -0,0 +1,198 @@
+import time
+import heapq
+import random
+import statistics
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# When to ask the OCR API whether a document is processed.
+#
+# Documents sit in a heap ordered by their next check time. The first check
+# is scheduled from the learned processing latency (median of recent
+# documents), so most documents are ready the first time they are polled.
+# Each "still processing" answer backs the document off exponentially, with
+# jitter so documents uploaded together don't keep polling in lockstep.
+# A Retry-After from the API defers every check, not just the one that got
+# the 429.
+#
+# Times are wall-clock (time.time()) so submitted_at can be stored in the
+# processing log and reused by the next run.
+
+FIRST_CHECK = 3.0         # seconds after upload, until latencies have been observed
+BACKOFF_BASE = 1.0        # first re-check delay after a "processing" answer
+BACKOFF_MAX = 30.0
+JITTER = 0.25             # ± fraction applied to every delay
+LATENCY_WINDOW = 100      # recent documents the first-check estimate is based on
+MIN_LATENCY_SAMPLES = 3
+FIRST_CHECK_DECAY = 0.9   # see PollScheduler.done
+
+
+# Retry-After is either delta-seconds or an HTTP date
+def parse_retry_after(value, default):
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX, jitter=JITTER, rng=random):
+    delay = min(cap, base * 2 ** max(0, attempt - 1))
+    return delay * rng.uniform(1 - jitter, 1 + jitter)
+
+
+# Processing latency from upload to "processed", as the median of recent
+# samples (see PollScheduler.done for what a sample is)
+class LatencyModel:
+    def __init__(self, default=FIRST_CHECK, window=LATENCY_WINDOW):
+        self.default = default
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        if seconds >= 0:
+            self.samples.append(seconds)
+
+    def estimate(self):
+        if len(self.samples) < MIN_LATENCY_SAMPLES:
+            return self.default
+        return statistics.median(self.samples)
+
+
+class _Doc:
+    __slots__ = ("pages", "submitted_at", "known", "spread", "last_pending", "attempts", "due", "learn")
+
+    def __init__(self, pages, submitted_at, known, spread, learn):
+        self.pages = pages
+        self.submitted_at = submitted_at
+        self.known = known  # submitted_at is the real upload time
+        self.spread = spread  # jitter factor on the first check
+        self.last_pending = submitted_at
+        self.attempts = 0
+        self.due = None
+        self.learn = learn
+
+
+class PollScheduler:
+    def __init__(self, latency=None, base=BACKOFF_BASE, cap=BACKOFF_MAX, jitter=JITTER,
+                 clock=time.time, rng=None):
+        self.latency = latency or LatencyModel()
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.docs = {}
+        self.heap = []  # (due, doc_id); stale entries are skipped on pop
+        self.not_before = 0.0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.docs
+
+    def pages(self, doc_id):
+        return self.docs[doc_id].pages
+
+    def attempts(self, doc_id):
+        return self.docs[doc_id].attempts
+
+    def _push(self, doc_id, due):
+        doc = self.docs[doc_id]
+        doc.due = due
+        heapq.heappush(self.heap, (due, doc_id))
+
+    def _first_check(self, doc):
+        return doc.submitted_at + self.latency.estimate() * doc.spread
+
+    # First check at submitted_at + learned latency. Documents with no
+    # submitted_at (logged by an older run) or already past it are checked now.
+    def add(self, doc_id, pages, submitted_at=None):
+        now = self.clock()
+        known = submitted_at is not None
+        doc = _Doc(pages, submitted_at if known else now, known,
+                   self.rng.uniform(1 - self.jitter, 1 + self.jitter), learn=False)
+        first = self._first_check(doc) if known else now
+        # a document first checked long after it finished says nothing about latency
+        doc.learn = known and first > now
+        self.docs[doc_id] = doc
+        self._push(doc_id, max(now, first))
+
+    # Retry-After from any call holds back every check
+    def defer(self, seconds):
+        self.not_before = max(self.not_before, self.clock() + seconds)
+
+    def next_due(self):
+        while self.heap:
+            due, doc_id = self.heap[0]
+            doc = self.docs.get(doc_id)
+            if doc is None or doc.due != due:
+                heapq.heappop(self.heap)
+                continue
+            return max(due, self.not_before)
+        return None
+
+    # Up to limit doc_ids whose check is due, removed from the heap until
+    # they are rescheduled with pending() or finished with done()/drop()
+    def pop_due(self, limit=None):
+        now = self.clock()
+        out = []
+        if now < self.not_before:
+            return out
+        while self.heap and (limit is None or len(out) < limit):
+            due, doc_id = self.heap[0]
+            doc = self.docs.get(doc_id)
+            if doc is None or doc.due != due:
+                heapq.heappop(self.heap)
+                continue
+            if due > now:
+                break
+            heapq.heappop(self.heap)
+            if doc.attempts == 0 and doc.learn and self._first_check(doc) > now:
+                # the estimate grew since this doc was scheduled
+                self._push(doc_id, self._first_check(doc))
+                continue
+            doc.due = None
+            out.append(doc_id)
+        return out
+
+    # Still processing: back off and return the number of checks so far
+    def pending(self, doc_id):
+        doc = self.docs[doc_id]
+        now = self.clock()
+        doc.attempts += 1
+        doc.last_pending = now
+        doc.learn = doc.known
+        self._push(doc_id, now + backoff_delay(doc.attempts, self.base, self.cap, self.jitter, self.rng))
+        return doc.attempts
+
+    # Re-check after an explicit delay (e.g. a result that isn't downloadable yet)
+    def retry_in(self, doc_id, seconds):
+        self._push(doc_id, self.clock() + seconds)
+
+    # A document seen processing at t1 and processed at t2 finished somewhere
+    # in between, so the midpoint is recorded. One that was already processed
+    # at its first check could have finished any time before it; recording a
+    # little under the check time lets the estimate drift down until some
+    # first checks miss, instead of staying at a value that was too high.
+    def done(self, doc_id):
+        doc = self.docs.pop(doc_id)
+        if doc.learn:
+            now = self.clock()
+            if doc.attempts:
+                self.latency.observe((doc.last_pending + now) / 2 - doc.submitted_at)
+            else:
+                self.latency.observe((now - doc.submitted_at) * FIRST_CHECK_DECAY)
+        return doc.pages
+
+    def drop(self, doc_id):
+        return self.docs.pop(doc_id).pages
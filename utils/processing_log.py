@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+from collections import defaultdict
+
+# OCR processing log: compacted snapshot + append-only journal.
+#
+# The snapshot keeps the original processing_log.json format
+# ({"page": {"doc_id": ..., "status": ...}}). Every status change is one line
+# appended to processing_log.journal; on load the journal is replayed over
+# the snapshot, so a crash loses at most a torn final line. Per-status page
+# sets, and a set of the pages still to upload that every status change
+# updates, make "what's pending" a lookup instead of a scan.
+#
+# Appends are flushed to the OS right away, so a crashed process loses
+# nothing; the fsync that makes them survive a power loss is group-committed
+# every FSYNC_EVERY entries or FSYNC_INTERVAL seconds, and on flush() at
+# checkpoints. The journal is only opened on the first write, so reading the
+# log leaves the data directory untouched.
+
+LOG_PATH = Path("../data/processing_log.json")
+COMPACT_EVERY = 1000  # journal entries before folding them into the snapshot
+FSYNC_EVERY = 100  # journal entries per group fsync
+FSYNC_INTERVAL = 2.0  # longest an entry waits for its fsync, in seconds
+DONE_STATUSES = ("processed", "submitted")  # everything else is uploaded again
+
+
+class ProcessingLog:
+    def __init__(self, path=LOG_PATH, compact_every=COMPACT_EVERY):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(".journal")
+        self.compact_every = compact_every
+        self.entries = {}
+        self.by_status = defaultdict(set)
+        self.total_pages = None  # set by the first unsubmitted() call
+        self.to_submit = set()
+        self.journal_len = 0
+        self.journal = None
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+
+        if self.path.exists():
+            for page, entry in json.loads(self.path.read_text()).items():
+                self._apply(int(page), entry)
+
+        if self.journal_path.exists():
+            self._replay()
+
+    def _apply(self, page, entry):
+        old = self.entries.get(page)
+        if old is not None:
+            self.by_status[old.get("status")].discard(page)
+        self.entries[page] = entry
+        self.by_status[entry.get("status")].add(page)
+
+        if self.total_pages is not None and 1 <= page <= self.total_pages:
+            if entry.get("status") in DONE_STATUSES:
+                self.to_submit.discard(page)
+            else:
+                self.to_submit.add(page)
+
+    def _replay(self):
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn write from a crash; everything before it is intact
+                self._apply(record.pop("page"), record)
+                self.journal_len += 1
+
+    # STATUS UPDATES (one journal append each)
+    def set(self, page, status, doc_id=None, **fields):
+        entry = dict(self.entries.get(page, {}))
+        if doc_id is not None:
+            entry["doc_id"] = doc_id
+            entry.pop("doc_pages", None)  # a new upload replaces the old range
+        entry.update(fields)
+        entry["status"] = status
+
+        if self.journal is None:
+            self.journal = open(self.journal_path, "a", encoding="utf-8")
+        self.journal.write(json.dumps({"page": page, **entry}) + "\n")
+        self.journal.flush()
+        self.unsynced += 1
+
+        self._apply(page, entry)
+        self.journal_len += 1
+        if self.journal_len >= self.compact_every:
+            self.compact()
+        elif self.unsynced >= FSYNC_EVERY or time.monotonic() - self.synced_at >= FSYNC_INTERVAL:
+            self.flush()
+
+    # fsync everything appended so far; call at checkpoints (end of a batch
+    # or round) so they are durable before the next one starts
+    def flush(self):
+        if self.journal is not None and self.unsynced:
+            os.fsync(self.journal.fileno())
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+
+    def compact(self):
+        snapshot = {str(p): self.entries[p] for p in sorted(self.entries)}
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            f.write(json.dumps(snapshot, indent=2))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+        # every entry is in the snapshot now; the next write starts a new journal
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.journal_path.unlink(missing_ok=True)
+        self.journal_len = 0
+        self.unsynced = 0
+
+    def close(self):
+        if self.journal_len:
+            self.compact()
+
+    # QUERIES
+    def get(self, page):
+        return self.entries.get(page, {})
+
+    def status(self, page):
+        return self.entries.get(page, {}).get("status")
+
+    def pages(self, status):
+        return sorted(self.by_status.get(status, ()))
+
+    def count(self, status):
+        return len(self.by_status.get(status, ()))
+
+    # doc_id → pages, for documents that hold several pages
+    def docs(self, status):
+        docs = defaultdict(list)
+        for page in self.pages(status):
+            docs[self.entries[page]["doc_id"]].append(page)
+        return dict(docs)
+
+    # pages never uploaded, or uploaded and then failed. The set is built once
+    # per page count and then kept up to date by every status change.
+    def unsubmitted(self, total_pages):
+        if total_pages != self.total_pages:
+            done = set().union(*(self.by_status.get(status, ()) for status in DONE_STATUSES))
+            self.to_submit = set(range(1, total_pages + 1)) - done
+            self.total_pages = total_pages
+        return sorted(self.to_submit)
+
+    def summary(self):
+        return {status: len(pages) for status, pages in self.by_status.items() if pages}
+
+
+# CLI summary (replaces scrap.py)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", default=str(LOG_PATH))
+    parser.add_argument("--compact", action="store_true", help="fold the journal into the snapshot")
+    args = parser.parse_args()
+
+    log = ProcessingLog(args.log)
+
+    for status, count in sorted(log.summary().items(), key=lambda x: str(x[0])):
+        print(f"{str(status):10} {count:6d}")
+
+    submitted = log.pages("submitted")
+    if submitted:
+        print(f"Submitted: {submitted[0]} → {submitted[-1]}, count: {len(submitted)}")
+
+    if args.compact:
+        log.compact()
+        print(f"Compacted {log.path}")
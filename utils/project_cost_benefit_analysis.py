@@ -1,5 +1,10 @@
 from pathlib import Path
-from pypdf import PdfReader, PdfWriter
+
+from instrumentation import start_run_from
+from pdf_assembly import count_folder, update_merged
+
+# TREE_TRACE=1 python project_cost_benefit_analysis.py  → per-stage timings in data/_traces
+start_run_from("project_cost_benefit_analysis")
 
 # ---- CONFIG ----
 pdf_dir = Path(r"tree_inventory_pdfs")
@@ -26,22 +31,16 @@ print("-" * len(header))
 total_pages = 0
 total_size_mb = 0.0
 
-# ---- COLLECT INPUT PDFs (EXCLUDING MERGED FILE) ----
-pdf_files = sorted(
-    pdf for pdf in pdf_dir.glob("*.pdf")
-    if pdf.name != MERGED_NAME
-)
+# ---- PER-FILE ROWS (INPUT PDFs EXCLUDING MERGED FILE, COUNTED IN PARALLEL) ----
+pdf_infos = count_folder(pdf_dir, MERGED_NAME)
 
-# ---- PER-FILE ROWS ----
-for pdf in pdf_files:
-    reader = PdfReader(pdf)
-    pages = len(reader.pages)
-    size_mb = pdf.stat().st_size / (1024 * 1024)
+for info in pdf_infos:
+    size_mb = info["size"] / (1024 * 1024)
 
-    total_pages += pages
+    total_pages += info["pages"]
     total_size_mb += size_mb
 
-    print(f"{pdf.name:50} {pages:7d} {size_mb:10.2f}")
+    print(f"{info['name']:50} {info['pages']:7d} {size_mb:10.2f}")
 
 # ---- TOTAL ROW ----
 print("-" * len(header))
@@ -68,18 +67,15 @@ print("----------------------")
 print(f"{best_option}")
 print(f"Cost: £{costs[best_option]:,.2f}")
 
-# ---- MERGE ALL PDFs (SAFE OVERWRITE) ----
+# ---- MERGE ALL PDFs (APPEND NEW FILES, REBUILD ONLY IF A MERGED FILE CHANGED) ----
 print("\nMerging PDFs...")
-writer = PdfWriter()
-
-for pdf in pdf_files:
-    reader = PdfReader(pdf)
-    for page in reader.pages:
-        writer.add_page(page)
+_, added, rebuilt = update_merged(pdf_dir, MERGED_NAME, infos=pdf_infos)
 
 output_path = pdf_dir / MERGED_NAME
 
-with open(output_path, "wb") as f:
-    writer.write(f)
-
-print(f"Merged PDF replaced: {output_path}")
\ No newline at end of file
+if rebuilt:
+    print(f"Merged PDF replaced: {output_path}")
+elif added:
+    print(f"Appended {added} new PDF(s) to: {output_path}")
+else:
+    print(f"Merged PDF up to date: {output_path}")
\ No newline at end of file
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely import STRtree
+
+from street_normalization import normalize_street, normalize_street_series
+from address_interpolation import KEY_STRIDE, split_addresses
+
+# Fallback geocoder: place a house number along its road centerline segment
+# when there is no pair of address points to interpolate between.
+#
+# Every segment gets an address range (lo/hi house number) and the positions
+# of those numbers along it (0-1). Ranges come from the road layer's own
+# from/to columns when range_cols=(from_col, to_col) is given, otherwise from
+# the address points snapped onto their nearest same-street segment through
+# one batched STRtree query.
+#
+# SNAP_DISTANCE and MAX_NUMBER_GAP are in metres, so the roads must be in a
+# projected CRS; address points in any other CRS are reprojected onto the
+# roads' CRS, and results come back in it.
+
+SNAP_DISTANCE = 60  # map units (metres in the city CRS)
+MAX_NUMBER_GAP = 200  # don't place numbers further than this outside any range
+
+
+def require_columns(layer, columns, name):
+    missing = [c for c in columns if c not in layer.columns]
+    if missing:
+        raise ValueError(
+            f"{name} layer is missing column(s) {missing}; available: {list(layer.columns)}"
+        )
+
+
+class RoadGeocoder:
+    def __init__(self, roads, address_points=None, road_street_col="STREET",
+                 address_street_col="STREET", number_col="Address Number", range_cols=None):
+        if range_cols:
+            if len(range_cols) != 2:
+                raise ValueError(f"range_cols must be (from_col, to_col), got {range_cols!r}")
+            require_columns(roads, [road_street_col, *range_cols], "road centerline")
+        else:
+            require_columns(roads, [road_street_col], "road centerline")
+            if address_points is None:
+                raise ValueError("address_points are required when the roads carry no range_cols")
+            require_columns(address_points, [address_street_col, number_col], "address points")
+
+        if roads.crs is not None and roads.crs.is_geographic:
+            raise ValueError(
+                f"road centerline layer is in a geographic CRS ({roads.crs.name}); "
+                f"reproject it to a projected CRS in metres first"
+            )
+        if address_points is not None and address_points.crs != roads.crs:
+            if address_points.crs is None or roads.crs is None:
+                raise ValueError(
+                    f"address points CRS ({address_points.crs}) and road centerline CRS ({roads.crs}) "
+                    f"can't be matched; set the missing CRS"
+                )
+            address_points = address_points.to_crs(roads.crs)
+
+        roads = roads[roads.geometry.notna()].explode(index_parts=False).reset_index(drop=True)
+
+        self.crs = roads.crs
+        self.segments = roads.geometry.to_numpy()
+        self.tree = STRtree(self.segments)
+
+        seg_streets = normalize_street_series(roads[road_street_col])
+        seg_codes, streets = pd.factorize(seg_streets)
+        self.street_codes = {s: i for i, s in enumerate(streets)}
+        self.seg_codes = seg_codes
+
+        if range_cols:
+            seg_ids = np.arange(len(roads))
+            lo = pd.to_numeric(roads[range_cols[0]], errors="coerce").to_numpy(dtype=float)
+            hi = pd.to_numeric(roads[range_cols[1]], errors="coerce").to_numpy(dtype=float)
+            # ranges may be digitized high → low
+            lo_frac = np.where(lo <= hi, 0.0, 1.0)
+            lo, hi = np.fmin(lo, hi), np.fmax(lo, hi)
+            hi_frac = 1.0 - lo_frac
+        else:
+            seg_ids, lo, hi, lo_frac, hi_frac = self.ranges_from_points(
+                address_points, address_street_col, number_col
+            )
+
+        keep = ~np.isnan(lo) & ~np.isnan(hi) & (self.seg_codes[seg_ids] >= 0)
+        seg_ids, lo, hi, lo_frac, hi_frac = (a[keep] for a in (seg_ids, lo, hi, lo_frac, hi_frac))
+
+        # sort ranges by (street, lo) for batched searchsorted lookups
+        codes = self.seg_codes[seg_ids]
+        keys = codes * float(KEY_STRIDE) + lo
+        order = np.argsort(keys, kind="mergesort")
+
+        self.range_seg = seg_ids[order]
+        self.range_codes = codes[order]
+        self.range_keys = keys[order]
+        self.range_lo = lo[order]
+        self.range_hi = hi[order]
+        self.range_lo_frac = lo_frac[order]
+        self.range_hi_frac = hi_frac[order]
+
+    def ranges_from_points(self, address_points, street_col, number_col):
+        points = address_points.dropna(subset=[street_col, number_col, "geometry"])
+        geoms = points.geometry.to_numpy()
+        numbers = points[number_col].to_numpy(dtype=float)
+        pt_codes = (
+            normalize_street_series(points[street_col])
+            .map(self.street_codes)
+            .to_numpy(dtype=float)
+        )
+
+        # all (point, segment) pairs within SNAP_DISTANCE, same street only
+        pi, si = self.tree.query(geoms, predicate="dwithin", distance=SNAP_DISTANCE)
+        same = pt_codes[pi] == self.seg_codes[si]
+        pi, si = pi[same], si[same]
+
+        # nearest segment per point
+        dist = shapely.distance(geoms[pi], self.segments[si])
+        order = np.lexsort((dist, pi))
+        pi, si = pi[order], si[order]
+        first = np.r_[True, pi[1:] != pi[:-1]]
+        pi, si = pi[first], si[first]
+
+        frac = shapely.line_locate_point(self.segments[si], geoms[pi], normalized=True)
+        anchors = (
+            pd.DataFrame({"seg": si, "num": numbers[pi], "frac": frac})
+            .sort_values(["seg", "num"], kind="mergesort")
+            .groupby("seg")
+        )
+        lo = anchors.first()
+        hi = anchors.last()
+
+        return (
+            lo.index.to_numpy(),
+            lo["num"].to_numpy(dtype=float),
+            hi["num"].to_numpy(dtype=float),
+            lo["frac"].to_numpy(dtype=float),
+            hi["frac"].to_numpy(dtype=float),
+        )
+
+    def geocode(self, streets, numbers):
+        numbers = np.asarray(numbers, dtype=float)
+        codes = (
+            pd.Series(streets, dtype=object)
+            .map(normalize_street)
+            .map(self.street_codes)
+            .to_numpy(dtype=float)
+        )
+        valid = ~np.isnan(codes) & ~np.isnan(numbers)
+        q = np.where(valid, codes * KEY_STRIDE + numbers, 0.0)
+
+        # i: last range starting at or below the number; j: the next one up
+        n = len(self.range_keys)
+        if n == 0:
+            return {"found": np.zeros(len(numbers), dtype=bool), "geometry": np.array([], dtype=object)}
+
+        i = np.searchsorted(self.range_keys, q, side="right") - 1
+        j = i + 1
+        ci = np.clip(i, 0, n - 1)
+        cj = np.clip(j, 0, n - 1)
+        i_ok = (i >= 0) & (self.range_codes[ci] == codes)
+        j_ok = (j < n) & (self.range_codes[cj] == codes)
+
+        # distance from the number to each candidate range (0 when inside)
+        di = np.where(i_ok, np.maximum(numbers - self.range_hi[ci], 0), np.inf)
+        dj = np.where(j_ok, self.range_lo[cj] - numbers, np.inf)
+        r = np.where(di <= dj, ci, cj)
+        found = valid & (np.minimum(di, dj) <= MAX_NUMBER_GAP)
+
+        # linear reference within the range, clamped to the segment ends
+        lo, hi = self.range_lo[r], self.range_hi[r]
+        span = hi - lo
+        t = np.clip(np.divide(numbers - lo, span, out=np.zeros_like(span), where=span > 0), 0, 1)
+        frac = self.range_lo_frac[r] + t * (self.range_hi_frac[r] - self.range_lo_frac[r])
+
+        geometry = shapely.line_interpolate_point(
+            self.segments[self.range_seg[r[found]]], frac[found], normalized=True
+        )
+        return {"found": found, "geometry": geometry}
+
+
+# Same columns as interpolate_addresses, for addresses it could not bracket
+def geocode_on_roads(addresses, geocoder):
+    addresses, numbers, streets = split_addresses(addresses)
+    result = geocoder.geocode(streets, numbers)
+    found = result["found"]
+
+    return gpd.GeoDataFrame(
+        {
+            "Full Address": [a for a, f in zip(addresses, found) if f],
+            "Street": [s for s, f in zip(streets, found) if f],
+            "Address Number": numbers[found].astype(int),
+        },
+        geometry=result["geometry"],
+        crs=geocoder.crs,
+    )
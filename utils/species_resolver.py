@@ -0,0 +1,401 @@
+import re
+import csv
+import json
+import hashlib
+from pathlib import Path
+from collections import Counter, namedtuple
+
+# Species resolution shared by cleaning.py (OCR pages) and old main.py
+# (manually reviewed spreadsheets).
+#
+# 1. exact lookup of the lowercased alias
+# 2. normalized-token lookup: punctuation, "?" marks, bare numbers and
+#    parenthesized counts dropped, also compared with spaces removed and with
+#    common survey abbreviations expanded
+#    ("am. elm (160)" → "am elm", "honey suckle" → "honeysuckle",
+#    "wt. spruce" → "white spruce")
+# 3. bounded edit distance over a BK-tree of the normalized aliases
+#    ("amer maple" → "amur maple"); ties between different targets are
+#    left unresolved
+#
+# There are only a few hundred distinct raw strings across ~27k rows, so every
+# resolution is memoized per raw string.
+#
+# Both pipelines get their resolver from load_species_resolver(), so they
+# share one vocabulary. Precedence: species_map.csv wins; REVIEWED_SPECIES
+# only adds the aliases the CSV lacks, translated into the CSV's botanical
+# names (see merge_aliases).
+
+SPECIES_MAP_PATH = Path("../data/species_map.csv")
+
+METHOD_EXACT = "exact"
+METHOD_NORMALIZED = "normalized"
+METHOD_FUZZY = "fuzzy"
+METHOD_NONE = "none"
+
+NORMALIZED_CONFIDENCE = 0.9
+MIN_FUZZY_LENGTH = 6  # shorter strings are too ambiguous for edit distance
+TWO_EDIT_LENGTH = 16
+
+# Abbreviations used by the survey crews, expanded token by token
+ABBREVIATIONS = {
+    "am": "american",
+    "amer": "american",
+    "bl": "blue",
+    "blk": "black",
+    "chry": "cherry",
+    "col": "colorado",
+    "fl": "flowering",
+    "mtn": "mountain",
+    "trem": "trembling",
+    "weep": "weeping",
+    "wpg": "weeping",
+    "wh": "white",
+    "wt": "white",
+}
+
+RE_PARENTHESIZED = re.compile(r"\([^)]*\)?")
+RE_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+SpeciesMatch = namedtuple("SpeciesMatch", ["species", "method", "confidence"])
+NO_MATCH = SpeciesMatch(None, METHOD_NONE, 0.0)
+
+# Hand-reviewed aliases from the old main.py (capitalized common name → botanical name)
+REVIEWED_SPECIES = {
+    "Amur cherry": "Prunus maackii",
+    "Amur maple": "Acer tataricum subsp. ginnala",
+    "Apple": "Malus spp.",
+    "American basswood": "Tilia americana",
+    "American elm": "Ulmus americana",
+    "Barberry": "Berberis spp.",
+    "Basswood": "Tilia americana",
+    "Beaked willow": "Salix bebbiana",
+    "Black poplar": "Populus nigra",
+    "Bolleana poplar": "Populus alba 'Pyramidalis'",
+    "Buffalo berry": "Shepherdia spp.",
+    "Caragana": "Caragana arborescens",
+    "Cedar": "Thuja occidentalis",
+    "Cherry": "Prunus spp.",
+    "Chokecherry": "Prunus virginiana var. virginiana",
+    "Colorado spruce": "Picea pungens",
+    "Cotoneaster": "Cotoneaster lucidus",
+    "Cottonwood": "Populus deltoides ssp. monilifera",
+    "Crabapple": "Malus spp.",
+    "Cutleaf weeping birch": "Betula pendula 'Laciniata'",
+    "Green ash": "Fraxinus pennsylvanica",
+    "Juniper": "Juniperus scopulorum",
+    "Lilac": "Syringa",
+    "Littleleaf Linden": "Tilia cordata",
+    "Manchurian elm": "Ulmus pumila",
+    "Manitoba maple": "Acer negundo",
+    "Mountain ash": "Sorbus americana",
+    "Muckle plum": "Prunus x nigrella 'Muckle'",
+    "Mugo pine": "Pinus mugo",
+    "Paper birch": "Betula papyrifera",
+    "Patmore ash": "Fraxinus pennsylvanica 'Patmore'",
+    "Pine": "Pinus spp.",
+    "Poplar": "Populus spp.",
+    "Poplar - multistem": "Populus spp.",
+    "Redosier Dogwood": "Cornus sericea",
+    "Red osier dogwood": "Cornus sericea",
+    "Rose bush": "Rosa spp.",
+    "Russian almond": "Prunus tenella",
+    "Russian olive": "Elaeagnus angustifolia",
+    "Scotch pine": "Pinus sylvestris",
+    "Shining willow": "Salix lucida",
+    "Shubert chokecherry": "Prunus virginiana 'Schubert'",
+    "Silver maple": "Acer saccharinum",
+    "Trembling aspen": "Populus tremuloides",
+    "Weeping birch": "Betula pendula",
+    "White birch": "Betula papyrifera",
+    "White spruce": "Picea glauca",
+    "Willow": "Salix spp.",
+    "Laurel willow": "Salix pentandra",
+    "Pyramidal cedar": "Thuja occidentalis",
+    "Fraxinus nigra": "Fraxinus nigra",
+    "Pin cherry": "Prunus pensylvanica",
+    "Honey suckle": "Lonicera spp.",
+    "Aster": "Aster spp.",
+    "Currant": "Ribes spp.",
+    "Plum": "Prunus spp.",
+    "Balsam poplar": "Populus balsamifera",
+    "Largetooth aspen": "Populus grandidentata",
+    "Royalty flowering crap": "Malus 'Royalty'",
+    "European white birch": "Betula pendula",
+
+    "Unclear": "Unclear",
+    "Unknown": "Unclear",
+    "Amier": "Unclear",
+
+    "Blank": "No tree",
+    "Vacant": "No tree",
+
+    "Fence": "No space",
+    "Fire hydrant": "No space",
+    "Sign": "No space",
+    "Water line": "No space",
+    "Light": "No space",
+    "Lamp post": "No space",
+    "Telephone pole": "No space",
+    "Sidewalk": "No space",
+    "Parking": "No space",
+    "Signpost": "No space",
+    "Pole": "No space",
+    "Street light": "No space",
+    "Driveway": "No space",
+    "No room": "No space"
+}
+
+
+# ----------------------------
+# Alias sources
+# ----------------------------
+def load_species_csv(path=SPECIES_MAP_PATH):
+    aliases = {}
+    if not Path(path).exists():
+        return aliases
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            alias = (row.get("common name") or "").strip().lower()
+            species = (row.get("species") or "").strip()
+            if alias and species:
+                aliases[alias] = species
+
+    return aliases
+
+
+# Adds the secondary aliases the primary source lacks, translated into the
+# primary source's vocabulary: a secondary target is rewritten to whatever the
+# primary maps the shared aliases of that target to
+# ("Acer tataricum subsp. ginnala" → "Acer ginnala"). Targets the primary has
+# no counterpart for ("Unclear", "Prunus x nigrella 'Muckle'") are kept as
+# written.
+def merge_aliases(primary, secondary):
+    primary = {k.strip().lower(): v for k, v in primary.items()}
+    secondary = {k.strip().lower(): v for k, v in secondary.items()}
+
+    primary_targets = set(primary.values())
+    translation = {}
+    for alias, target in secondary.items():
+        if alias in primary:
+            translation.setdefault(target, Counter())[primary[alias]] += 1
+
+    merged = dict(primary)
+    for alias, target in secondary.items():
+        if alias in merged:
+            continue
+        if target in translation and target not in primary_targets:
+            merged[alias] = translation[target].most_common(1)[0][0]
+        else:
+            merged[alias] = target
+
+    return merged
+
+
+# ----------------------------
+# Normalization + edit distance
+# ----------------------------
+def normalize_species(s):
+    s = RE_PARENTHESIZED.sub(" ", s.lower())
+    tokens = RE_NON_WORD.sub(" ", s).split()
+    return " ".join(t for t in tokens if not t.isdigit())
+
+
+def expand_abbreviations(norm):
+    return " ".join(ABBREVIATIONS.get(t, t) for t in norm.split())
+
+
+def levenshtein(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        left = i
+        for j, cb in enumerate(b):
+            cost = prev[j] if ca == cb else prev[j] + 1
+            up = prev[j + 1] + 1
+            if up < cost:
+                cost = up
+            if left + 1 < cost:
+                cost = left + 1
+            cur.append(cost)
+            left = cost
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev = cur
+    return prev[-1]
+
+
+def max_edits(s):
+    if len(s) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(s) < TWO_EDIT_LENGTH else 2
+
+
+# BK-tree over the normalized aliases: each child edge is labelled with its
+# distance to the parent, so by the triangle inequality a query only descends
+# into edges within max_distance of its own distance to the node
+class BKTree:
+    def __init__(self, words):
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            d = levenshtein(word, node[0], len(word) + len(node[0]))
+            if d == 0:
+                return
+            if d not in node[1]:
+                node[1][d] = (word, {})
+                return
+            node = node[1][d]
+
+    # [(distance, word)] for every word within max_distance
+    def search(self, word, max_distance):
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_word, children = stack.pop()
+            # beyond the largest edge + max_distance no child can match, so
+            # the exact distance isn't needed
+            d = levenshtein(word, node_word, max(children, default=0) + max_distance)
+            if d <= max_distance:
+                found.append((d, node_word))
+            for edge, child in children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return found
+
+
+# ----------------------------
+# Resolver
+# ----------------------------
+# Secondary target → the merged table's name for it ("Malus spp." → "Malus"),
+# by majority over the secondary aliases of that target
+def target_synonyms(merged, secondary):
+    votes = {}
+    for alias, target in secondary.items():
+        name = merged.get(alias.strip().lower())
+        if name is not None:
+            votes.setdefault(target, Counter())[name] += 1
+    return {target: names.most_common(1)[0][0] for target, names in votes.items()}
+
+
+class SpeciesResolver:
+    # synonyms: other spellings of the targets (see canonical)
+    def __init__(self, aliases, synonyms=None):
+        self.aliases = {k.strip().lower(): v for k, v in aliases.items()}
+
+        # normalized and space-free forms; forms shared by aliases with
+        # different targets are ambiguous and dropped
+        normalized = {}
+        for alias, target in self.aliases.items():
+            norm = normalize_species(alias)
+            for key in (norm, norm.replace(" ", "")):
+                if key:
+                    normalized.setdefault(key, set()).add(target)
+        self.normalized = {k: targets.pop() for k, targets in normalized.items() if len(targets) == 1}
+
+        self.tree = BKTree(k for k in sorted(self.normalized) if " " not in k)
+        self.memo = {}
+        self.targets = {k.lower(): v for k, v in (synonyms or {}).items()}
+        self.targets.update((t.lower(), t) for t in self.aliases.values())
+
+    def resolve(self, raw):
+        if raw is None or raw != raw:  # None / NaN
+            return NO_MATCH
+        match = self.memo.get(raw)
+        if match is None:
+            match = self.memo[raw] = self._resolve(str(raw))
+        return match
+
+    def _resolve(self, raw):
+        key = raw.strip().lower()
+        if key in self.aliases:
+            return SpeciesMatch(self.aliases[key], METHOD_EXACT, 1.0)
+
+        norm = normalize_species(key)
+        expanded = expand_abbreviations(norm)
+        for form in dict.fromkeys((norm, norm.replace(" ", ""), expanded, expanded.replace(" ", ""))):
+            if form in self.normalized:
+                return SpeciesMatch(self.normalized[form], METHOD_NORMALIZED, NORMALIZED_CONFIDENCE)
+
+        compact = expanded.replace(" ", "")
+        limit = max_edits(compact)
+        if not limit:
+            return NO_MATCH
+
+        found = self.tree.search(compact, limit)
+        if not found:
+            return NO_MATCH
+        best = min(d for d, _ in found)
+        targets = {self.normalized[w] for d, w in found if d == best}
+        if len(targets) != 1:
+            return NO_MATCH
+
+        confidence = round(NORMALIZED_CONFIDENCE * (1 - best / len(compact)), 3)
+        return SpeciesMatch(targets.pop(), METHOD_FUZZY, confidence)
+
+    # Botanical name for a raw or already-resolved value, for identity keys
+    # that must agree whichever pipeline produced the value: missing and
+    # "Blank" give "", a botanical name (or a synonym of one, such as a
+    # REVIEWED_SPECIES target) maps to the table's spelling, anything else is
+    # resolved, and unresolved text falls back to its normalized form
+    def canonical(self, value):
+        if value is None or value != value:  # None / NaN
+            return ""
+        text = str(value).strip()
+        if text.lower() in ("", "nan", "blank"):
+            return ""
+        if text.lower() in self.targets:
+            return self.targets[text.lower()]
+        species = self.resolve(text).species
+        return species if species is not None else normalize_species(text)
+
+    # Hash of everything resolve() depends on: the merged alias table, the
+    # matching thresholds and abbreviations, and this module's source. Part
+    # of the cleaning.py page cache key.
+    def fingerprint(self):
+        settings = {
+            "normalized_confidence": NORMALIZED_CONFIDENCE,
+            "min_fuzzy_length": MIN_FUZZY_LENGTH,
+            "two_edit_length": TWO_EDIT_LENGTH,
+            "abbreviations": ABBREVIATIONS,
+        }
+        h = hashlib.sha256()
+        h.update(json.dumps([sorted(self.aliases.items()), settings], sort_keys=True).encode())
+        h.update(Path(__file__).read_bytes())
+        return h.hexdigest()
+
+    # botanical name per value, None where unresolved
+    def resolve_series(self, series):
+        return series.map(lambda v: self.resolve(v).species)
+
+    def __call__(self, raw):
+        return self.resolve(raw).species
+
+
+# The one resolver for cleaning.py and the old main.py: species_map.csv
+# first, reviewed aliases added in its vocabulary
+def load_species_resolver(path=SPECIES_MAP_PATH):
+    if not Path(path).exists():
+        # without it the reviewed aliases alone would be a second vocabulary
+        raise FileNotFoundError(f"species map not found: {path}")
+    merged = merge_aliases(load_species_csv(path), REVIEWED_SPECIES)
+    return SpeciesResolver(merged, target_synonyms(merged, REVIEWED_SPECIES))
+
+
+if __name__ == "__main__":
+    import sys
+
+    resolver = load_species_resolver()
+    for raw in sys.argv[1:]:
+        print(f"{raw!r:30} {resolver.resolve(raw)}")
@@ -0,0 +1,127 @@
+import re
+from functools import lru_cache
+
+# Shared street-name normalization for cleaning.py (OCR pages) and
+# mapping.py (tree inventory + address points). Each step is one compiled
+# alternation with a lookup-table callback instead of a loop of re.sub calls.
+# There are only a few hundred distinct street strings, so results are memoized.
+
+# ----------------------------
+# Direction abbreviations (cleaning.py)
+# ----------------------------
+DIRECTIONS = {
+    "n": "north",
+    "s": "south",
+    "e": "east",
+    "w": "west",
+    "ne": "northeast",
+    "nw": "northwest",
+    "se": "southeast",
+    "sw": "southwest",
+}
+
+RE_DIRECTION_ABBR = re.compile(r"\b(ne|nw|se|sw|n|s|e|w)\.?\b")
+RE_WHITESPACE = re.compile(r"\s+")
+
+
+def _expand_direction(m):
+    return DIRECTIONS[m.group(1)]
+
+
+@lru_cache(maxsize=4096)
+def _normalize_street_direction(street):
+    street = RE_DIRECTION_ABBR.sub(_expand_direction, street.lower())
+
+    # collapse extra spaces
+    return RE_WHITESPACE.sub(" ", street).strip()
+
+
+def normalize_street_direction(street):
+    if not street:
+        return street
+    return _normalize_street_direction(street)
+
+
+# ----------------------------
+# Street matching key (mapping.py)
+# ----------------------------
+RE_PUNCT = re.compile(r"[.,]")
+RE_DASH_NOTE = re.compile(r"\s+-.*$")
+RE_ORDINAL = re.compile(r"\b(\d+)\s+(st|nd|rd|th)\b")
+RE_DIRECTION = re.compile(r"\b(north|south|east|west|n|s|e|w)\b$")
+
+STREET_REPLACEMENTS = {
+    "st": "street",
+    "rd": "road",
+    "dr": "drive",
+    "pl": "place",
+    "ct": "court",
+    "cts": "courts",
+    "cres": "crescent",
+    "crs": "crescent",
+    "ave": "avenue",
+}
+
+RE_STREET_TYPE = re.compile(r"\b(" + "|".join(STREET_REPLACEMENTS) + r")\b")
+
+
+def _expand_street_type(m):
+    return STREET_REPLACEMENTS[m.group(1)]
+
+
+@lru_cache(maxsize=8192)
+def _normalize_street(s):
+    s = s.lower().strip()
+    if not s:
+        return None
+
+    # remove punctuation
+    s = RE_PUNCT.sub("", s)
+
+    # remove dash commentary (e.g. "- wascana centre side")
+    s = RE_DASH_NOTE.sub("", s)
+
+    # fix ordinal spacing: "21 st" → "21st"
+    s = RE_ORDINAL.sub(r"\1\2", s)
+
+    # normalize street types
+    s = RE_STREET_TYPE.sub(_expand_street_type, s)
+
+    # remove trailing direction words
+    s = RE_DIRECTION.sub("", s)
+
+    # collapse whitespace
+    return RE_WHITESPACE.sub(" ", s).strip()
+
+
+def _is_missing(s):
+    try:
+        return s is None or bool(s != s)  # None / NaN
+    except TypeError:  # pd.NA
+        return True
+
+
+def normalize_street(s):
+    if _is_missing(s):
+        return None
+    return _normalize_street(str(s))
+
+
+# Vectorized path: the .str pipeline runs once per distinct value and the
+# result is mapped back onto the full column
+def normalize_street_series(series):
+    import pandas as pd
+
+    uniques = pd.Series(series.dropna().unique(), dtype=object)
+    s = uniques.astype(str).str.lower().str.strip()
+    blank = s == ""
+    s = s.str.replace(RE_PUNCT, "", regex=True)
+    s = s.str.replace(RE_DASH_NOTE, "", regex=True)
+    s = s.str.replace(RE_ORDINAL, r"\1\2", regex=True)
+    s = s.str.replace(RE_STREET_TYPE, _expand_street_type, regex=True)
+    s = s.str.replace(RE_DIRECTION, "", regex=True)
+    s = s.str.replace(RE_WHITESPACE, " ", regex=True).str.strip()
+    s = s.where(~blank, None)
+
+    lookup = dict(zip(uniques, s))
+    return series.map(lookup).astype(object).where(series.notna(), None)
@@ -0,0 +1,161 @@
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+
+from species_resolver import load_species_resolver
+from street_normalization import normalize_street
+
+# Persistent tree-ID index.
+#
+# A tree is identified by (normalized street, street number, tree no,
+# species). The first time a key is seen it gets the next sequential ID
+# ("T0000001"); from then on every OCR re-run or spreadsheet merge that
+# produces the same key gets the same ID instead of a new record. Species
+# goes into the key as its canonical botanical name from the shared resolver
+# (SpeciesResolver.canonical), so "Amur maple" from a reviewed spreadsheet
+# and "Acer ginnala" from cleaning.py give the same key.
+#
+# The index lives in SQLite next to the data. The key → ID map is also held
+# in memory for O(1) lookups. Page membership is stored with a digest of
+# each page's keys, so re-indexing only touches pages whose trees changed.
+
+INDEX_PATH = Path("../data/tree_index.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trees (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    street TEXT NOT NULL,
+    street_number TEXT NOT NULL,
+    tree_no TEXT NOT NULL,
+    species TEXT NOT NULL,
+    UNIQUE (street, street_number, tree_no, species)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    page INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page_trees (
+    page INTEGER NOT NULL,
+    tree_id INTEGER NOT NULL,
+    PRIMARY KEY (page, tree_id)
+);
+CREATE TABLE IF NOT EXISTS source_trees (
+    source TEXT NOT NULL,
+    tree_id INTEGER NOT NULL,
+    PRIMARY KEY (source, tree_id)
+);
+"""
+
+
+def format_tree_id(n):
+    return f"T{n:07d}"
+
+
+# how a missing value reads as text: NaN, pd.NA, and their astype(str)
+# spellings (old main.py casts Street Number Int64 → str, giving "<NA>")
+MISSING_TEXT = {"", "nan", "<NA>", "None", "NaT"}
+
+
+def _text(v):
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)  # spreadsheet columns read 12 as 12.0
+    s = str(v).strip()
+    return "" if s in MISSING_TEXT else s
+
+
+# species is raw or resolved; resolver maps it to the canonical name
+def tree_key(street, street_number, tree_no, species, resolver):
+    return (
+        normalize_street(street) or "",
+        _text(street_number),
+        _text(tree_no),
+        resolver.canonical(species).lower(),
+    )
+
+
+class TreeIndex:
+    def __init__(self, path=INDEX_PATH, resolver=None):
+        self.path = Path(path)
+        self.resolver = resolver if resolver is not None else load_species_resolver()
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+        self.ids = {
+            (street, number, tree_no, species): tree_id
+            for tree_id, street, number, tree_no, species
+            in self.db.execute("SELECT id, street, street_number, tree_no, species FROM trees")
+        }
+        self.max_id = max(self.ids.values(), default=0)
+        self.page_digests = dict(self.db.execute("SELECT page, digest FROM pages"))
+
+    def lookup(self, key):
+        tree_id = self.ids.get(key)
+        return format_tree_id(tree_id) if tree_id is not None else None
+
+    # IDs for a batch of keys, inserting the unseen ones in one executemany
+    def assign(self, keys):
+        new = list(dict.fromkeys(k for k in keys if k not in self.ids))
+        if new:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO trees (street, street_number, tree_no, species) VALUES (?, ?, ?, ?)",
+                new,
+            )
+            for tree_id, *key in self.db.execute(
+                "SELECT id, street, street_number, tree_no, species FROM trees WHERE id > ?",
+                (self.max_id,),
+            ):
+                self.ids[tuple(key)] = tree_id
+                self.max_id = max(self.max_id, tree_id)
+
+        return [self.ids[k] for k in keys]
+
+    # cleaning.py rows for one page: sets row["Tree ID"] and, if the page's
+    # trees changed since the last run, rewrites its membership
+    def update_page(self, page, rows):
+        keys = [
+            tree_key(r.get("Street"), r.get("Street Number"), r.get("Tree No."), r.get("Species"), self.resolver)
+            for r in rows
+        ]
+        ids = self.assign(keys)
+        for r, tree_id in zip(rows, ids):
+            r["Tree ID"] = format_tree_id(tree_id)
+
+        digest = hashlib.sha256(json.dumps(keys).encode()).hexdigest()
+        if self.page_digests.get(page) != digest:
+            self.db.execute("DELETE FROM page_trees WHERE page = ?", (page,))
+            self.db.executemany(
+                "INSERT OR IGNORE INTO page_trees (page, tree_id) VALUES (?, ?)",
+                [(page, tree_id) for tree_id in ids],
+            )
+            self.db.execute("INSERT OR REPLACE INTO pages (page, digest) VALUES (?, ?)", (page, digest))
+            self.page_digests[page] = digest
+
+        return rows
+
+    # Bulk join for DataFrames (e.g. the manually reviewed spreadsheets):
+    # returns a Series of tree IDs aligned with df
+    def join(self, df, source, street_col="Street", number_col="Street Number",
+             tree_col="Tree Number", species_col="Species"):
+        import pandas as pd
+
+        keys = [
+            tree_key(*vals, self.resolver)
+            for vals in zip(df[street_col], df[number_col], df[tree_col], df[species_col])
+        ]
+        ids = self.assign(keys)
+
+        self.db.executemany(
+            "INSERT OR IGNORE INTO source_trees (source, tree_id) VALUES (?, ?)",
+            [(source, tree_id) for tree_id in set(ids)],
+        )
+        return pd.Series([format_tree_id(i) for i in ids], index=df.index, name="Tree ID")
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()